@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 from fabric.api import local, put, sudo
 from fabric.contrib.files import exists
+import hashlib
 
 from . import settings
 from .util import _get_enable_var
 
+# For the job worker and management commands
+PGBOUNCER_SPARE_CONNECTIONS = 5
+
 def _setup_database(env):
     # Test if database user exists, if not then create it
     query = "SELECT 1 FROM pg_roles WHERE rolname='{}'".format(env.db_user)
@@ -24,6 +28,35 @@ def _setup_database(env):
         sudo('psql -c "GRANT ALL PRIVILEGES ON DATABASE {db} TO {user}"'
             .format(db=env.db_name, user=env.db_user), user='postgres')
 
+def _setup_pgbouncer(env):
+    """Put PgBouncer between the site and PostgreSQL when the database port
+    in the settings is the PgBouncer port."""
+    if env.db_port != settings.PGBOUNCER_PORT:
+        return
+    sudo('apt-get install -y pgbouncer')
+    local('mkdir -p /tmp/{host}/'.format(host=env.host))
+    local('cp deploy/pgbouncer.ini.template /tmp/{host}/pgbouncer.ini'
+        .format(host=env.host))
+    local("sed -i'' s/DB_NAME/'{db}'/g /tmp/{host}/pgbouncer.ini".format(
+        host=env.host, db=env.db_name))
+    pool_size = int(env.gunicorn_workers) * int(env.gunicorn_threads) \
+        + PGBOUNCER_SPARE_CONNECTIONS
+    local("sed -i'' s/POOL_SIZE/'{size}'/g /tmp/{host}/pgbouncer.ini".format(
+        host=env.host, size=pool_size))
+    # PgBouncer checks passwords against the md5 hash that PostgreSQL uses
+    password = hashlib.md5((env.db_pass + env.db_user).encode()).hexdigest()
+    with open('/tmp/{host}/userlist.txt'.format(host=env.host), 'w') as f:
+        f.write('"{user}" "md5{password}"\n'.format(user=env.db_user,
+            password=password))
+
+    put('/tmp/{host}/pgbouncer.ini'.format(host=env.host),
+        '/etc/pgbouncer/pgbouncer.ini', use_sudo=True)
+    put('/tmp/{host}/userlist.txt'.format(host=env.host),
+        '/etc/pgbouncer/userlist.txt', use_sudo=True, mode=0o640)
+    sudo('chown postgres:postgres /etc/pgbouncer/userlist.txt')
+    sudo('systemctl enable pgbouncer')
+    sudo('systemctl restart pgbouncer')
+
 def _create_dir_structure(env):
     for subdir in ('static', 'virtualenv', 'source'):
         sudo('mkdir -p {dir}/{sub}'.format(dir=env.dest_dir, sub=subdir))
@@ -43,6 +76,11 @@ def _build_system_files(env):
         .format(host=env.host))
     local("sed -i'' s/SITENAME/'{host}'/g /tmp/{host}/gunicorn".format(
         host=env.host))
+    # and the one that runs the background jobs
+    local('cp deploy/worker-systemd.service.template /tmp/{host}/worker' \
+        .format(host=env.host))
+    local("sed -i'' s/SITENAME/'{host}'/g /tmp/{host}/worker".format(
+        host=env.host))
 
     # set up a nginx proxy
     local('cp deploy/nginx{ssl}.conf.template /tmp/{host}/nginx'.format(
@@ -62,6 +100,14 @@ def _deploy_system_files(env):
     sudo('systemctl daemon-reload')
     sudo('systemctl restart gunicorn-{host}.service'.format(host=env.host))
 
+    # Enable the job worker
+    put('/tmp/{host}/worker'.format(host=env.host),
+        '/etc/systemd/system/worker-{host}.service'.format(host=env.host),
+        use_sudo=True)
+    sudo('systemctl enable worker-{host}.service'.format(host=env.host))
+    sudo('systemctl daemon-reload')
+    sudo('systemctl restart worker-{host}.service'.format(host=env.host))
+
     # Enable the nginx proxy
     put('/tmp/{host}/nginx'.format(host=env.host),
         '/etc/nginx/sites-available/{host}'.format(host=env.host),
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from fabric.api import get, local, prompt, put, settings, sudo
+from fabric.api import get, local, prompt, put, run, settings, sudo
 from fabric.context_managers import hide
 from fabric.contrib.console import confirm
 from fabric.contrib.files import exists
@@ -9,13 +9,21 @@ import string
 
 from .util import _get_enable_var, _password_prompt
 
+PGBOUNCER_PORT = '6432'
+
 settings_map = (('db_name', 'PROJMAN_DB_NAME'),
         ('db_user', 'PROJMAN_DB_USER'),
         ('db_pass', 'PROJMAN_DB_PASSWORD'),
+        ('db_port', 'PROJMAN_DB_PORT'),
+        ('db_conn_max_age', 'PROJMAN_DB_CONN_MAX_AGE'),
         ('email_host', 'PROJMAN_EMAIL_HOST'),
         ('email_port', 'PROJMAN_EMAIL_PORT'),
         ('email_user', 'PROJMAN_EMAIL_HOST_USER'),
         ('email_pass', 'PROJMAN_EMAIL_HOST_PASSWORD'),
+        ('gunicorn_worker_class', 'PROJMAN_GUNICORN_WORKER_CLASS'),
+        ('gunicorn_workers', 'PROJMAN_GUNICORN_WORKERS'),
+        ('gunicorn_threads', 'PROJMAN_GUNICORN_THREADS'),
+        ('gunicorn_max_requests', 'PROJMAN_GUNICORN_MAX_REQUESTS'),
     )
 
 def _settings_prompt(env):
@@ -49,6 +57,13 @@ def _settings_prompt(env):
         env.db_user = prompt('Database user: ', default='projman')
     if 'db_pass' not in env.keys():
         env.db_pass = _password_prompt('Database')
+    if 'db_port' not in env.keys():
+        pgbouncer = confirm('Pool database connections with PgBouncer?',
+            default=False)
+        env.db_port = PGBOUNCER_PORT if pgbouncer else ''
+    if 'db_conn_max_age' not in env.keys():
+        env.db_conn_max_age = prompt(
+            'Seconds to keep database connections open: ', default='60')
     if 'email_host' not in env.keys():
         env.email_host = prompt('Email host: ', default='localhost')
     if 'email_port' not in env.keys():
@@ -57,6 +72,29 @@ def _settings_prompt(env):
         env.email_user = prompt('Robot email address: ')
     if 'email_pass' not in env.keys():
         env.email_pass = _password_prompt('Email')
+    if 'gunicorn_worker_class' not in env.keys():
+        env.gunicorn_worker_class = prompt('Gunicorn worker class: ',
+            default='gthread', validate=r'^(sync|gthread)$')
+    if 'gunicorn_workers' not in env.keys() \
+            or 'gunicorn_threads' not in env.keys():
+        workers, threads = _gunicorn_defaults(env)
+        env.gunicorn_workers = prompt('Gunicorn workers: ',
+            default=str(workers), validate=int)
+        env.gunicorn_threads = prompt('Threads per Gunicorn worker: ',
+            default=str(threads), validate=int)
+    if 'gunicorn_max_requests' not in env.keys():
+        env.gunicorn_max_requests = prompt(
+            'Requests before a Gunicorn worker is replaced (0 for never): ',
+            default='1000', validate=int)
+
+def _gunicorn_defaults(env):
+    """Return the number of workers and threads per worker that use all
+    of the cores of the host."""
+    cpus = int(run('nproc'))
+    if env.gunicorn_worker_class == 'gthread':
+        # Threads run while others wait for the database
+        return cpus + 1, 4
+    return 2 * cpus + 1, 1
 
 def _get_remote_settings(env):
     """Get the EnvironmentFile from the host and return it as a dict."""
@@ -87,11 +125,22 @@ def _deploy_settings_file(env):
     local(sed.format(host=env.host, org="SITENAME",   new=env.host))
     local(sed.format(host=env.host, org="db_name",    new=env.db_name))
     local(sed.format(host=env.host, org="db_user",    new=env.db_user))
+    local(sed.format(host=env.host, org="db_port",    new=env.db_port))
+    local(sed.format(host=env.host, org="db_conn_max_age",
+        new=env.db_conn_max_age))
     local(sed.format(host=env.host, org="secret",     new=env.secret_key))
     local(sed.format(host=env.host, org="email_host", new=env.email_host))
     local(sed.format(host=env.host, org="email_pass", new=env.email_pass))
     local(sed.format(host=env.host, org="email_user", new=env.email_user))
     local(sed.format(host=env.host, org="email_port", new=env.email_port))
+    local(sed.format(host=env.host, org="gunicorn_worker_class",
+        new=env.gunicorn_worker_class))
+    local(sed.format(host=env.host, org="gunicorn_workers",
+        new=env.gunicorn_workers))
+    local(sed.format(host=env.host, org="gunicorn_threads",
+        new=env.gunicorn_threads))
+    local(sed.format(host=env.host, org="gunicorn_max_requests",
+        new=env.gunicorn_max_requests))
     with hide('running', 'stdout'):
         local(sed.format(host=env.host, org="db_password", new=env.db_pass))
 
@@ -104,6 +153,7 @@ def _deploy_settings_file(env):
             host=env.host, user=env.user))
         with settings(warn_only=True):
             sudo('systemctl restart gunicorn-{}.service'.format(env.host))
+            sudo('systemctl restart worker-{}.service'.format(env.host))
 
 def _secret_key(env, lenght=50):
     try:
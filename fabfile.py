@@ -11,7 +11,7 @@ def requirements():
     """Install all the software requirements that pip can't manage or
     that don't live in our virtualenv."""
     sudo('apt-get install nginx git python3 python3-pip \
-        postgresql-server-dev-9.4 gettext')
+        postgresql-server-dev-9.4 gettext memcached')
     sudo('pip3 install virtualenv')
 
 def provision():
@@ -22,6 +22,7 @@ def provision():
     env.setup_ssl = confirm('Enable SSL?', default=False)
     deploy.provision._create_dir_structure(env)
     deploy.provision._setup_database(env)
+    deploy.provision._setup_pgbouncer(env)
     deploy.settings._deploy_settings_file(env)
 
     update()
@@ -40,8 +41,9 @@ def update():
     deploy.deploy._update_database(env)
 
 def restart():
-    """Restart the gunicorn service."""
+    """Restart the gunicorn service and the job worker."""
     sudo('service gunicorn-{host} restart'.format(host=env.host))
+    sudo('service worker-{host} restart'.format(host=env.host))
 
 def _setup_dir_variables():
     # Skip if we already done this
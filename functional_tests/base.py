@@ -2,6 +2,7 @@
 from datetime import datetime
 from django.contrib.auth import get_user_model
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
+from django.core.cache import cache
 from selenium import webdriver
 from selenium.common.exceptions import WebDriverException
 import signal
@@ -37,6 +38,10 @@ class FunctionalTestCase(StaticLiveServerTestCase):
     def setUp(self):
         if self.against_staging:
             remote.reset_database(self.server_host)
+        else:
+            # Flushing the database does not send any signals, so cached
+            # data from previous tests has to be removed as well
+            cache.clear()
         self.webdriver = webdriver.Firefox
         self.browser = self.webdriver()
         self.browser.implicitly_wait(DEFAULT_WAIT)
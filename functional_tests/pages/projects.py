@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from page_objects import PageObject, PageElement, MultiPageElement
-from selenium.webdriver.support.ui import Select
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.support.ui import Select, WebDriverWait
 
 class BaseProjectPage(PageObject):
     body    = PageElement(tag_name='body')
@@ -120,14 +121,25 @@ class EditActionPage(PageObject):
     content = PageElement(id_='content')
     confirm = PageElement(name='move')
     errors  = MultiPageElement(css='.errorlist')
-    form    = PageElement(tag_name='form')
+    form    = PageElement(css='#content form')
     deadline_date = PageElement(name='deadline_0')
     deadline_time = PageElement(name='deadline_1')
     text_box      = PageElement(name='text')
-
-    _select = PageElement(tag_name='select')
-    @property
-    def select(self):
-        return Select(self._select)
+    project       = PageElement(css='.project-autocomplete')
+    project_pk    = PageElement(name='project')
+
+    _project_options = MultiPageElement(css='#id_project_options option')
+
+    def pick_project(self, name, timeout=10):
+        """Type the name of a project and wait until its pk is picked."""
+        self.project.clear()
+        self.project.send_keys(name)
+        def picked(webdriver):
+            pks = [option.get_attribute('data-pk')
+                for option in self._project_options
+                if option.get_attribute('value') == name]
+            return pks and pks[0] == self.project_pk.get_attribute('value')
+        WebDriverWait(self.w, timeout,
+            ignored_exceptions=(StaleElementReferenceException,)).until(picked)
 # Compatibility with FTs that test for the move button
 MoveActionPage = EditActionPage
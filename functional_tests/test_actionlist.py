@@ -452,7 +452,7 @@ class ActionPageTests(FunctionalTestCase):
         # She ends up on an edit action page
         edit_page = pages.projects.EditActionPage(self.browser)
         # The edit action page allows moving of the action
-        self.assertIsNotNone(edit_page.select)
+        self.assertIsNotNone(edit_page.project)
 
         # There is also a field to edit a date and time for a deadline
         self.assertIn('Deadline', edit_page.content.text)
@@ -340,11 +340,12 @@ class ProjectsPageTests(FunctionalTestCase):
         move_page = pages.projects.MoveActionPage(self.browser)
         self.assertIn('Edit Look at game engine', self.browser.title)
         self.assertIn('Look at game engine', move_page.content.text)
-        self.assertIn('Actions', move_page.content.text)
+        self.assertEqual('Actions',
+            move_page.project.get_attribute('value'))
 
-        # There is also a select box where she can move the action to,
-        # she selects the project and clicks the confirm button
-        move_page.select.select_by_visible_text('Make a game')
+        # There is also a project field where she can move the action to,
+        # she types the name of the project and clicks the confirm button
+        move_page.pick_project('Make a game')
         move_page.form.submit()
 
         # She arrives on the action list, where the item has disapeared
@@ -387,10 +388,11 @@ class ProjectsPageTests(FunctionalTestCase):
         # project
         move_page = pages.projects.MoveActionPage(self.browser)
         self.assertIn('Find #1', move_page.content.text)
-        self.assertIn('Make a top 3 list', move_page.content.text)
+        self.assertEqual('Make a top 3 list',
+            move_page.project.get_attribute('value'))
 
-        # In the select box she selects the action list
-        move_page.select.select_by_visible_text('Actions')
+        # In the project field she types the name of the action list
+        move_page.pick_project('Actions')
         move_page.form.submit()
 
         # Alice is send back to the project page
@@ -424,7 +426,7 @@ class ProjectsPageTests(FunctionalTestCase):
 
         # She selects the other project from the move page
         move_page = pages.projects.MoveActionPage(self.browser)
-        move_page.select.select_by_visible_text('Buy wine')
+        move_page.pick_project('Buy wine')
         move_page.form.submit()
 
         # She returns to the first project's page, where there is no action
@@ -459,7 +461,7 @@ class ProjectsPageTests(FunctionalTestCase):
         # She tries to move the action to the project
         action_page.get_list_rows(action_page.thelist)[0]['move'].click()
         move_page = pages.projects.MoveActionPage(self.browser)
-        move_page.select.select_by_visible_text('Cook dinner')
+        move_page.pick_project('Cook dinner')
         move_page.form.submit()
 
         # She sees a duplicate action error
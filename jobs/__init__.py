@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+default_app_config = 'jobs.apps.JobsConfig'
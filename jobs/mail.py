@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+import pickle
+
+from jobs import tasks
+from jobs.models import SpooledEmail
+from jobs.queue import enqueue
+
+class SpoolEmailBackend(BaseEmailBackend):
+    """Store emails so that the worker sends them, instead of waiting for
+    the mail server during the request.
+
+    The worker sends them with the backend in SPOOLED_EMAIL_BACKEND.
+    """
+    def send_messages(self, email_messages):
+        emails = []
+        for message in email_messages:
+            # The connection can't be pickled and the worker uses its own
+            message.connection = None
+            emails.append(SpooledEmail(message=pickle.dumps(message)))
+        if not emails:
+            return 0
+        with transaction.atomic():
+            SpooledEmail.objects.bulk_create(emails)
+            enqueue(tasks.send_spooled_email)
+        return len(emails)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+import signal
+import threading
+
+from jobs.queue import run_next_job
+
+class Command(BaseCommand):
+    help = 'Run the jobs that were enqueued, until stopped. More workers ' \
+        'can be started on other machines or with --threads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=1)
+        parser.add_argument('--interval', type=float, default=1,
+            help='Seconds to wait before looking for jobs again when '
+                'there are none')
+        parser.add_argument('--once', action='store_true', default=False,
+            help='Stop when there are no jobs left')
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        # Let the running jobs finish when systemd stops the worker
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: self.stopping.set())
+
+        if options['threads'] <= 1:
+            self.work(options['interval'], options['once'])
+            return
+        threads = [threading.Thread(target=self.work,
+                args=(options['interval'], options['once']))
+            for i in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        # Signals only reach the main thread while it is not blocked
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(0.5)
+
+    def work(self, interval, once):
+        try:
+            while not self.stopping.is_set():
+                # Like at the start of a request, drop connections that
+                # are too old or broke during the last job
+                close_old_connections()
+                if not run_next_job():
+                    if once:
+                        break
+                    self.stopping.wait(interval)
+        finally:
+            # Every thread has a connection of its own
+            if threading.current_thread() is not threading.main_thread():
+                connection.close()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from django.db import models
+from django.utils import timezone
+
+class Job(models.Model):
+    """A call of a task that the worker still has to make.
+
+    Jobs are deleted once they succeed. A worker that claims a job moves
+    its run_after forward, so the job is retried when the worker dies
+    before it is done. Jobs that keep failing are kept with their error.
+    """
+    name = models.CharField(max_length=128)
+    # The keyword arguments of the task as JSON
+    arguments = models.TextField(default='{}')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    failed = models.BooleanField(default=False)
+    error = models.TextField(default='', blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return '{} ({})'.format(self.name, self.pk)
+
+    class Meta:
+        # Matches the order in which the worker claims jobs
+        index_together = (('failed', 'run_after', 'id'),)
+
+
+class SpooledEmail(models.Model):
+    """An email that jobs.mail.SpoolEmailBackend has not sent yet.
+
+    The worker claims emails like jobs, by moving send_after forward and
+    marking them with its claim.
+    """
+    # The pickled EmailMessage, it is only ever written by the backend
+    message = models.BinaryField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    send_after = models.DateTimeField(default=timezone.now)
+    claim = models.CharField(max_length=32, default='', blank=True,
+        db_index=True)
+    error = models.TextField(default='', blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return 'Email {}'.format(self.pk)
+
+    class Meta:
+        index_together = (('attempts', 'send_after', 'id'),)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""Run tasks outside of the request with the run_worker command.
+
+Tasks are functions that are registered with the task decorator in the
+tasks module of an app. Views call enqueue() with a task and its keyword
+arguments, which have to be JSON serializable. Jobs that are enqueued
+inside a transaction only become visible to the worker when it commits.
+"""
+from datetime import timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+import json
+import traceback
+
+from jobs.models import Job
+
+MAX_ATTEMPTS = 5
+# A job that has not finished this long after it was claimed is run again
+JOB_TIMEOUT = timedelta(minutes=10)
+# Doubled after every failed attempt
+RETRY_DELAY = timedelta(seconds=30)
+# How many jobs to try to claim when there is no SKIP LOCKED
+CLAIM_CANDIDATES = 10
+
+TASKS = {}
+
+def task(func):
+    """Register func so that it can be enqueued."""
+    func.task_name = '{}.{}'.format(func.__module__, func.__name__)
+    TASKS[func.task_name] = func
+    return func
+
+def enqueue(func, **kwargs):
+    """Have the worker call func with kwargs."""
+    return enqueue_at(timezone.now(), func, **kwargs)
+
+def enqueue_at(run_after, func, **kwargs):
+    """Have the worker call func with kwargs once run_after has passed."""
+    if TASKS.get(getattr(func, 'task_name', None)) is not func:
+        raise ValueError('{!r} is not a registered task'.format(func))
+    return Job.objects.create(name=func.task_name, run_after=run_after,
+        arguments=json.dumps(kwargs, cls=DjangoJSONEncoder))
+
+def claim_job():
+    """Return the next job that is due and mark it as being run, or None.
+
+    Several workers can claim jobs at the same time, each job is claimed by
+    only one of them.
+    """
+    now = timezone.now()
+    # SKIP LOCKED needs PostgreSQL 9.5
+    if connection.vendor == 'postgresql' and connection.pg_version >= 90500:
+        return _claim_skip_locked(now)
+    return _claim_optimistic(now)
+
+def _claim_skip_locked(now):
+    # Django has no skip_locked yet, jobs that other workers are claiming
+    # are passed over instead of waited on
+    table = connection.ops.quote_name(Job._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute('UPDATE {table} SET run_after = %s, '
+            'attempts = attempts + 1 WHERE id = (SELECT id FROM {table} '
+            'WHERE NOT failed AND run_after <= %s '
+            'ORDER BY run_after, id LIMIT 1 FOR UPDATE SKIP LOCKED) '
+            'RETURNING id'.format(table=table), [now + JOB_TIMEOUT, now])
+        row = cursor.fetchone()
+    return None if row is None else Job.objects.get(pk=row[0])
+
+def _claim_optimistic(now):
+    # Claiming only succeeds for the worker whose UPDATE still sees the
+    # run_after that it read
+    due = Job.objects.filter(failed=False, run_after__lte=now).order_by(
+        'run_after', 'pk').values_list('pk', 'run_after')
+    for pk, run_after in due[:CLAIM_CANDIDATES]:
+        if Job.objects.filter(pk=pk, run_after=run_after).update(
+                run_after=now + JOB_TIMEOUT, attempts=F('attempts') + 1):
+            return Job.objects.get(pk=pk)
+    return None
+
+def run_job(job):
+    """Call the task of a claimed job.
+
+    Succeeding jobs are deleted, failing ones are retried later until they
+    run out of attempts.
+    """
+    try:
+        func = TASKS.get(job.name)
+        if func is None:
+            raise LookupError('There is no task called ' + job.name)
+        func(**json.loads(job.arguments))
+    except Exception:
+        jobs = Job.objects.filter(pk=job.pk)
+        error = traceback.format_exc()
+        if job.attempts >= MAX_ATTEMPTS:
+            jobs.update(failed=True, error=error)
+        else:
+            jobs.update(error=error, run_after=timezone.now()
+                + RETRY_DELAY * 2 ** (job.attempts - 1))
+        return False
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+def run_next_job():
+    """Claim and run the next job, return whether there was one."""
+    job = claim_job()
+    if job is None:
+        return False
+    run_job(job)
+    return True
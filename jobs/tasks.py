@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db.models import F, Min
+from django.utils import timezone
+import pickle
+import traceback
+import uuid
+
+from jobs.models import Job, SpooledEmail
+from jobs.queue import (JOB_TIMEOUT, MAX_ATTEMPTS, RETRY_DELAY, enqueue_at,
+    task)
+
+EMAIL_BATCH_SIZE = 50
+DEFAULT_SPOOLED_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+def claim_emails(batch_size):
+    """Claim a batch of the emails that are due and return them."""
+    now = timezone.now()
+    claim = uuid.uuid4().hex
+    due = SpooledEmail.objects.filter(attempts__lt=MAX_ATTEMPTS,
+        send_after__lte=now).order_by('attempts', 'send_after', 'pk') \
+        .values_list('pk', flat=True)[:batch_size]
+    # Emails that another worker claimed in the meantime are no longer due
+    SpooledEmail.objects.filter(pk__in=list(due), send_after__lte=now) \
+        .update(claim=claim, send_after=now + JOB_TIMEOUT,
+            attempts=F('attempts') + 1)
+    return list(SpooledEmail.objects.filter(claim=claim).order_by('pk'))
+
+def enqueue_pending_emails():
+    """Have a job send the emails that are waiting, unless there is one.
+
+    The job runs when the first of them is due again, which may be after a
+    retry or after the claim of a worker that died has timed out.
+    """
+    send_after = SpooledEmail.objects.filter(attempts__lt=MAX_ATTEMPTS) \
+        .aggregate(Min('send_after'))['send_after__min']
+    if send_after is None:
+        return
+    # The job that is running has been moved JOB_TIMEOUT ahead by its claim
+    if not Job.objects.filter(name=send_spooled_email.task_name,
+            failed=False, run_after__lte=send_after).exists():
+        enqueue_at(send_after, send_spooled_email)
+
+@task
+def send_spooled_email():
+    """Send the spooled emails over one connection, a batch at a time.
+
+    Emails that can't be sent are tried again later by a new job, until
+    they run out of attempts.
+    """
+    now = timezone.now()
+    if SpooledEmail.objects.filter(attempts__lt=MAX_ATTEMPTS,
+            send_after__lte=now).exists():
+        connection = get_connection(getattr(settings,
+            'SPOOLED_EMAIL_BACKEND', DEFAULT_SPOOLED_EMAIL_BACKEND))
+        try:
+            connection.open()
+        except Exception:
+            # The emails are not to blame when the mail server can't be
+            # reached, so they keep their attempts
+            SpooledEmail.objects.filter(attempts__lt=MAX_ATTEMPTS,
+                send_after__lte=now).update(send_after=now + RETRY_DELAY,
+                error=traceback.format_exc())
+        else:
+            try:
+                _send_claimed_emails(connection)
+            finally:
+                connection.close()
+    enqueue_pending_emails()
+
+def _send_claimed_emails(connection):
+    emails = claim_emails(EMAIL_BATCH_SIZE)
+    while emails:
+        for email in emails:
+            try:
+                connection.send_messages([pickle.loads(email.message)])
+            except Exception:
+                SpooledEmail.objects.filter(pk=email.pk).update(
+                    send_after=timezone.now()
+                        + RETRY_DELAY * 2 ** (email.attempts - 1),
+                    error=traceback.format_exc())
+            else:
+                email.delete()
+        emails = claim_emails(EMAIL_BATCH_SIZE)
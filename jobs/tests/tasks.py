@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+from jobs.queue import task
+
+calls = []
+
+@task
+def remember(**kwargs):
+    calls.append(kwargs)
+
+@task
+def fail():
+    raise ValueError('Failing on purpose')
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from django.core.management import call_command
+from django.test import TestCase
+from unittest import mock
+
+from jobs import queue
+from jobs.models import Job
+from jobs.tests import tasks
+
+# Closing the connection would end the transaction of the test
+@mock.patch('jobs.management.commands.run_worker.close_old_connections')
+class RunWorkerTests(TestCase):
+    def setUp(self):
+        tasks.calls.clear()
+
+    def test_runs_jobs_until_none_are_left(self, close_old_connections):
+        for i in range(3):
+            queue.enqueue(tasks.remember, number=i)
+        call_command('run_worker', '--once')
+        self.assertEqual(tasks.calls, [{'number': i} for i in range(3)])
+        self.assertFalse(Job.objects.exists())
+        self.assertTrue(close_old_connections.called)
+
+    def test_keeps_failed_jobs(self, close_old_connections):
+        queue.enqueue(tasks.fail)
+        call_command('run_worker', '--once')
+        self.assertEqual(Job.objects.count(), 1)
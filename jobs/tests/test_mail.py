@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from unittest import mock
+
+from jobs import queue, tasks
+from jobs.models import Job, SpooledEmail
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise OSError('The mail server is down')
+
+
+class UnreachableBackend(EmailBackend):
+    def open(self):
+        raise OSError('The mail server can not be reached')
+
+
+def send(n=1):
+    for i in range(n):
+        mail.send_mail('Subject {}'.format(i), 'Body', 'from@test.org',
+            ['to@test.org'])
+
+@override_settings(EMAIL_BACKEND='jobs.mail.SpoolEmailBackend',
+    SPOOLED_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class SpoolEmailBackendTests(TestCase):
+    def run_worker(self):
+        while queue.run_next_job():
+            pass
+
+    def test_sending_only_spools_email(self):
+        send()
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(SpooledEmail.objects.count(), 1)
+        self.assertEqual(Job.objects.get().name,
+            tasks.send_spooled_email.task_name)
+
+    def test_worker_sends_spooled_email(self):
+        send()
+        self.run_worker()
+        self.assertEqual([m.subject for m in mail.outbox], ['Subject 0'])
+        self.assertFalse(SpooledEmail.objects.exists())
+
+    @override_settings(
+        SPOOLED_EMAIL_BACKEND='jobs.tests.test_mail.CountingBackend')
+    @mock.patch('jobs.tasks.EMAIL_BATCH_SIZE', 2)
+    def test_sends_batches_over_one_connection(self):
+        CountingBackend.opened = 0
+        send(5)
+        tasks.send_spooled_email()
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.opened, 1)
+
+    @override_settings(
+        SPOOLED_EMAIL_BACKEND='jobs.tests.test_mail.FailingBackend')
+    def test_failed_email_is_retried_later(self):
+        send()
+        self.run_worker()
+        email = SpooledEmail.objects.get()
+        self.assertIn('The mail server is down', email.error)
+        self.assertGreater(email.send_after, timezone.now())
+        job = Job.objects.get()
+        self.assertEqual(job.run_after, email.send_after)
+
+    @override_settings(
+        SPOOLED_EMAIL_BACKEND='jobs.tests.test_mail.FailingBackend')
+    def test_email_is_not_retried_after_last_attempt(self):
+        send()
+        SpooledEmail.objects.update(attempts=queue.MAX_ATTEMPTS - 1)
+        self.run_worker()
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(SpooledEmail.objects.get().attempts,
+            queue.MAX_ATTEMPTS)
+
+    @override_settings(
+        SPOOLED_EMAIL_BACKEND='jobs.tests.test_mail.UnreachableBackend')
+    def test_emails_wait_for_unreachable_mail_server(self):
+        send()
+        for i in range(queue.MAX_ATTEMPTS + 1):
+            Job.objects.update(run_after=timezone.now())
+            self.run_worker()
+        email = SpooledEmail.objects.get()
+        self.assertEqual(email.attempts, 0)
+        self.assertIn('can not be reached', email.error)
+        job = Job.objects.get()
+        self.assertFalse(job.failed)
+        self.assertEqual(job.run_after, email.send_after)
+
+        Job.objects.update(run_after=timezone.now())
+        SpooledEmail.objects.update(send_after=timezone.now())
+        with self.settings(SPOOLED_EMAIL_BACKEND=
+                'django.core.mail.backends.locmem.EmailBackend'):
+            self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(SpooledEmail.objects.exists())
+
+    def test_emails_of_worker_that_died_are_sent_later(self):
+        send()
+        # The worker claimed the job and the email, then died
+        Job.objects.update(attempts=1, run_after=timezone.now())
+        tasks.claim_emails(tasks.EMAIL_BATCH_SIZE)
+        self.run_worker()
+        email = SpooledEmail.objects.get()
+        self.assertEqual(Job.objects.get().run_after, email.send_after)
+
+        Job.objects.update(run_after=timezone.now())
+        SpooledEmail.objects.update(send_after=timezone.now())
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(Job.objects.exists())
+
+    def test_pending_emails_get_one_job(self):
+        send(3)
+        SpooledEmail.objects.update(
+            send_after=timezone.now() + queue.RETRY_DELAY)
+        self.run_worker()
+        self.assertEqual(Job.objects.count(), 1)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+import json
+
+from jobs import queue
+from jobs.models import Job
+from jobs.tests import tasks
+
+def not_a_task():
+    pass
+
+class EnqueueTests(TestCase):
+    def test_stores_task_and_arguments(self):
+        job = queue.enqueue(tasks.remember, number=1)
+        self.assertEqual(job.name, 'jobs.tests.tasks.remember')
+        self.assertEqual(json.loads(job.arguments), {'number': 1})
+
+    def test_only_accepts_tasks(self):
+        with self.assertRaises(ValueError):
+            queue.enqueue(not_a_task)
+        self.assertFalse(Job.objects.exists())
+
+
+class ClaimJobTests(TestCase):
+    def test_claims_oldest_due_job(self):
+        first = queue.enqueue(tasks.remember)
+        queue.enqueue(tasks.remember)
+        job = queue.claim_job()
+        self.assertEqual(job.pk, first.pk)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_after, timezone.now())
+
+    def test_job_is_claimed_once(self):
+        queue.enqueue(tasks.remember)
+        self.assertIsNotNone(queue.claim_job())
+        self.assertIsNone(queue.claim_job())
+
+    def test_skips_jobs_that_are_not_due(self):
+        Job.objects.create(name=tasks.remember.task_name,
+            run_after=timezone.now() + timedelta(minutes=1))
+        self.assertIsNone(queue.claim_job())
+
+    def test_skips_failed_jobs(self):
+        Job.objects.create(name=tasks.remember.task_name, failed=True)
+        self.assertIsNone(queue.claim_job())
+
+    def test_reclaims_jobs_after_timeout(self):
+        queue.enqueue(tasks.remember)
+        queue.claim_job()
+        Job.objects.update(run_after=timezone.now())
+        self.assertEqual(queue.claim_job().attempts, 2)
+
+
+class RunJobTests(TestCase):
+    def setUp(self):
+        tasks.calls.clear()
+
+    def test_calls_task_and_deletes_job(self):
+        queue.enqueue(tasks.remember, text='dinosaur')
+        self.assertTrue(queue.run_next_job())
+        self.assertEqual(tasks.calls, [{'text': 'dinosaur'}])
+        self.assertFalse(Job.objects.exists())
+
+    def test_no_job_to_run(self):
+        self.assertFalse(queue.run_next_job())
+
+    def test_failing_job_is_retried_later(self):
+        queue.enqueue(tasks.fail)
+        queue.run_next_job()
+        job = Job.objects.get()
+        self.assertFalse(job.failed)
+        self.assertIn('Failing on purpose', job.error)
+        self.assertGreater(job.run_after, timezone.now())
+
+    def test_job_fails_after_last_attempt(self):
+        queue.enqueue(tasks.fail)
+        Job.objects.update(attempts=queue.MAX_ATTEMPTS - 1)
+        queue.run_next_job()
+        self.assertTrue(Job.objects.get().failed)
+
+    def test_unknown_task_fails(self):
+        Job.objects.create(name='jobs.tests.tasks.unknown',
+            attempts=queue.MAX_ATTEMPTS - 1)
+        queue.run_next_job()
+        job = Job.objects.get()
+        self.assertTrue(job.failed)
+        self.assertIn('unknown', job.error)
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from django.apps import AppConfig
+
+class LandingConfig(AppConfig):
+    name = 'landing'
+
+    def ready(self):
+        import landing.signals
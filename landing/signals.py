@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+import time
+
+# Seconds that a connection is trusted after it was opened or checked. One
+# that the database drops within that time fails a request before Django
+# replaces it
+HEALTH_CHECK_INTERVAL = 10
+
+@receiver(connection_created)
+def remember_connection_opened(connection, **kwargs):
+    connection.health_checked = time.monotonic()
+
+@receiver(request_started)
+def check_persistent_connections(**kwargs):
+    # Django only notices that the database dropped a connection that it
+    # kept open after a query has failed on it. Databases that set
+    # CONN_HEALTH_CHECKS get a fresh connection instead, but checking costs
+    # a round trip so it is only done once in a while
+    now = time.monotonic()
+    for conn in connections.all():
+        if (not conn.settings_dict.get('CONN_HEALTH_CHECKS')
+                or conn.connection is None
+                or now - getattr(conn, 'health_checked', 0)
+                    < HEALTH_CHECK_INTERVAL):
+            continue
+        if conn.is_usable():
+            conn.health_checked = now
+        else:
+            conn.close()
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from django.db import connection
+from django.test import SimpleTestCase
+from unittest import mock
+import time
+
+from landing import signals
+
+@mock.patch.object(connection, 'health_checked', 0, create=True)
+@mock.patch.object(connection, 'close')
+@mock.patch.object(connection, 'is_usable', return_value=False)
+class CheckPersistentConnectionsTests(SimpleTestCase):
+    def test_closes_broken_connection_when_checks_are_enabled(self,
+            is_usable, close):
+        with mock.patch.dict(connection.settings_dict,
+                {'CONN_HEALTH_CHECKS': True}), \
+                mock.patch.object(connection, 'connection', mock.Mock()):
+            signals.check_persistent_connections()
+        close.assert_called_once_with()
+
+    def test_keeps_connection_without_checks(self, is_usable, close):
+        with mock.patch.object(connection, 'connection', mock.Mock()):
+            signals.check_persistent_connections()
+        self.assertFalse(close.called)
+
+    def test_keeps_usable_connection(self, is_usable, close):
+        is_usable.return_value = True
+        with mock.patch.dict(connection.settings_dict,
+                {'CONN_HEALTH_CHECKS': True}), \
+                mock.patch.object(connection, 'connection', mock.Mock()):
+            signals.check_persistent_connections()
+        self.assertFalse(close.called)
+
+    def test_does_not_check_recently_checked_connection(self, is_usable,
+            close):
+        connection.health_checked = time.monotonic()
+        with mock.patch.dict(connection.settings_dict,
+                {'CONN_HEALTH_CHECKS': True}), \
+                mock.patch.object(connection, 'connection', mock.Mock()):
+            signals.check_persistent_connections()
+        self.assertFalse(is_usable.called)
+        self.assertFalse(close.called)
+
+    def test_new_connections_count_as_checked(self, is_usable, close):
+        signals.remember_connection_opened(connection=connection)
+        self.assertLess(time.monotonic() - connection.health_checked, 1)
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 from django.contrib.sites.models import Site
 from django.core.urlresolvers import resolve
+from django.db import DatabaseError
 from django.test import TestCase
+import json
+from unittest import mock
 
-from landing.views import LandingView
+from landing.views import HealthCheckView, LandingView
 
 class LandingPageTests(TestCase):
     def test_root_url_resolves_to_landing_page_view(self):
@@ -18,3 +21,23 @@ class LandingPageTests(TestCase):
     def test_site_context_variable_set(self):
         response = self.client.get('/en/')
         self.assertIsInstance(response.context['site'], Site)
+
+
+class HealthCheckTests(TestCase):
+    def test_health_url_is_not_translated(self):
+        found = resolve('/health/')
+        self.assertEqual(found.func.__name__,
+            HealthCheckView.as_view().__name__)
+
+    def test_reports_database_is_reachable(self):
+        response = self.client.get('/health/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode()),
+            {'database': 'ok'})
+        self.assertIn('max-age=0', response['Cache-Control'])
+
+    def test_reports_database_errors(self):
+        with mock.patch('landing.views.connection.cursor',
+                side_effect=DatabaseError):
+            response = self.client.get('/health/')
+        self.assertEqual(response.status_code, 503)
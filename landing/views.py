@@ -1,5 +1,22 @@
 from braces.views import AnonymousRequiredMixin
-from django.views.generic import TemplateView
+from django.db import DatabaseError, connection
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import never_cache
+from django.views.generic import TemplateView, View
 
 class LandingView(AnonymousRequiredMixin, TemplateView):
     template_name = 'landing/index.html'
+
+
+@method_decorator(never_cache, name='dispatch')
+class HealthCheckView(View):
+    """Tell monitoring and load balancers whether the site can reach its
+    database."""
+    def get(self, request, *args, **kwargs):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            return JsonResponse({'database': 'unavailable'}, status=503)
+        return JsonResponse({'database': 'ok'})
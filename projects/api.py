@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""Read-only JSON API over the projects, actions and inlist of a user.
+
+Every response has an ETag which is derived from the user's change counter,
+so a client that polls with If-None-Match gets an empty 304 response for as
+long as nothing has changed.
+"""
+from collections import OrderedDict
+from datetime import timedelta
+import hashlib
+
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils import timezone
+from django.utils.http import urlencode
+from django.views.decorators.http import condition
+from django.views.generic import View
+
+from projects import models, pagination, search
+
+NOT_AUTHENTICATED_ERROR = 'Authentication credentials were not provided'
+RESYNC_REQUIRED_ERROR = 'The changes since the cursor are no longer ' \
+    'available, fetch everything again'
+# Longer than any transaction that records changes takes to commit
+CHANGE_SETTLE_TIME = timedelta(seconds=10)
+
+def _etag(request, *args, **kwargs):
+    if not request.user.is_authenticated():
+        return None
+    key = '{}:{}:{}'.format(request.user.pk,
+        request.user.change_counter.value, request.get_full_path())
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def _limit(request):
+    try:
+        return int(request.GET['limit'])
+    except (KeyError, ValueError):
+        return None
+
+def serialize_project(project):
+    return {
+        'id': project.pk,
+        'name': project.name,
+        'description': project.description,
+        'open_actions': project.open_actions,
+        'complete_actions': project.complete_actions,
+    }
+
+def serialize_action(action):
+    return {
+        'id': action.pk,
+        'text': action.text,
+        'complete': action.complete,
+        'deadline': action.deadline,
+        'project': action.project_id,
+    }
+
+def serialize_inlist_item(item):
+    return {
+        'id': item.pk,
+        'text': item.text,
+    }
+
+# The serializer for each kind of object, by model_name
+SERIALIZERS = OrderedDict([
+    ('project', (models.Project, serialize_project)),
+    ('actionlistitem', (models.ActionlistItem, serialize_action)),
+    ('inlistitem', (models.InlistItem, serialize_inlist_item)),
+])
+
+
+class ApiView(View):
+    http_method_names = ['get', 'head', 'options']
+
+    @method_decorator(condition(etag_func=_etag))
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated():
+            return JsonResponse({'detail': NOT_AUTHENTICATED_ERROR},
+                status=401)
+        response = super(ApiView, self).dispatch(request, *args, **kwargs)
+        # Clients may keep the response but need to check the ETag first
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ApiListView(ApiView):
+    """List the user's rows of model a page at a time.
+
+    The size of a page can be set with ?limit=, the url of the next page
+    is given in the response.
+    """
+    model = None
+    serialize = None
+
+    def get_queryset(self):
+        return self.model.objects.filter(user=self.request.user)
+
+    def get(self, request, *args, **kwargs):
+        limit = _limit(request)
+        items, cursor = pagination.paginate(self.get_queryset(),
+            request.GET.get('after'), limit)
+
+        next_url = None
+        if cursor is not None:
+            query = {'after': cursor}
+            if limit is not None:
+                query['limit'] = limit
+            next_url = '{}?{}'.format(request.path, urlencode(query))
+        return JsonResponse({'results': [self.serialize(i) for i in items],
+            'next': next_url})
+
+
+class ProjectListView(ApiListView):
+    model = models.Project
+    serialize = staticmethod(serialize_project)
+
+
+class ProjectDetailView(ApiView):
+    def get(self, request, *args, **kwargs):
+        project = get_object_or_404(models.Project, pk=self.kwargs['pk'],
+            user=request.user)
+        return JsonResponse(serialize_project(project))
+
+
+class ProjectActionListView(ApiListView):
+    model = models.ActionlistItem
+    serialize = staticmethod(serialize_action)
+
+    def get_queryset(self):
+        project = get_object_or_404(models.Project, pk=self.kwargs['pk'],
+            user=self.request.user)
+        return super(ProjectActionListView, self).get_queryset().filter(
+            project=project)
+
+
+class InlistView(ApiListView):
+    model = models.InlistItem
+    serialize = staticmethod(serialize_inlist_item)
+
+
+class ChangesView(ApiView):
+    """List everything that changed after the cursor of an earlier response.
+
+    Each object is listed once, with its current data or as deleted when it
+    no longer exists. Leaving out the cursor lists all changes ever made,
+    as long as none were pruned. Deleting a project also lists the deletion
+    of its actions.
+
+    Changes can commit in another order than their pks, so the cursor only
+    moves past changes that are older than CHANGE_SETTLE_TIME. Newer ones
+    are listed again by the next sync. Cursors from before the changes that
+    were pruned get a 410 response with a new cursor, the client has to
+    fetch all of its data again and continue from there.
+    """
+    def get(self, request, *args, **kwargs):
+        since = request.GET.get('since')
+        last = (pagination.decode_cursor(since, '', '') or [0])[-1]
+        if last < request.user.change_counter.pruned:
+            return self.resync_required(request)
+
+        changes, more = pagination.paginate(
+            models.Change.objects.filter(user=request.user), since,
+            _limit(request))
+        settled = timezone.now() - CHANGE_SETTLE_TIME
+        for change in changes:
+            if change.created > settled:
+                more = None
+                break
+            last = change.pk
+
+        # Only the last change to an object matters
+        latest = OrderedDict()
+        for change in changes:
+            key = (change.kind, change.object_id)
+            latest.pop(key, None)
+            latest[key] = change
+
+        objects = {}
+        for kind, (model, serialize) in SERIALIZERS.items():
+            pks = [pk for k, pk in latest if k == kind]
+            if pks:
+                objects[kind] = model.objects.filter(
+                    user=request.user).in_bulk(pks)
+
+        results = []
+        for kind, pk in latest:
+            obj = objects.get(kind, {}).get(pk)
+            results.append({'type': kind, 'id': pk, 'deleted': obj is None,
+                'data': None if obj is None else SERIALIZERS[kind][1](obj)})
+        return JsonResponse({'changes': results,
+            'cursor': pagination.encode_cursor('', '', [last]),
+            'more': more is not None})
+
+    def resync_required(self, request):
+        # Changes after the cursor may not have committed yet, so the
+        # client will see them on its next sync
+        last = models.Change.objects.filter(user=request.user,
+            created__lte=timezone.now() - CHANGE_SETTLE_TIME).order_by(
+            '-pk').values_list('pk', flat=True).first()
+        last = max(last or 0, request.user.change_counter.pruned)
+        return JsonResponse({'detail': RESYNC_REQUIRED_ERROR,
+            'cursor': pagination.encode_cursor('', '', [last])}, status=410)
+
+
+class SearchView(ApiView):
+    """Search with ?q=, the best matches come first."""
+    def get(self, request, *args, **kwargs):
+        try:
+            page = int(request.GET.get('page', 1))
+        except ValueError:
+            page = 1
+        results, more = search.search(request.user, request.GET.get('q', ''),
+            page, _limit(request))
+        return JsonResponse({'results': [{'type': r.kind, 'id': r.object.pk,
+                'rank': r.rank, 'data': SERIALIZERS[r.kind][1](r.object)}
+                for r in results],
+            'more': more})
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+from django.conf.urls import url
+from projects import api
+
+urlpatterns = [
+    url(r'^projects/$', api.ProjectListView.as_view(), name='projects'),
+    url(r'^projects/(?P<pk>[0-9]+)/$', api.ProjectDetailView.as_view(),
+        name='project'),
+    url(r'^projects/(?P<pk>[0-9]+)/actions/$',
+        api.ProjectActionListView.as_view(), name='project_actions'),
+    url(r'^inlist/$', api.InlistView.as_view(), name='inlist'),
+    url(r'^changes/$', api.ChangesView.as_view(), name='changes'),
+    url(r'^search/$', api.SearchView.as_view(), name='search'),
+]
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+from django.core.cache import cache
+from django.utils import timezone
+import uuid
+
+from projects import models
+
+PROJECT_LIST_KEY = 'projects:project_list:{}'
+PROJECT_LIST_TIMEOUT = 60 * 60 * 24
+DASHBOARD_KEY = 'projects:dashboard:{}:{}:{}'
+DASHBOARD_TIMEOUT = 60 * 60
+DASHBOARD_DEADLINES = 20
+
+# Only the parts of a project that are needed to link to it
+ProjectLink = namedtuple('ProjectLink', ('pk', 'name'))
+# What the dashboard shows of actions and projects
+DeadlineLink = namedtuple('DeadlineLink', ('pk', 'text', 'deadline',
+    'project_pk', 'project_name'))
+ProjectCounts = namedtuple('ProjectCounts', ('pk', 'name', 'open_actions',
+    'deadline_actions'))
+
+def get_project_list(user):
+    """Return the version and links of all of the user's projects.
+
+    The version changes every time that the list is rebuilt, so it can be
+    used to cache anything that is rendered from the list.
+    """
+    key = PROJECT_LIST_KEY.format(user.pk)
+    project_list = cache.get(key)
+    if project_list is None:
+        projects = models.Project.objects.filter(user=user).values_list(
+            'pk', 'name')
+        project_list = (uuid.uuid4().hex, [ProjectLink(*p) for p in projects])
+        cache.set(key, project_list, PROJECT_LIST_TIMEOUT)
+    return project_list
+
+def invalidate_project_list(user_id):
+    cache.delete(PROJECT_LIST_KEY.format(user_id))
+
+def get_dashboard(user):
+    """Return the open actions with the nearest deadlines and the projects
+    that still have open actions.
+
+    The deadlines are split at the start of the current hour into the ones
+    that are overdue and the ones after that, with DASHBOARD_DEADLINES of
+    each. Deadlines that pass during the hour are left to the caller, so
+    the cached lists don't change over time. The cache key contains the
+    hour and the user's change counter, so every change to the user's data
+    makes a new dashboard.
+    """
+    version = models.ChangeCounter.objects.filter(user=user).values_list(
+        'value', flat=True).first()
+    hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    key = DASHBOARD_KEY.format(user.pk, version, hour.strftime('%Y%m%d%H'))
+    dashboard = cache.get(key)
+    if dashboard is None:
+        deadlines = models.ActionlistItem.objects.filter(user=user,
+            complete=False, deadline__isnull=False,
+            project__deleting=False).order_by('deadline', 'pk').values_list(
+            'pk', 'text', 'deadline', 'project_id', 'project__name')
+        overdue = deadlines.filter(deadline__lt=hour)[:DASHBOARD_DEADLINES]
+        upcoming = deadlines.filter(deadline__gte=hour)[:DASHBOARD_DEADLINES]
+        projects = models.Project.objects.filter(user=user,
+            open_actions__gt=0).values_list('pk', 'name', 'open_actions',
+            'deadline_actions')
+        dashboard = ([DeadlineLink(*d) for d in overdue],
+            [DeadlineLink(*d) for d in upcoming],
+            [ProjectCounts(*p) for p in projects])
+        cache.set(key, dashboard, DASHBOARD_TIMEOUT)
+    return dashboard
@@ -1,7 +1,14 @@
 # -*- coding:utf-8 -*-
-from projects import models
+from django.utils.functional import SimpleLazyObject
+
+from projects.cache import get_project_list
 
 def project_list(request):
     if not request.user.is_authenticated():
-        return {'project_list': []}
-    return {'project_list': models.Project.objects.filter(user=request.user)}
+        return {'project_list': [], 'project_list_version': None}
+    # Not every page shows the project list, so only get it when needed
+    cached = SimpleLazyObject(lambda: get_project_list(request.user))
+    return {
+        'project_list': SimpleLazyObject(lambda: cached[1]),
+        'project_list_version': SimpleLazyObject(lambda: cached[0]),
+    }
@@ -2,8 +2,11 @@
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import ButtonHolder, Div, Layout, Submit, HTML
 from django import forms
-from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.core.exceptions import ValidationError
 from django.core.urlresolvers import reverse
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Case, Value, When
+from django.utils.html import format_html
 from django.utils.translation import ugettext_lazy as _
 
 from projects import models
@@ -15,8 +18,39 @@ DUPLICATE_ITEM_ERROR = _("You've already got this on your list")
 DUPLICATE_PROJECT_ERROR = ('You already have this project')
 DUPLICATE_MOVE_ERROR = _("This is already planned for that project")
 ILLEGAL_ACTION_ERROR = _("You are not allowed to do this")
+TOO_MANY_ITEMS_ERROR = _('You cannot add more than %(max)d items at once')
+LONG_ITEM_ERROR = _('Items cannot be longer than %(max)d characters')
+NO_ACTIONS_SELECTED_ERROR = _('Select the actions that you want to change')
+NO_TARGET_PROJECT_ERROR = _('Select the project to move the actions to')
+NO_ITEMS_SELECTED_ERROR = _('Select the items that you want to convert')
+
+MAX_BULK_ITEMS = 500
+
+class UniqueConstraintMixin(object):
+    """Let the unique constraints of the database find duplicates.
+
+    Nothing is queried up front, instead saving happens in a savepoint and
+    a violated constraint adds duplicate_error to duplicate_field. Saving
+    then returns None and the form is no longer valid.
+    """
+    duplicate_field = None
+    duplicate_error = None
+
+    def validate_unique(self):
+        pass
+
+    def save(self, commit=True):
+        try:
+            with transaction.atomic():
+                return super(UniqueConstraintMixin, self).save(commit)
+        except IntegrityError:
+            self.add_error(self.duplicate_field, self.duplicate_error)
+
+
+class InlistForm(UniqueConstraintMixin, forms.ModelForm):
+    duplicate_field = 'text'
+    duplicate_error = DUPLICATE_ITEM_ERROR
 
-class InlistForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super(InlistForm, self).__init__(*args, **kwargs)
         self.helper = FormHelper()
@@ -29,13 +63,6 @@ class InlistForm(forms.ModelForm):
                 css_class="mui-row"),
         )
 
-    def validate_unique(self):
-        try:
-            self.instance.validate_unique()
-        except ValidationError as e:
-            e.error_dict = {'text': [DUPLICATE_ITEM_ERROR]}
-            self._update_errors(e)
-
     class Meta:
         model = models.InlistItem
         fields = ('text',)
@@ -44,14 +71,80 @@ class InlistForm(forms.ModelForm):
         )}
         error_messages = {
             'text': {'required': EMPTY_TEXT_ERROR},
-            NON_FIELD_ERRORS: {'unique_together': DUPLICATE_ITEM_ERROR},
         }
 
 
-class ActionlistForm(forms.ModelForm):
+class BulkInlistForm(forms.Form):
+    text = forms.CharField(widget=forms.Textarea(
+            {'placeholder': _('What needs to be done? One item per line')}),
+        error_messages={'required': EMPTY_TEXT_ERROR})
+
+    def __init__(self, *args, **kwargs):
+        super(BulkInlistForm, self).__init__(*args, **kwargs)
+        self.helper = FormHelper()
+        self.helper.form_method = 'POST'
+        self.helper.form_class = 'mui-form'
+        self.helper.layout = Layout('text',
+            Div(Div(ButtonHolder(Submit('submit', _('Add'))),
+                    css_class="mui-col-xs-12"),
+                css_class="mui-row"),
+        )
+
+    def clean_text(self):
+        """Turn the text into a list of unique, non-empty lines."""
+        lines = []
+        seen = set()
+        for line in self.cleaned_data['text'].splitlines():
+            line = line.strip()
+            if line and line not in seen:
+                lines.append(line)
+                seen.add(line)
+
+        max_length = models.InlistItem._meta.get_field('text').max_length
+        if not lines:
+            raise ValidationError(EMPTY_TEXT_ERROR)
+        if len(lines) > MAX_BULK_ITEMS:
+            raise ValidationError(TOO_MANY_ITEMS_ERROR,
+                params={'max': MAX_BULK_ITEMS})
+        if any(len(line) > max_length for line in lines):
+            raise ValidationError(LONG_ITEM_ERROR,
+                params={'max': max_length})
+        return lines
+
+    def save(self, user):
+        """Add all lines that are not on the inlist yet.
+
+        Returns the created items and the lines that were skipped because
+        they are already on the user's inlist.
+        """
+        lines = self.cleaned_data['text']
+        existing = set(models.InlistItem.objects.filter(user=user,
+            text__in=lines).order_by().values_list('text', flat=True))
+        items = [models.InlistItem(text=line, user=user) for line in lines
+            if line not in existing]
+        try:
+            with transaction.atomic():
+                models.InlistItem.objects.bulk_create(items)
+        except IntegrityError:
+            # Somebody else added one of the items in the meantime
+            self.add_error('text', DUPLICATE_ITEM_ERROR)
+            return [], []
+        if items:
+            # The primary keys of the new items are unknown after bulk_create
+            models.record_changes(models.InlistItem, user.pk,
+                models.InlistItem.objects.filter(user=user,
+                    text__in=[i.text for i in items]).values_list('pk',
+                    flat=True))
+        return items, [line for line in lines if line in existing]
+
+
+class ActionlistForm(UniqueConstraintMixin, forms.ModelForm):
+    duplicate_error = DUPLICATE_ACTION_ERROR
+
     def __init__(self, *args, **kwargs):
         super(ActionlistForm, self).__init__(*args, **kwargs)
         self.helper = FormHelper()
+        self.helper.form_id = 'add-action'
         self.helper.form_class = 'mui-form--inline'
         self.helper.layout = Layout(
             Div(Div('text', css_class="mui-col-xs-8 mui-col-md-6 hide-label"),
@@ -60,13 +153,6 @@ class ActionlistForm(forms.ModelForm):
             css_class="mui-row")
         )
 
-    def validate_unique(self):
-        try:
-            self.instance.validate_unique()
-        except ValidationError as e:
-            self._errors[NON_FIELD_ERRORS].clear()
-            self.add_error(NON_FIELD_ERRORS, DUPLICATE_ACTION_ERROR)
-
     class Meta:
         model = models.ActionlistItem
         fields = ('text',)
@@ -88,6 +174,82 @@ class CompleteActionForm(forms.Form):
             self.add_error(None, ILLEGAL_ACTION_ERROR)
 
 
+class BulkActionForm(forms.Form):
+    """Complete, move or delete several actions of a project at once."""
+    actions = forms.ModelMultipleChoiceField(
+        queryset=models.ActionlistItem.objects.none(),
+        widget=forms.MultipleHiddenInput(),
+        error_messages={'required': NO_ACTIONS_SELECTED_ERROR})
+    operation = forms.ChoiceField([('complete', _('Toggle completion')),
+        ('move', _('Move')), ('delete', _('Delete'))])
+    project = forms.ModelChoiceField(queryset=models.Project.objects.none(),
+        required=False, label=_('Move to'))
+
+    def __init__(self, project, *args, **kwargs):
+        super(BulkActionForm, self).__init__(*args, **kwargs)
+        self.project = project
+        self.fields['actions'].queryset = project.action_list.all()
+        self.fields['project'].queryset = models.Project.objects.filter(
+            user=project.user_id)
+
+        self.helper = FormHelper()
+        self.helper.form_id = 'bulk-actions'
+        self.helper.form_class = 'mui-form--inline'
+        self.helper.form_action = reverse('projects:bulk_actions',
+            kwargs={'pk': project.pk})
+        self.helper.form_method = 'POST'
+        # The actions are selected with the checkboxes in the list itself
+        self.helper.layout = Layout(Div(
+            Div('operation', css_class='mui-col-xs-4 hide-label'),
+            Div('project', css_class='mui-col-xs-4 hide-label'),
+            Div(ButtonHolder(Submit('apply', _('Apply'))),
+                css_class='mui-col-xs-4'),
+            css_class='mui-row'),
+        )
+
+    def clean(self):
+        cleaned_data = super(BulkActionForm, self).clean()
+        if cleaned_data.get('operation') != 'move' \
+                or 'actions' not in cleaned_data:
+            return cleaned_data
+
+        if cleaned_data.get('project') is None \
+                and 'project' not in self.errors:
+            self.add_error('project', NO_TARGET_PROJECT_ERROR)
+        return cleaned_data
+
+    def save(self):
+        """Apply the operation to all selected actions in one statement."""
+        actions = self.cleaned_data['actions']
+        operation = self.cleaned_data['operation']
+        pks = [a.pk for a in actions]
+        removed = [a.counter_state() for a in actions]
+        try:
+            with transaction.atomic():
+                if operation == 'delete':
+                    actions.delete()
+                    added = []
+                elif operation == 'complete':
+                    actions.update(complete=Case(
+                        When(complete=False, then=Value(True)),
+                        default=Value(False), output_field=BooleanField()))
+                    added = [(project, not complete, deadline)
+                        for project, complete, deadline in removed]
+                else:
+                    target = self.cleaned_data['project']
+                    actions.update(project=target)
+                    added = [(target.pk, complete, deadline)
+                        for project, complete, deadline in removed]
+                models.update_action_counters(removed, added)
+        except IntegrityError:
+            # The target project already has one of the actions
+            self.add_error(None, DUPLICATE_MOVE_ERROR)
+            return
+        # Updates and bulk deletes do not send any signals
+        models.record_changes(models.ActionlistItem, self.project.user_id,
+            pks, deleted=operation == 'delete')
+
+
 class ConvertInlistToActionForm(forms.Form):
     text = forms.CharField(error_messages={'required': EMPTY_TEXT_ERROR})
 
@@ -102,34 +264,63 @@ class ConvertInlistToActionForm(forms.Form):
         )
 
     def save(self, item, user):
-        if item.user != user:
+        if item.user_id != user.pk:
             self.cleaned_data = []
             self.add_error(None, ILLEGAL_ACTION_ERROR)
-        elif models.ActionlistItem.objects.filter(
-                text=self.cleaned_data['text'],
-                user=user).count():
+            return
+        try:
+            models.convert_to_actions(user.pk, [item],
+                [self.cleaned_data['text']])
+        except IntegrityError:
             self.add_error('text', DUPLICATE_ACTION_ERROR)
-        else:
-            item.delete()
-            action = models.ActionlistItem(user=user,
-                text=self.cleaned_data['text'])
-            action.save()
 
 
-class CreateProjectForm(forms.ModelForm):
+class BulkConvertInlistForm(forms.Form):
+    """Turn several inlist items into actions at once."""
+    items = forms.ModelMultipleChoiceField(
+        queryset=models.InlistItem.objects.none(),
+        widget=forms.MultipleHiddenInput(),
+        error_messages={'required': NO_ITEMS_SELECTED_ERROR})
+
+    def __init__(self, user, *args, **kwargs):
+        super(BulkConvertInlistForm, self).__init__(*args, **kwargs)
+        self.user = user
+        self.fields['items'].queryset = models.InlistItem.objects.filter(
+            user=user)
+
+        self.helper = FormHelper()
+        self.helper.form_id = 'bulk-convert'
+        self.helper.form_action = reverse('projects:bulk_convert_inlist')
+        self.helper.form_method = 'POST'
+        # The items are selected with the checkboxes in the list itself
+        self.helper.layout = Layout(ButtonHolder(
+            Submit('convert', _('Convert selected to actions'))))
+
+    def clean_items(self):
+        items = self.cleaned_data['items']
+        if len(items) > MAX_BULK_ITEMS:
+            raise ValidationError(TOO_MANY_ITEMS_ERROR,
+                params={'max': MAX_BULK_ITEMS})
+        return items
+
+    def save(self):
+        try:
+            models.convert_to_actions(self.user.pk, self.cleaned_data['items'])
+        except IntegrityError:
+            # One of the items is already planned
+            self.add_error(None, DUPLICATE_ACTION_ERROR)
+
+
+class CreateProjectForm(UniqueConstraintMixin, forms.ModelForm):
+    duplicate_field = 'name'
+    duplicate_error = DUPLICATE_PROJECT_ERROR
+
     def __init__(self, *args, **kwargs):
         super(CreateProjectForm, self).__init__(*args, **kwargs)
         self.helper = FormHelper()
         self.helper.form_method = 'POST'
         self.helper.add_input(Submit('create', _('Create project')))
 
-    def validate_unique(self):
-        try:
-            self.instance.validate_unique()
-        except ValidationError as e:
-            e.error_dict = {'name': [DUPLICATE_PROJECT_ERROR]}
-            self._update_errors(e)
-
     class Meta:
         model = models.Project
         fields = ('name', 'description')
@@ -138,20 +329,16 @@ class CreateProjectForm(forms.ModelForm):
         }
 
 
-class EditProjectForm(forms.ModelForm):
+class EditProjectForm(UniqueConstraintMixin, forms.ModelForm):
+    duplicate_field = 'name'
+    duplicate_error = DUPLICATE_PROJECT_ERROR
+
     def __init__(self, *args, **kwargs):
         super(EditProjectForm, self).__init__(*args, **kwargs)
         self.helper = FormHelper()
         self.helper.form_method = 'POST'
         self.helper.add_input(Submit('update', _('Update project')))
 
-    def validate_unique(self):
-        try:
-            self.instance.validate_unique()
-        except ValidationError as e:
-            e.error_dict = {'name': [DUPLICATE_PROJECT_ERROR]}
-            self._update_errors(e)
-
     class Meta:
         model = models.Project
         fields = ('name', 'description')
@@ -160,7 +347,32 @@ class EditProjectForm(forms.ModelForm):
         }
 
 
-class EditActionForm(forms.ModelForm):
+class ProjectAutocompleteWidget(forms.Widget):
+    """Pick a project by typing the start of its name.
+
+    Only the chosen project is looked up when rendering, the candidates
+    are fetched while typing from the autocomplete view. The pk of the
+    chosen project goes in a hidden input.
+    """
+    def render(self, name, value, attrs=None):
+        attrs = self.build_attrs(attrs)
+        field_id = attrs.get('id', name)
+        project_name = ''
+        if value not in self.choices.field.empty_values:
+            project_name = self.choices.queryset.filter(pk=value) \
+                .values_list('name', flat=True).first() or ''
+        return format_html('<input type="hidden" name="{}" value="{}" '
+                'id="{}_pk"><input type="text" class="project-autocomplete" '
+                'id="{}" value="{}" data-target="#{}_pk" data-url="{}" '
+                'list="{}_options" autocomplete="off">'
+                '<datalist id="{}_options"></datalist>',
+            name, '' if value is None else value, field_id, field_id,
+            project_name, field_id,
+            reverse('projects:project_autocomplete'), field_id, field_id)
+
+
+class EditActionForm(UniqueConstraintMixin, forms.ModelForm):
+    duplicate_error = DUPLICATE_MOVE_ERROR
     deadline = forms.SplitDateTimeField(required=False)
 
     def __init__(self, *args, **kwargs):
@@ -170,19 +382,13 @@ class EditActionForm(forms.ModelForm):
         self.helper.add_input(Submit('move', _('Move action')))
 
         self.fields['project'].queryset = models.Project.objects.filter(
-            user=self.instance.user)
+            user=self.instance.user_id)
         self.fields['project'].empty_label = None
 
-    def validate_unique(self):
-        try:
-            self.instance.validate_unique()
-        except ValidationError as e:
-            self.errors[NON_FIELD_ERRORS].clear()
-            self.add_error(NON_FIELD_ERRORS, DUPLICATE_MOVE_ERROR)
-
     class Meta:
         model = models.ActionlistItem
         fields = ('text', 'project', 'deadline')
+        widgets = {'project': ProjectAutocompleteWidget()}
 
 
 class ActionlistSortForm(forms.Form):
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+import time
+
+from projects.models import ActionlistItem, Project
+from projects.pagination import paginate_actions
+
+User = get_user_model()
+
+SORTS = (('', ''), ('text', ''), ('text', '-'), ('complete', ''),
+    ('complete', '-'), ('deadline', ''), ('deadline', '-'))
+
+class Command(BaseCommand):
+    help = 'Time how long it takes to get pages of a large action list. ' \
+        'All of the data that is created is removed afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--actions', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            project = self.create_project(options['actions'])
+            self.stdout.write('{:<12}{:>12}{:>12}'.format('sort', 'first ms',
+                'middle ms'))
+            for method, order in SORTS:
+                actions = project.action_list.all()
+                first = self.time_page(actions, method, order, None,
+                    options['repeat'])
+                # Walk halfway into the list to get a cursor in the middle
+                cursor = self.middle_cursor(actions, method, order,
+                    options['actions'])
+                middle = self.time_page(actions, method, order, cursor,
+                    options['repeat'])
+                self.stdout.write('{:<12}{:>12.2f}{:>12.2f}'.format(
+                    order + (method or 'pk'), first, middle))
+            transaction.set_rollback(True)
+
+    def create_project(self, count):
+        user = User.objects.create_user('benchmark', 'benchmark@test.org')
+        project = Project.objects.create(user=user, name='Benchmark')
+        now = timezone.now()
+        ActionlistItem.objects.bulk_create(
+            ActionlistItem(user=user, project=project,
+                text='Action {}'.format((i * 7919) % count),
+                complete=i % 3 == 0,
+                deadline=now + timedelta(hours=i) if i % 2 else None)
+            for i in range(count))
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE projects_actionlistitem')
+        return project
+
+    def middle_cursor(self, actions, method, order, count):
+        cursor = None
+        for i in range(count // 2 // 200):
+            items, cursor = paginate_actions(actions, method, order, cursor,
+                200)
+        return cursor
+
+    def time_page(self, actions, method, order, cursor, repeat):
+        start = time.perf_counter()
+        for i in range(repeat):
+            paginate_actions(actions, method, order, cursor)
+        return (time.perf_counter() - start) * 1000 / repeat
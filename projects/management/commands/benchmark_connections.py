@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from projects.management import load_test
+
+class Command(BaseCommand):
+    help = 'Measure the latency of requests under gunicorn for several ' \
+        'values of CONN_MAX_AGE. Only the production settings read it from ' \
+        'PROJMAN_DB_CONN_MAX_AGE, so run this with those.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ages', nargs='*', type=int, default=[0, 60],
+            help='Values of CONN_MAX_AGE in seconds, 0 connects for every '
+                'request')
+        parser.add_argument('--url', default='/health/')
+        load_test.add_arguments(parser)
+
+    def handle(self, *args, **options):
+        load_test.check_gunicorn()
+        self.stdout.write('{:<12}{:>12}{:>12}{:>12}{:>12}'.format('max age',
+            'req/s', 'mean ms', 'p95 ms', 'errors'))
+        for age in options['ages']:
+            with load_test.run_gunicorn(options['port'], options['workers'],
+                    PROJMAN_DB_CONN_MAX_AGE=str(age)):
+                rate, latencies = load_test.load(options['port'],
+                    options['url'], options)
+            done = sorted(l * 1000 for l in latencies if l is not None) \
+                or [float('nan')]
+            self.stdout.write('{:<12}{:>12.1f}{:>12.2f}{:>12.2f}{:>12}'
+                .format(age, rate, sum(done) / len(done),
+                    done[min(len(done) - 1, int(len(done) * 0.95))],
+                    latencies.count(None)))
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from projects.management import load_test
+from projman.settings.util import SESSION_ENGINES
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Measure how many requests per second gunicorn serves for a ' \
+        'logged in user with each of the session engines. The user that ' \
+        'is created is removed afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('engines', nargs='*',
+            help='Any of {}, defaults to all of them'.format(
+                ', '.join(SESSION_ENGINES)))
+        parser.add_argument('--url', default='/en/projects/')
+        load_test.add_arguments(parser)
+
+    def handle(self, *args, **options):
+        engines = options['engines'] or SESSION_ENGINES
+        unknown = set(engines) - set(SESSION_ENGINES)
+        if unknown:
+            raise CommandError('Unknown session engines: {}'.format(
+                ', '.join(sorted(unknown))))
+        load_test.check_gunicorn()
+        # The user has to be committed for gunicorn to see it
+        user = User.objects.create_user('benchmark', 'benchmark@test.org')
+        try:
+            self.stdout.write('{:<16}{:>12}{:>12}'.format('engine', 'req/s',
+                'errors'))
+            for engine in engines:
+                rate, errors = self.benchmark(engine, user, options)
+                self.stdout.write('{:<16}{:>12.1f}{:>12}'.format(engine, rate,
+                    errors))
+        finally:
+            user.delete()
+
+    def benchmark(self, engine, user, options):
+        engine_path = 'django.contrib.sessions.backends.' + engine
+        with override_settings(SESSION_ENGINE=engine_path):
+            client = Client()
+            client.force_login(user)
+            session = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+        with load_test.run_gunicorn(options['port'], options['workers'],
+                PROJMAN_SESSION_ENGINE=engine):
+            rate, latencies = load_test.load(options['port'], options['url'],
+                options, {'Cookie': '{}={}'.format(
+                    settings.SESSION_COOKIE_NAME, session)})
+        return rate, latencies.count(None)
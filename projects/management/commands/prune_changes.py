@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from projects.models import (CHANGE_RETENTION, PURGE_BATCH_SIZE,
+    prune_changes)
+
+class Command(BaseCommand):
+    help = 'Remove the changes that clients sync from once they are old. ' \
+        'Clients that last synced before them have to fetch everything ' \
+        'again. Run this every day.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+            default=CHANGE_RETENTION.days,
+            help='Keep the changes of this many days')
+        parser.add_argument('--batch-size', type=int,
+            default=PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        pruned = 0
+        while True:
+            deleted = prune_changes(before, options['batch_size'])
+            if not deleted:
+                break
+            pruned += deleted
+        self.stdout.write('Pruned {} changes'.format(pruned))
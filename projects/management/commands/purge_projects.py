@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from projects.models import PURGE_BATCH_SIZE, Project, purge_project
+
+class Command(BaseCommand):
+    help = 'Remove the projects that were deleted, a batch of actions at ' \
+        'a time. The worker does this on its own, this command is for ' \
+        'when it has fallen behind.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+            default=PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        purged = 0
+        for project in Project.all_objects.filter(deleting=True).iterator():
+            actions = 0
+            while True:
+                deleted = purge_project(project, options['batch_size'])
+                if not deleted:
+                    break
+                actions += deleted
+            purged += 1
+            self.stdout.write('{} ({}): {} actions'.format(
+                project.deleted_name, project.pk, actions))
+        self.stdout.write('Purged {} projects'.format(purged))
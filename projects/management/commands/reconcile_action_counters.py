@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.models import ACTION_COUNTERS, Project, count_actions
+
+def _stored(project):
+    return tuple(getattr(project, name) for name in ACTION_COUNTERS)
+
+def _counted(project):
+    return tuple(getattr(project, 'counted_' + name)
+        for name in ACTION_COUNTERS)
+
+class Command(BaseCommand):
+    help = 'Count the actions of every project again and fix the stored ' \
+        'counters that do not match.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', default=False,
+            help='Only show the projects with wrong counters')
+
+    def handle(self, *args, **options):
+        fixed = 0
+        for project in count_actions(Project.objects.all()).iterator():
+            if _stored(project) == _counted(project):
+                continue
+            if not options['dry_run']:
+                project = self.fix(project.pk)
+                if project is None:
+                    continue
+
+            fixed += 1
+            self.stdout.write('{} ({}): {} -> {}'.format(project.name,
+                project.pk, ' '.join(map(str, _stored(project))),
+                ' '.join(map(str, _counted(project)))))
+        self.stdout.write('{} {} projects'.format(
+            'Found' if options['dry_run'] else 'Fixed', fixed))
+
+    def fix(self, pk):
+        """Count the actions of a project again while it is locked and
+        store the counts, return the project when they were wrong."""
+        with transaction.atomic():
+            # Actions update the counters of their project, so they wait
+            # until the counts have been written
+            if not Project.objects.select_for_update().filter(
+                    pk=pk).exists():
+                return None
+            project = count_actions(Project.objects.filter(pk=pk)).get()
+            if _stored(project) == _counted(project):
+                return None
+            Project.objects.filter(pk=pk).update(**dict(zip(ACTION_COUNTERS,
+                _counted(project))))
+        return project
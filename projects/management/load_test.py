@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Helpers for the commands that measure the site while gunicorn runs it."""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from django.core.management.base import CommandError
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+def add_arguments(parser):
+    parser.add_argument('--host', default='localhost',
+        help='Value of the Host header, must be in ALLOWED_HOSTS')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=1000)
+
+def check_gunicorn():
+    if importlib.util.find_spec('gunicorn') is None:
+        raise CommandError('gunicorn is required, it is listed in '
+            'requirements/production.txt')
+
+@contextmanager
+def run_gunicorn(port, workers, **environ):
+    """Run the site with gunicorn, with environ added to its environment."""
+    check_gunicorn()
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn',
+        'projman.wsgi:application', '--bind', '127.0.0.1:{}'.format(port),
+        '--workers', str(workers)], env=dict(os.environ, **environ))
+    try:
+        _wait_for_port(port)
+        yield
+    finally:
+        server.terminate()
+        server.wait()
+
+def _wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError('gunicorn did not start listening on port '
+        '{}'.format(port))
+
+def load(port, path, options, headers={}):
+    """Request path as often as the options say.
+
+    Returns the requests per second and the latency in seconds of every
+    request, which is None for requests that failed.
+    """
+    request = urllib.request.Request('http://127.0.0.1:{}{}'.format(port,
+        path), headers=dict(headers, Host=options['host']))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(options['concurrency']) as executor:
+        latencies = list(executor.map(_fetch,
+            [request] * options['requests']))
+    return options['requests'] / (time.perf_counter() - start), latencies
+
+def _fetch(request):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            # Redirects, like to the login page, count as errors
+            if response.status != 200 or \
+                    response.geturl() != request.full_url:
+                return None
+    except OSError:
+        return None
+    return time.perf_counter() - start
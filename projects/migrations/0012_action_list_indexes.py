@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-18 01:34
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+TEXT_INDEX = 'projects_actionlistitem_project_id_lower_text_id'
+
+def create_text_index(apps, schema_editor):
+    # Django can't create expression indexes
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute('CREATE INDEX {} ON projects_actionlistitem '
+            '(project_id, LOWER(text), id)'.format(TEXT_INDEX))
+
+def drop_text_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute('DROP INDEX IF EXISTS {}'.format(TEXT_INDEX))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0011_auto_20160502_2212'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='actionlistitem',
+            index_together=set([('project', 'complete', 'id'), ('project', 'id'), ('project', 'deadline', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='inlistitem',
+            index_together=set([('user', 'id')]),
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-18 01:44
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+def create_counters(apps, schema_editor):
+    # New users get a counter when they sign up, existing users need one too
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    ChangeCounter = apps.get_model('projects', 'ChangeCounter')
+    ChangeCounter.objects.bulk_create(ChangeCounter(user_id=pk)
+        for pk in User.objects.values_list('pk', flat=True))
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0012_action_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='change_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
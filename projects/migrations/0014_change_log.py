@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-18 01:47
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+def log_existing_objects(apps, schema_editor):
+    # Let the first sync of a client pick up everything that already exists
+    Change = apps.get_model('projects', 'Change')
+    for name in ('project', 'actionlistitem', 'inlistitem'):
+        model = apps.get_model('projects', name)
+        Change.objects.bulk_create(Change(user_id=user_id, kind=name,
+                object_id=pk)
+            for pk, user_id in model.objects.values_list('pk', 'user_id'))
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0013_change_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16)),
+                ('object_id', models.PositiveIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('pk',),
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='change',
+            index_together=set([('user', 'id')]),
+        ),
+        migrations.RunPython(log_existing_objects, migrations.RunPython.noop),
+    ]
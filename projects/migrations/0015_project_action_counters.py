@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-18 01:48
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import Case, IntegerField, Sum, When
+
+def count_actions(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    def count(**conditions):
+        conditions = {'action_list__' + k: v for k, v in conditions.items()}
+        return Sum(Case(When(then=1, **conditions), default=0,
+            output_field=IntegerField()))
+    projects = Project.objects.annotate(open=count(complete=False),
+        complete=count(complete=True),
+        deadline=count(complete=False, deadline__isnull=False))
+    for p in projects.iterator():
+        Project.objects.filter(pk=p.pk).update(open_actions=p.open,
+            complete_actions=p.complete, deadline_actions=p.deadline)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0014_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='complete_actions',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='deadline_actions',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='open_actions',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_actions, migrations.RunPython.noop),
+    ]
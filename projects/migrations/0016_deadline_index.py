@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-18 01:50
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+TEXT_INDEX = 'projects_actionlistitem_project_id_lower_text_id'
+
+def recreate_text_index(apps, schema_editor):
+    # SQLite copies the table to change its indexes, which loses the
+    # expression index from 0012
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('CREATE INDEX IF NOT EXISTS {} ON '
+            'projects_actionlistitem (project_id, LOWER(text), id)'.format(
+                TEXT_INDEX))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0015_project_action_counters'),
+    ]
+
+    operations = [
+        # Changing the indexes back also copies the table
+        migrations.RunPython(migrations.RunPython.noop, recreate_text_index),
+        migrations.AlterIndexTogether(
+            name='actionlistitem',
+            index_together=set([('project', 'complete', 'id'), ('project', 'id'), ('project', 'deadline', 'id'), ('user', 'complete', 'deadline')]),
+        ),
+        migrations.RunPython(recreate_text_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+# The expressions have to match the ones in projects.search, SQLite gets
+# its search tables after every migrate instead
+INDEXES = (
+    ('projects_project_search', 'projects_project',
+        "to_tsvector('simple', name || ' ' || description)"),
+    ('projects_actionlistitem_search', 'projects_actionlistitem',
+        "to_tsvector('simple', text)"),
+    ('projects_inlistitem_search', 'projects_inlistitem',
+        "to_tsvector('simple', text)"),
+)
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for name, table, expression in INDEXES:
+            schema_editor.execute('CREATE INDEX {} ON {} USING GIN '
+                '(({}))'.format(name, table, expression))
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for name, table, expression in INDEXES:
+            schema_editor.execute('DROP INDEX IF EXISTS {}'.format(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0016_deadline_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
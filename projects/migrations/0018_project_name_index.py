@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-18 01:55
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+PREFIX_INDEX = 'projects_project_user_id_upper_name_prefix'
+
+def create_prefix_index(apps, schema_editor):
+    # name__istartswith becomes UPPER(name::text) LIKE UPPER(...) on
+    # PostgreSQL, which can only use an index with the pattern operators
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE INDEX {} ON projects_project '
+            '(user_id, UPPER(name::text) text_pattern_ops)'.format(
+                PREFIX_INDEX))
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS {}'.format(PREFIX_INDEX))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0017_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='project',
+            index_together=set([('user', 'name')]),
+        ),
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-18 02:02
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0018_project_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActionlistSort',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='action_sort', serialize=False, to='projects.Project')),
+                ('method', models.CharField(blank=True, default='', max_length=16)),
+                ('order', models.CharField(blank=True, default='', max_length=1)),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+UNIQUE_NAME_INDEX = 'projects_project_user_id_name_uniq'
+
+def create_unique_name_index(apps, schema_editor):
+    # Projects that are being deleted give up their name right away
+    schema_editor.execute('CREATE UNIQUE INDEX {} ON projects_project '
+        '(user_id, name) WHERE NOT deleting'.format(UNIQUE_NAME_INDEX))
+
+def drop_unique_name_index(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS {}'.format(UNIQUE_NAME_INDEX))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0020_project_deleting'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='project',
+            unique_together=set([]),
+        ),
+        migrations.RunPython(create_unique_name_index,
+            drop_unique_name_index),
+    ]
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0021_project_unique_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='change',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='changecounter',
+            name='pruned',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
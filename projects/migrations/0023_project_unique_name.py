@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+UNIQUE_NAME_INDEX = 'projects_project_user_id_name_uniq'
+# Has to match projects.models.DELETING_NAME_FORMAT
+DELETING_NAME_FORMAT = '\t{pk}\t{name}'
+
+def free_deleting_names(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    for project in Project.objects.filter(deleting=True) \
+            .exclude(name__startswith='\t'):
+        project.name = DELETING_NAME_FORMAT.format(pk=project.pk,
+            name=project.name)[:64]
+        project.save(update_fields=['name'])
+
+def drop_unique_name_index(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS {}'.format(UNIQUE_NAME_INDEX))
+
+def create_unique_name_index(apps, schema_editor):
+    schema_editor.execute('CREATE UNIQUE INDEX {} ON projects_project '
+        '(user_id, name) WHERE NOT deleting'.format(UNIQUE_NAME_INDEX))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0022_change_log_retention'),
+    ]
+
+    operations = [
+        migrations.RunPython(free_deleting_names, migrations.RunPython.noop),
+        migrations.RunPython(drop_unique_name_index,
+            create_unique_name_index),
+        migrations.AlterUniqueTogether(
+            name='project',
+            unique_together=set([('name', 'user')]),
+        ),
+    ]
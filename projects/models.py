@@ -1,22 +1,42 @@
 # -*- coding: utf-8
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from collections import Counter
+from datetime import timedelta
+from django.db import models, transaction
+from django.db.models import Case, F, IntegerField, Sum, When
 from django.utils.translation import ugettext_lazy as _
 
+from settings.models import Settings
+
 DUPLICATE_ACTION_ERROR = _("You already planned to do this")
 INVALID_USER_ERROR = _('Actions and projects must belong to the same user.')
 ACTION_PROJECT_NAME = 'Actions' # Don't translate this (yet)
+ACTION_COUNTERS = ('open_actions', 'complete_actions', 'deadline_actions')
+PURGE_BATCH_SIZE = 1000
+# Projects that are being deleted give up their name. The pk keeps the new
+# name unique and forms strip the leading tab, so users can't take it
+DELETING_NAME_FORMAT = '\t{pk}\t{name}'
+# How long changes are kept for clients that sync now and then
+CHANGE_RETENTION = timedelta(days=30)
 
 class InlistItem(models.Model):
     text = models.CharField(max_length=255, default='')
     user = models.ForeignKey(settings.AUTH_USER_MODEL)
 
+    def delete(self, *args, **kwargs):
+        # There is no post_delete receiver for inlist items, see
+        # projects.signals
+        pk = self.pk
+        super(InlistItem, self).delete(*args, **kwargs)
+        record_changes(InlistItem, self.user_id, [pk], deleted=True)
+
     def __str__(self):
         return self.text
 
     class Meta:
         unique_together = ('text', 'user')
+        index_together = (('user', 'id'),)
         ordering = ('pk',)
 
 
@@ -29,49 +49,333 @@ class ActionlistItem(models.Model):
     deadline = models.DateTimeField(default=None, null=True, blank=True)
 
     def clean(self):
-        # Make the default project the user's Actions project
-        if self.project == None:
-            self.project = Project.objects.get(user=self.user,
-                name=ACTION_PROJECT_NAME)
-
+        # Make the default project the user's Actions project, which always
+        # belongs to the user
+        if self.project_id is None:
+            self._set_default_project()
         # Do not allow the user field to be different than the project's
         # user field
-        if self.user != self.project.user:
+        elif self.user_id != self.project.user_id:
             raise ValidationError(INVALID_USER_ERROR)
 
-        # Validate that two items on the list are not the same
-        queryset = ActionlistItem.objects.exclude(pk=self.pk).filter(
-            text=self.text, user=self.user, project=self.project)
-        if queryset.exists():
-            raise ValidationError(DUPLICATE_ACTION_ERROR)
+        # Duplicates are left to validate_unique() and the unique constraint
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(ActionlistItem, cls).from_db(db, field_names, values)
+        if len(values) == len(cls._meta.concrete_fields):
+            instance._counted = instance.counter_state()
+        return instance
+
+    def counter_state(self):
+        """Return what decides how the action is counted by its project."""
+        return (self.project_id, self.complete, self.deadline is not None)
+
+    def _stored_counter_state(self):
+        if hasattr(self, '_counted'):
+            return self._counted
+        elif self._state.adding:
+            return None
+        stored = ActionlistItem.objects.filter(pk=self.pk).values_list(
+            'project_id', 'complete', 'deadline').first()
+        if stored is not None:
+            return stored[0], stored[1], stored[2] is not None
+
+    def _set_default_project(self):
+        self.project_id = get_action_project_id(self.user_id)
+        # Reading the project before it was set caches it as None
+        self.__dict__.pop(ActionlistItem.project.cache_name, None)
 
     def save(self, *args, **kwargs):
         # Just changing the default in clean is not enough, we need to
         # change it here as well
-        if self.project == None:
-            self.project = Project.objects.get(user=self.user,
-                name=ACTION_PROJECT_NAME)
-        super(ActionlistItem, self).save(*args, **kwargs)
+        if self.project_id is None:
+            self._set_default_project()
+        with transaction.atomic():
+            old = self._stored_counter_state()
+            super(ActionlistItem, self).save(*args, **kwargs)
+            new = self.counter_state()
+            if old != new:
+                update_action_counters([old] if old else [], [new])
+        self._counted = new
+
+    def delete(self, *args, **kwargs):
+        # There is no post_delete receiver for actions, see projects.signals
+        pk = self.pk
+        with transaction.atomic():
+            old = self._stored_counter_state() or self.counter_state()
+            super(ActionlistItem, self).delete(*args, **kwargs)
+            update_action_counters([old], [])
+        record_changes(ActionlistItem, self.user_id, [pk], deleted=True)
 
     def __str__(self):
         return self.text
 
     class Meta:
         unique_together = (('text', 'user', 'project'),)
+        # Match the orderings of the action list, sorting on text uses an
+        # expression index which is created in the migrations
+        index_together = (('project', 'id'), ('project', 'complete', 'id'),
+            ('project', 'deadline', 'id'),
+            # For finding the nearest deadlines of a user
+            ('user', 'complete', 'deadline'))
+
+
+class ProjectManager(models.Manager):
+    """Leaves out the projects that are waiting to be purged."""
+    def get_queryset(self):
+        return super(ProjectManager, self).get_queryset().filter(
+            deleting=False)
 
 
 class Project(models.Model):
     name = models.CharField(max_length=64, default='')
     user = models.ForeignKey(settings.AUTH_USER_MODEL)
     description = models.CharField(max_length=1024, default='', blank=True)
+    # Kept up to date by the actions, see update_action_counters()
+    open_actions = models.IntegerField(default=0, editable=False)
+    complete_actions = models.IntegerField(default=0, editable=False)
+    deadline_actions = models.IntegerField(default=0, editable=False)
+    # Deleted projects are hidden until purge_project() has removed them
+    deleting = models.BooleanField(default=False, editable=False)
+
+    objects = ProjectManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Never write back counters that may have changed since the project
+        # was read, they are only updated with F() expressions
+        if not self._state.adding and 'update_fields' not in kwargs:
+            kwargs['update_fields'] = [f.name
+                for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in ACTION_COUNTERS]
+        super(Project, self).save(*args, **kwargs)
+
+    @property
+    def deleted_name(self):
+        """The name that the project had before it was marked deleted."""
+        return self.name.split('\t', 2)[-1]
+
     class Meta:
         ordering = ['pk']
         unique_together = ('name', 'user')
+        # For looking up projects by the start of their name, PostgreSQL
+        # needs an expression index which is created in the migrations
+        index_together = (('user', 'name'),)
+
+
+class ActionlistSort(models.Model):
+    """How the action list of a project is sorted.
+
+    Projects that use the default sorting don't have a row.
+    """
+    project = models.OneToOneField(Project, primary_key=True,
+        related_name='action_sort')
+    method = models.CharField(max_length=16, blank=True, default='')
+    order = models.CharField(max_length=1, blank=True, default='')
+
+    def __str__(self):
+        return '{}{}'.format(self.order, self.method)
+
+
+class ChangeCounter(models.Model):
+    """Counts the changes to everything that a user has stored.
+
+    Clients of the API use the count to find out whether their copy of the
+    data is still up to date.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True,
+        related_name='change_counter')
+    value = models.PositiveIntegerField(default=0)
+    # The highest pk of the user's changes that were pruned, clients that
+    # synced before it have to fetch everything again
+    pruned = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return '{}: {}'.format(self.user, self.value)
+
+
+class Change(models.Model):
+    """An entry in the log of changes that clients use to sync.
 
+    The kind is the model_name of the object that changed.
+    """
+    # Objects that are deleted together with their user still log their
+    # deletion, so the database can't check that the user exists
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, db_constraint=False)
+    kind = models.CharField(max_length=16)
+    object_id = models.PositiveIntegerField()
+    deleted = models.BooleanField(default=False)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return '{} {}'.format(self.kind, self.object_id)
+
+    class Meta:
+        index_together = (('user', 'id'),)
+        ordering = ('pk',)
+
+
+def get_action_project_id(user_id):
+    """Return the pk of the user's Actions project.
+
+    It is kept in the user's settings, so this is a lookup by primary key.
+    """
+    return Settings.objects.filter(user=user_id).values_list(
+        'action_project', flat=True).get()
 
 def get_user_action_project(user):
-    return Project.objects.get(user=user, name=ACTION_PROJECT_NAME)
+    return Project.objects.get(pk__in=Settings.objects.filter(user=user)
+        .values('action_project'))
+
+def get_action_sort(project):
+    """Return the sort method and order of the action list of a project.
+
+    Select the action_sort of the project along with it to avoid a query.
+    """
+    try:
+        sort = project.action_sort
+    except ActionlistSort.DoesNotExist:
+        return '', ''
+    return sort.method, sort.order
+
+def set_action_sort(project, method, order):
+    if method or order:
+        project.action_sort, created = ActionlistSort.objects.update_or_create(
+            project=project, defaults={'method': method, 'order': order})
+    else:
+        ActionlistSort.objects.filter(project=project).delete()
+
+def bump_change_counter(user_id):
+    ChangeCounter.objects.filter(user=user_id).update(value=F('value') + 1)
+
+def update_action_counters(removed, added):
+    """Update the action counters of the projects that the actions are in.
+
+    Both lists contain the counter_state() of actions, removed ones are no
+    longer counted and added ones are counted from now on. Projects get a
+    single atomic UPDATE each.
+    """
+    deltas = {}
+    for states, sign in ((removed, -1), (added, 1)):
+        for project_id, complete, has_deadline in states:
+            delta = deltas.setdefault(project_id, Counter())
+            if complete:
+                delta['complete_actions'] += sign
+            else:
+                delta['open_actions'] += sign
+                delta['deadline_actions'] += sign * has_deadline
+    for project_id, delta in deltas.items():
+        changes = {name: F(name) + n for name, n in delta.items() if n}
+        if changes:
+            Project.all_objects.filter(pk=project_id).update(**changes)
+
+def count_actions(projects):
+    """Annotate the projects with counts of their actions from scratch.
+
+    The counts are stored as counted_<counter> for each of the counters.
+    """
+    def count(**conditions):
+        conditions = {'action_list__' + k: v for k, v in conditions.items()}
+        return Sum(Case(When(then=1, **conditions), default=0,
+            output_field=IntegerField()))
+    return projects.annotate(counted_open_actions=count(complete=False),
+        counted_complete_actions=count(complete=True),
+        counted_deadline_actions=count(complete=False,
+            deadline__isnull=False))
+
+def convert_to_actions(user_id, items, texts=None):
+    """Replace inlist items by actions in the user's Actions project.
+
+    texts are the texts of the new actions, by default the texts of the
+    items are used. The number of queries does not depend on the number of
+    items. Raises IntegrityError when one of the actions already exists, in
+    which case nothing changes.
+    """
+    items = list(items)
+    if texts is None:
+        texts = [item.text for item in items]
+    with transaction.atomic():
+        project_id = get_action_project_id(user_id)
+        ActionlistItem.objects.bulk_create(ActionlistItem(user_id=user_id,
+            project_id=project_id, text=text) for text in texts)
+        update_action_counters([], [(project_id, False, False)] * len(texts))
+        InlistItem.objects.filter(pk__in=[item.pk for item in items]) \
+            .delete()
+        # The primary keys of the new actions are unknown after bulk_create
+        record_changes(ActionlistItem, user_id, ActionlistItem.objects.filter(
+            project=project_id, text__in=texts).values_list('pk', flat=True))
+        record_changes(InlistItem, user_id, [item.pk for item in items],
+            deleted=True)
+
+def mark_project_deleted(project):
+    """Hide the project until purge_project() removes it.
+
+    Deleting a project with many actions at once takes too long for a
+    request, so that is left to the projects.tasks.purge_project job.
+    """
+    project.name = DELETING_NAME_FORMAT.format(pk=project.pk,
+        name=project.name)[:Project._meta.get_field('name').max_length]
+    project.deleting = True
+    project.save(update_fields=['name', 'deleting'])
+
+def purge_project(project, batch_size=None):
+    """Delete a batch of the actions of a project that is being deleted.
+
+    The project itself is deleted once it has no actions left. Returns the
+    number of actions that were deleted, the counters of the project show
+    how many are left.
+    """
+    if batch_size is None:
+        batch_size = PURGE_BATCH_SIZE
+    with transaction.atomic():
+        # Purges of the same project wait on each other, so that no batch
+        # is deleted and counted twice
+        if not Project.all_objects.select_for_update().filter(
+                pk=project.pk).exists():
+            return 0
+        actions = list(ActionlistItem.objects.filter(project=project)
+            .order_by('pk').values_list('pk', 'complete', 'deadline')
+            [:batch_size])
+        if not actions:
+            project.delete()
+            return 0
+        # Actions have no delete receivers, so this is a single DELETE
+        ActionlistItem.objects.filter(pk__in=[a[0] for a in actions]) \
+            .delete()
+        update_action_counters([(project.pk, complete, deadline is not None)
+            for pk, complete, deadline in actions], [])
+        record_changes(ActionlistItem, project.user_id,
+            [a[0] for a in actions], deleted=True)
+    return len(actions)
+
+def prune_changes(before, batch_size=None):
+    """Delete a batch of the changes that were made before a moment.
+
+    The change counter of each user remembers the last change that was
+    pruned. Returns the number of changes that were deleted.
+    """
+    if batch_size is None:
+        batch_size = PURGE_BATCH_SIZE
+    with transaction.atomic():
+        changes = list(Change.objects.filter(created__lt=before)
+            .order_by('pk').values_list('pk', 'user_id')[:batch_size])
+        if not changes:
+            return 0
+        pruned = {user_id: pk for pk, user_id in changes}
+        for user_id, pk in pruned.items():
+            ChangeCounter.objects.filter(user=user_id, pruned__lt=pk) \
+                .update(pruned=pk)
+        Change.objects.filter(pk__in=[c[0] for c in changes]).delete()
+    return len(changes)
+
+def record_changes(model, user_id, pks, deleted=False):
+    """Add the changed objects to the change log of their user."""
+    changes = [Change(user_id=user_id, kind=model._meta.model_name,
+        object_id=pk, deleted=deleted) for pk in pks]
+    if changes:
+        Change.objects.bulk_create(changes)
+        bump_change_counter(user_id)
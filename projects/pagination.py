@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""Keyset (cursor) pagination for action lists and other lists.
+
+Instead of using an OFFSET every page continues directly after the last
+row of the previous page. The position in the list is stored in an opaque
+cursor which holds the sort key of that row together with its primary key
+as a tie-breaker. This keeps the cost of a page constant, no matter how
+deep into the list it is.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def _order_keys(sort_method):
+    """Return the names of the values that the list is sorted on."""
+    # Case sensitive fields need to be converted to insensitive
+    if sort_method == 'text':
+        return ['sort_text', 'pk']
+    # Databases disagree on where NULL goes, so always put actions without
+    # a deadline after the ones that have a deadline. The first value
+    # tells whether the deadline is missing
+    elif sort_method == 'deadline':
+        return ['deadline_null', 'deadline', 'pk']
+    # Other fields can just be sorted regularly
+    elif sort_method != '':
+        return [sort_method, 'pk']
+    # When no ordering is applied keep the order in which they were added
+    return ['pk']
+
+def _segments(queryset, sort_method):
+    """Split the list into parts that can each be read from an index.
+
+    Every segment is a tuple of the values that its rows have in common,
+    the queryset of the segment and the keys that it is sorted on.
+    """
+    if sort_method == 'text':
+        return [((), queryset.annotate(sort_text=Lower('text')),
+            ['sort_text', 'pk'])]
+    elif sort_method == 'deadline':
+        return [
+            ((0,), queryset.filter(deadline__isnull=False),
+                ['deadline', 'pk']),
+            ((1, None), queryset.filter(deadline__isnull=True), ['pk']),
+        ]
+    return [((), queryset, _order_keys(sort_method))]
+
+def _after(keys, values, descending):
+    """Return the filters for the rows after values, in list order.
+
+    Each filter selects one contiguous range of the index, this way the
+    database never has to scan the rows before the cursor.
+    """
+    lookup = 'lt' if descending else 'gt'
+    ranges = []
+    for i in reversed(range(len(keys))):
+        bounds = dict(zip(keys[:i], values[:i]))
+        bounds['{}__{}'.format(keys[i], lookup)] = values[i]
+        ranges.append(Q(**bounds))
+    return ranges
+
+def _ranges(segments, values, descending):
+    """Yield the querysets that make up the list after values in order."""
+    prefix = '-' if descending else ''
+    for common, queryset, keys in segments:
+        queryset = queryset.order_by(*[prefix + k for k in keys])
+        if values is None:
+            yield queryset
+        # Skip the segments that come before the cursor
+        elif tuple(values[:len(common)]) == common:
+            for condition in _after(keys, values[len(common):], descending):
+                yield queryset.filter(condition)
+            values = None
+
+def _cursor_values(item, sort_method):
+    if sort_method == 'deadline':
+        return [int(item.deadline is None), item.deadline, item.pk]
+    return [getattr(item, k) for k in _order_keys(sort_method)]
+
+def encode_cursor(sort_method, sort_order, values):
+    values = [v.isoformat() if hasattr(v, 'isoformat') else v
+        for v in values]
+    data = json.dumps([sort_method, sort_order, values])
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+def decode_cursor(cursor, sort_method, sort_order):
+    """Return the sort key values stored in the cursor.
+
+    None is returned when the cursor is missing, malformed or was made
+    for a different ordering, in which case the list starts at the top.
+    """
+    if not cursor:
+        return None
+    try:
+        method, order, values = json.loads(
+            base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (TypeError, ValueError):
+        return None
+    if method != sort_method or order != sort_order:
+        return None
+    keys = _order_keys(sort_method)
+    if not isinstance(values, list) or len(values) != len(keys) \
+            or not isinstance(values[-1], int):
+        return None
+    if sort_method == 'deadline':
+        if values[0] not in (0, 1) or (values[0] == 1) != (values[1] is None):
+            return None
+        if values[1] is not None:
+            values[1] = parse_datetime(values[1])
+            if values[1] is None:
+                return None
+    return values
+
+def paginate_actions(queryset, sort_method='', sort_order='', cursor=None,
+        page_size=None):
+    """Return a page of actions and the cursor that points to the next page.
+
+    The next cursor is None when the last page has been reached.
+    """
+    if page_size is None:
+        page_size = DEFAULT_PAGE_SIZE
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    descending = sort_order == '-'
+    segments = _segments(queryset, sort_method)
+    if descending:
+        segments.reverse()
+    values = decode_cursor(cursor, sort_method, sort_order)
+
+    # Fetch one extra row to find out whether there is a next page
+    items = []
+    for part in _ranges(segments, values, descending):
+        items += list(part[:page_size + 1 - len(items)])
+        if len(items) > page_size:
+            break
+
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    last = _cursor_values(items[-1], sort_method)
+    return items, encode_cursor(sort_method, sort_order, last)
+
+def paginate(queryset, cursor=None, page_size=None):
+    """Return a page of any queryset in the order the rows were added."""
+    return paginate_actions(queryset, cursor=cursor, page_size=page_size)
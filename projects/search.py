@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""Full-text search over the projects, actions and inlist of a user.
+
+PostgreSQL uses GIN indexes on tsvector expressions, these are created in
+the migrations. SQLite uses FTS5 tables which are kept up to date by
+triggers, they are (re)created after every migrate since SQLite drops the
+triggers when Django rebuilds a table. Other databases fall back to a slow
+substring search.
+"""
+from collections import namedtuple
+from django.db import connection, OperationalError
+from django.db.models import Q
+
+from projects import models
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Every page needs all results before it, so don't go too deep
+MAX_PAGES = 10
+
+SearchResult = namedtuple('SearchResult', ('kind', 'object', 'rank'))
+
+# The searched columns of each model, results with the same rank are shown
+# in this order
+SEARCHED = (
+    (models.Project, ('name', 'description')),
+    (models.ActionlistItem, ('text',)),
+    (models.InlistItem, ('text',)),
+)
+
+SQLITE_STATEMENTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, "
+        "content='{table}', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} "
+        "BEGIN INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); "
+        "END",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} "
+        "BEGIN INSERT INTO {fts}({fts}, rowid, {columns}) "
+        "VALUES ('delete', old.id, {old}); END",
+    "CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {columns} "
+        "ON {table} BEGIN INSERT INTO {fts}({fts}, rowid, {columns}) "
+        "VALUES ('delete', old.id, {old}); "
+        "INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); END",
+    "INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+)
+
+def _fts_table(model):
+    return model._meta.db_table + '_fts'
+
+def create_sqlite_tables(db):
+    """Create the FTS5 tables and triggers and fill the tables.
+
+    Does nothing when SQLite is compiled without FTS5, searching then falls
+    back to substring search.
+    """
+    with db.cursor() as cursor:
+        for model, columns in SEARCHED:
+            names = {'fts': _fts_table(model), 'table': model._meta.db_table,
+                'columns': ', '.join(columns),
+                'new': ', '.join('new.' + c for c in columns),
+                'old': ', '.join('old.' + c for c in columns)}
+            try:
+                for statement in SQLITE_STATEMENTS:
+                    cursor.execute(statement.format(**names))
+            except OperationalError:
+                return
+
+def _has_sqlite_tables():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name IN "
+            "({})".format(', '.join(['%s'] * len(SEARCHED))),
+            [_fts_table(model) for model, columns in SEARCHED])
+        return cursor.fetchone()[0] == len(SEARCHED)
+
+def _match_postgresql(queryset, columns, words):
+    table = queryset.model._meta.db_table
+    # This has to be the same expression as the index in the migrations
+    vector = "to_tsvector('simple', {})".format(" || ' ' || ".join(
+        '{}.{}'.format(table, column) for column in columns))
+    # Match words that start with what was typed
+    query = ' & '.join("'{}':*".format(
+        word.replace('\\', '\\\\').replace("'", "''")) for word in words)
+    tsquery = "to_tsquery('simple', %s)"
+    return queryset.extra(
+        select={'rank': 'ts_rank({}, {})'.format(vector, tsquery)},
+        select_params=[query],
+        where=['{} @@ {}'.format(vector, tsquery)], params=[query])
+
+def _match_sqlite(queryset, columns, words):
+    table = queryset.model._meta.db_table
+    fts = _fts_table(queryset.model)
+    query = ' '.join('"{}"*'.format(word.replace('"', '""'))
+        for word in words)
+    # bm25() is lower for better matches
+    return queryset.extra(select={'rank': '-bm25({})'.format(fts)},
+        tables=[fts], where=['{}.rowid = {}.id'.format(fts, table),
+            '{} MATCH %s'.format(fts)], params=[query])
+
+def _match_substring(queryset, columns, words):
+    for word in words:
+        matches = Q()
+        for column in columns:
+            matches |= Q(**{column + '__icontains': word})
+        queryset = queryset.filter(matches)
+    return queryset.extra(select={'rank': '0'})
+
+def _matcher():
+    if connection.vendor == 'postgresql':
+        return _match_postgresql
+    elif connection.vendor == 'sqlite' and _has_sqlite_tables():
+        return _match_sqlite
+    return _match_substring
+
+def search(user, query, page=1, page_size=None):
+    """Return a page of the best matches for query and whether there are
+    more.
+
+    Results are sorted on rank, all words of the query need to match the
+    start of a word in the object.
+    """
+    if page_size is None:
+        page_size = DEFAULT_PAGE_SIZE
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    words = query.split()
+    if not words or not 1 <= page <= MAX_PAGES:
+        return [], False
+
+    match = _matcher()
+    needed = page * page_size + 1
+    results = []
+    for model, columns in SEARCHED:
+        queryset = model.objects.filter(user=user)
+        if model is models.ActionlistItem:
+            queryset = queryset.filter(project__deleting=False) \
+                .select_related('project')
+        queryset = match(queryset, columns, words).order_by('-rank', 'pk')
+        results += [SearchResult(model._meta.model_name, obj, obj.rank)
+            for obj in queryset[:needed]]
+
+    # The sort is stable, so equal ranks keep the order of SEARCHED
+    results.sort(key=lambda result: -result.rank)
+    start = (page - 1) * page_size
+    more = len(results) > start + page_size and page < MAX_PAGES
+    return results[start:start + page_size], more
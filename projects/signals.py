@@ -1,12 +1,54 @@
 # -*- coding:utf-8 -*-
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db import connections
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+    pre_delete)
 from django.dispatch import receiver
 
-from projects import models
+from projects import models, search
+from projects.cache import invalidate_project_list
+from settings.models import Settings
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_action_project_for_new_user(sender, created, instance, **kwargs):
     if created:
         p = models.Project(name=models.ACTION_PROJECT_NAME, user=instance)
         p.save()
+        # The settings app may not have created the settings yet
+        Settings.objects.update_or_create(user=instance,
+            defaults={'action_project': p})
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_change_counter_for_new_user(sender, created, instance, **kwargs):
+    if created:
+        models.ChangeCounter.objects.create(user=instance)
+
+@receiver(post_save, sender=models.Project)
+@receiver(post_delete, sender=models.Project)
+def invalidate_cached_project_list(sender, instance, **kwargs):
+    invalidate_project_list(instance.user_id)
+
+# Deleting actions and inlist items is left out on purpose, a receiver
+# would turn deleting many of them at once into a query per object. Their
+# delete() methods and the bulk operations record the changes themselves
+@receiver(post_save, sender=models.Project)
+@receiver(post_save, sender=models.ActionlistItem)
+@receiver(post_save, sender=models.InlistItem)
+def record_change(sender, instance, **kwargs):
+    models.record_changes(sender, instance.user_id, [instance.pk])
+
+@receiver(post_delete, sender=models.Project)
+def record_deletion(sender, instance, **kwargs):
+    models.record_changes(sender, instance.user_id, [instance.pk],
+        deleted=True)
+
+@receiver(pre_delete, sender=models.Project)
+def record_deletion_of_actions(sender, instance, **kwargs):
+    # The actions of a project are deleted along with it without signals
+    models.record_changes(models.ActionlistItem, instance.user_id,
+        instance.action_list.values_list('pk', flat=True), deleted=True)
+
+@receiver(post_migrate)
+def create_search_tables(sender, using, **kwargs):
+    if sender.name == 'projects' and connections[using].vendor == 'sqlite':
+        search.create_sqlite_tables(connections[using])
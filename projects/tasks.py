@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from django.db import transaction
+
+from jobs.queue import enqueue, task
+from projects import models
+
+@task
+def purge_project(project_id):
+    """Delete a batch of actions of a deleted project, then enqueue the next
+    batch so that other jobs get a turn in between."""
+    project = models.Project.all_objects.filter(pk=project_id,
+        deleting=True).first()
+    if project is None:
+        return
+    with transaction.atomic():
+        if models.purge_project(project):
+            enqueue(purge_project, project_id=project_id)
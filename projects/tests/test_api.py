@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.utils import timezone
+from unittest import mock
+import json
+
+from projects import api, factories, forms, models
+
+User = get_user_model()
+alice = None
+bob = None
+
+def setUpModule():
+    global alice, bob
+    alice = User.objects.create_user('alice', 'alice@test.com', 'alice')
+    bob = User.objects.create_user('bob', 'bob@test.com', 'bob')
+
+def tearDownModule():
+    alice.delete()
+    bob.delete()
+
+class ApiTestMixin:
+    def setUp(self):
+        self.client.login(username='alice', password='alice')
+
+    def get(self, url, **kwargs):
+        response = self.client.get(url, **kwargs)
+        if response.status_code == 200:
+            response.data = json.loads(response.content.decode())
+        return response
+
+
+class ProjectListTests(ApiTestMixin, TestCase):
+    url = '/api/v1/projects/'
+
+    def test_url_is_not_translated(self):
+        self.assertEqual(reverse('api_v1:projects'), self.url)
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(json.loads(response.content.decode()),
+            {'detail': api.NOT_AUTHENTICATED_ERROR})
+
+    def test_only_lists_own_projects(self):
+        project = factories.ProjectFactory(user=alice, name='Dinosaurs')
+        factories.ProjectFactory(user=bob)
+
+        response = self.get(self.url)
+
+        self.assertEqual([p['name'] for p in response.data['results']],
+            [models.ACTION_PROJECT_NAME, 'Dinosaurs'])
+        self.assertEqual(response.data['results'][1], {'id': project.pk,
+            'name': 'Dinosaurs', 'description': project.description,
+            'open_actions': 0, 'complete_actions': 0})
+
+    def test_is_read_only(self):
+        response = self.client.post(self.url, {'name': 'Dinosaurs'})
+        self.assertEqual(response.status_code, 405)
+
+    def test_pages_follow_next_link(self):
+        factories.ProjectFactory.create_batch(4, user=alice)
+
+        response = self.get(self.url, data={'limit': 2})
+        names = [p['name'] for p in response.data['results']]
+        while response.data['next'] is not None:
+            response = self.get(response.data['next'])
+            names += [p['name'] for p in response.data['results']]
+
+        self.assertEqual(names, [p.name for p in
+            models.Project.objects.filter(user=alice)])
+
+    def test_last_page_has_no_next_link(self):
+        response = self.get(self.url)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_limit_uses_default_page_size(self):
+        response = self.get(self.url, data={'limit': 'many'})
+        self.assertEqual(response.status_code, 200)
+
+
+class ETagTests(ApiTestMixin, TestCase):
+    url = '/api/v1/projects/'
+
+    def test_response_has_etag(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_matching_etag_gives_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_etag_changes_when_anything_changes(self):
+        changes = [
+            lambda: factories.ProjectFactory(user=alice),
+            lambda: factories.ActionlistItemFactory(user=alice),
+            lambda: factories.InlistItemFactory(user=alice),
+            lambda: models.ActionlistItem.objects.filter(user=alice).first()
+                .delete(),
+        ]
+        for change in changes:
+            with self.subTest(change=change):
+                etag = self.client.get(self.url)['ETag']
+                change()
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_does_not_change_for_other_users(self):
+        etag = self.client.get(self.url)['ETag']
+        factories.ProjectFactory(user=bob)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_differs_between_pages(self):
+        factories.ProjectFactory.create_batch(2, user=alice)
+        first = self.get(self.url, data={'limit': 1})
+        second = self.client.get(first.data['next'])
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+
+class ProjectDetailTests(ApiTestMixin, TestCase):
+    def test_shows_project(self):
+        project = factories.ProjectFactory(user=alice)
+        response = self.get('/api/v1/projects/{}/'.format(project.pk))
+        self.assertEqual(response.data['name'], project.name)
+
+    def test_other_users_project_is_not_found(self):
+        project = factories.ProjectFactory(user=bob)
+        response = self.client.get('/api/v1/projects/{}/'.format(project.pk))
+        self.assertEqual(response.status_code, 404)
+
+
+class ProjectActionListTests(ApiTestMixin, TestCase):
+    def test_lists_actions_of_project(self):
+        project = factories.ProjectFactory(user=alice)
+        action = factories.ActionlistItemFactory(user=alice, project=project)
+        factories.ActionlistItemFactory(user=alice)
+
+        response = self.get('/api/v1/projects/{}/actions/'.format(project.pk))
+
+        self.assertEqual(response.data['results'], [{'id': action.pk,
+            'text': action.text, 'complete': False, 'deadline': None,
+            'project': project.pk}])
+
+    def test_other_users_project_is_not_found(self):
+        project = factories.ProjectFactory(user=bob)
+        response = self.client.get(
+            '/api/v1/projects/{}/actions/'.format(project.pk))
+        self.assertEqual(response.status_code, 404)
+
+
+class InlistTests(ApiTestMixin, TestCase):
+    def test_only_lists_own_items(self):
+        item = factories.InlistItemFactory(user=alice)
+        factories.InlistItemFactory(user=bob)
+
+        response = self.get('/api/v1/inlist/')
+
+        self.assertEqual(response.data['results'],
+            [{'id': item.pk, 'text': item.text}])
+
+
+class ChangesTests(ApiTestMixin, TestCase):
+    url = '/api/v1/changes/'
+
+    def setUp(self):
+        super(ChangesTests, self).setUp()
+        # Most tests don't wait for the changes to settle
+        patcher = mock.patch('projects.api.CHANGE_SETTLE_TIME', timedelta(0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sync(self, cursor=None, **params):
+        if cursor is not None:
+            params['since'] = cursor
+        return self.get(self.url, data=params).data
+
+    def prune(self):
+        models.Change.objects.update(
+            created=timezone.now() - timedelta(days=1))
+        while models.prune_changes(timezone.now()):
+            pass
+
+    def test_lists_everything_on_first_sync(self):
+        action = factories.ActionlistItemFactory(user=alice)
+        item = factories.InlistItemFactory(user=alice)
+
+        changes = self.sync()['changes']
+
+        self.assertIn({'type': 'actionlistitem', 'id': action.pk,
+            'deleted': False, 'data': api.serialize_action(action)}, changes)
+        self.assertIn({'type': 'inlistitem', 'id': item.pk,
+            'deleted': False, 'data': api.serialize_inlist_item(item)},
+            changes)
+
+    def test_only_lists_changes_since_cursor(self):
+        cursor = self.sync()['cursor']
+        item = factories.InlistItemFactory(user=alice)
+
+        data = self.sync(cursor)
+
+        self.assertEqual([(c['type'], c['id']) for c in data['changes']],
+            [('inlistitem', item.pk)])
+        self.assertEqual(self.sync(data['cursor'])['changes'], [])
+
+    def test_lists_each_object_once(self):
+        cursor = self.sync()['cursor']
+        action = factories.ActionlistItemFactory(user=alice)
+        action.text = 'changed'
+        action.save()
+
+        changes = self.sync(cursor)['changes']
+
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0]['data']['text'], 'changed')
+
+    def test_lists_deletions(self):
+        project = factories.ProjectFactory(user=alice)
+        action = factories.ActionlistItemFactory(user=alice, project=project)
+        item = factories.InlistItemFactory(user=alice)
+        deleted = [('project', project.pk, True, None),
+            ('actionlistitem', action.pk, True, None),
+            ('inlistitem', item.pk, True, None)]
+        cursor = self.sync()['cursor']
+
+        project.delete()
+        item.delete()
+
+        changes = self.sync(cursor)['changes']
+        self.assertCountEqual([(c['type'], c['id'], c['deleted'], c['data'])
+            for c in changes], deleted)
+
+    def test_lists_bulk_changes(self):
+        actions = factories.ActionlistItemFactory.create_batch(2, user=alice)
+        cursor = self.sync()['cursor']
+        form = forms.BulkActionForm(actions[0].project,
+            data={'operation': 'delete', 'actions': [a.pk for a in actions]})
+        form.is_valid()
+        form.save()
+
+        changes = self.sync(cursor)['changes']
+
+        self.assertEqual([(c['id'], c['deleted']) for c in changes],
+            [(a.pk, True) for a in actions])
+
+    def test_does_not_list_changes_of_other_users(self):
+        cursor = self.sync()['cursor']
+        factories.InlistItemFactory(user=bob)
+        self.assertEqual(self.sync(cursor)['changes'], [])
+
+    def test_tells_when_there_are_more_changes(self):
+        factories.InlistItemFactory.create_batch(3, user=alice)
+        data = self.sync(limit=1)
+        self.assertTrue(data['more'])
+        while data['more']:
+            data = self.sync(data['cursor'], limit=1)
+        self.assertEqual(self.sync(data['cursor'])['changes'], [])
+
+    @mock.patch('projects.api.CHANGE_SETTLE_TIME', timedelta(hours=1))
+    def test_cursor_does_not_pass_recent_changes(self):
+        models.Change.objects.update(
+            created=timezone.now() - timedelta(days=1))
+        cursor = self.sync()['cursor']
+        item = factories.InlistItemFactory(user=alice)
+
+        data = self.sync(cursor)
+
+        self.assertEqual([c['id'] for c in data['changes']], [item.pk])
+        self.assertEqual(data['cursor'], cursor)
+        self.assertFalse(data['more'])
+
+    @mock.patch('projects.api.CHANGE_SETTLE_TIME', timedelta(hours=1))
+    def test_cursor_passes_settled_changes(self):
+        factories.InlistItemFactory.create_batch(2, user=alice)
+        models.Change.objects.update(
+            created=timezone.now() - timedelta(days=1))
+
+        data = self.sync(limit=1)
+
+        self.assertTrue(data['more'])
+        self.assertEqual(len(self.sync(data['cursor'])['changes']),
+            models.Change.objects.filter(user=alice).count() - 1)
+
+    def test_pruned_cursor_requires_resync(self):
+        cursor = self.sync()['cursor']
+        factories.InlistItemFactory(user=alice)
+        self.prune()
+
+        response = self.client.get(self.url, {'since': cursor})
+
+        self.assertEqual(response.status_code, 410)
+        data = json.loads(response.content.decode())
+        self.assertEqual(data['detail'], api.RESYNC_REQUIRED_ERROR)
+        self.assertEqual(self.sync(data['cursor'])['changes'], [])
+
+    def test_first_sync_after_pruning_requires_resync(self):
+        factories.InlistItemFactory(user=alice)
+        self.prune()
+        self.assertEqual(self.client.get(self.url).status_code, 410)
+
+    def test_cursor_after_pruned_changes_keeps_working(self):
+        factories.InlistItemFactory(user=alice)
+        self.prune()
+        cursor = json.loads(self.client.get(self.url).content.decode())[
+            'cursor']
+        item = factories.InlistItemFactory(user=alice)
+
+        changes = self.sync(cursor)['changes']
+
+        self.assertEqual([c['id'] for c in changes], [item.pk])
+
+
+class SearchTests(ApiTestMixin, TestCase):
+    def test_returns_ranked_results(self):
+        item = factories.InlistItemFactory(user=alice, text='dinosaur')
+        factories.InlistItemFactory(user=bob, text='dinosaur')
+
+        data = self.get('/api/v1/search/', data={'q': 'dino'}).data
+
+        self.assertEqual([(r['type'], r['id'], r['data'])
+            for r in data['results']],
+            [('inlistitem', item.pk, api.serialize_inlist_item(item))])
+        self.assertFalse(data['more'])
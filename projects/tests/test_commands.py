@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from projects import factories, models
+from projects.management.commands import reconcile_action_counters
+
+User = get_user_model()
+alice = None
+
+def setUpModule():
+    global alice
+    alice = User.objects.create_user('alice', 'alice@test.org', 'alice')
+
+def tearDownModule():
+    alice.delete()
+
+class ReconcileActionCountersTests(TestCase):
+    def setUp(self):
+        self.project = factories.ProjectFactory(user=alice)
+        factories.ActionlistItemFactory.create_batch(2, user=alice,
+            project=self.project)
+        models.Project.objects.filter(pk=self.project.pk).update(
+            open_actions=7, complete_actions=1)
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('reconcile_action_counters', *args, stdout=out)
+        return out.getvalue()
+
+    def counts(self):
+        project = models.Project.objects.get(pk=self.project.pk)
+        return project.open_actions, project.complete_actions
+
+    def test_fixes_drifted_counters(self):
+        output = self.reconcile()
+        self.assertEqual(self.counts(), (2, 0))
+        self.assertIn('Fixed 1 projects', output)
+
+    def test_fix_counts_again_before_writing(self):
+        command = reconcile_action_counters.Command()
+        models.Project.objects.filter(pk=self.project.pk).update(
+            open_actions=2, complete_actions=0)
+        self.assertIsNone(command.fix(self.project.pk))
+        self.assertEqual(self.counts(), (2, 0))
+
+    def test_dry_run_does_not_change_counters(self):
+        output = self.reconcile('--dry-run')
+        self.assertEqual(self.counts(), (7, 1))
+        self.assertIn('Found 1 projects', output)
+
+
+class PurgeProjectsTests(TestCase):
+    def setUp(self):
+        self.project = factories.ProjectFactory(user=alice)
+        factories.ActionlistItemFactory.create_batch(3, user=alice,
+            project=self.project)
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command('purge_projects', *args, stdout=out)
+        return out.getvalue()
+
+    def test_removes_deleted_projects_and_their_actions(self):
+        models.mark_project_deleted(self.project)
+        output = self.purge('--batch-size', '2')
+        self.assertFalse(models.Project.all_objects.filter(
+            pk=self.project.pk).exists())
+        self.assertFalse(models.ActionlistItem.objects.filter(
+            project=self.project.pk).exists())
+        self.assertIn('Purged 1 projects', output)
+
+    def test_leaves_other_projects_alone(self):
+        output = self.purge()
+        self.assertTrue(models.Project.objects.filter(
+            pk=self.project.pk).exists())
+        self.assertIn('Purged 0 projects', output)
+
+
+class PruneChangesTests(TestCase):
+    def prune(self, *args):
+        out = StringIO()
+        call_command('prune_changes', *args, stdout=out)
+        return out.getvalue()
+
+    def test_removes_old_changes(self):
+        factories.InlistItemFactory.create_batch(3, user=alice)
+        models.Change.objects.update(
+            created=timezone.now() - timedelta(days=10))
+        item = factories.InlistItemFactory(user=alice)
+
+        output = self.prune('--days', '5', '--batch-size', '2')
+
+        self.assertEqual(list(models.Change.objects.values_list(
+            'object_id', flat=True)), [item.pk])
+        self.assertIn('Pruned', output)
+
+    def test_keeps_changes_of_retention_period(self):
+        factories.InlistItemFactory(user=alice)
+        count = models.Change.objects.count()
+        output = self.prune()
+        self.assertEqual(models.Change.objects.count(), count)
+        self.assertIn('Pruned 0 changes', output)
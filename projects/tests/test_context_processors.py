@@ -1,6 +1,7 @@
 # -*- coding:utf-8 -*-
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.test import TestCase, RequestFactory
 
 from projects import context_processors as cp
@@ -16,6 +17,9 @@ class ProjectNamesTests(TestCase):
         cls.bob = User.objects.create_user('bob', 'bob@test.org', 'bob')
         cls.factory = RequestFactory()
 
+    def setUp(self):
+        cache.clear()
+
     def test_project_list_is_present(self):
         request = self.factory.get('/')
         request.user = self.alice
@@ -36,9 +40,9 @@ class ProjectNamesTests(TestCase):
 
         project_list = cp.project_list(request)['project_list']
         for p in projects:
-            self.assertIn(p, project_list,
+            self.assertIn((p.pk, p.name), project_list,
                 msg="{} is not found in {}".format(p, project_list))
-        self.assertEqual(len(projects), project_list.count())
+        self.assertEqual(len(projects), len(project_list))
 
     def test_project_list_does_not_contain_other_users_projects(self):
         ap = factories.ProjectFactory(user=self.alice)
@@ -48,6 +52,68 @@ class ProjectNamesTests(TestCase):
 
         project_list = cp.project_list(request)['project_list']
 
-        self.assertEqual(project_list.count(), 2)
-        self.assertIn(ap, project_list)
-        self.assertNotIn(bp, project_list)
+        self.assertEqual(len(project_list), 2)
+        self.assertIn((ap.pk, ap.name), project_list)
+        self.assertNotIn((bp.pk, bp.name), project_list)
+
+    def test_project_list_only_contains_pk_and_name(self):
+        p = factories.ProjectFactory(user=self.alice)
+        request = self.factory.get('/')
+        request.user = self.alice
+
+        link = cp.project_list(request)['project_list'][-1]
+        self.assertEqual(link.pk, p.pk)
+        self.assertEqual(link.name, p.name)
+
+    def test_project_list_is_not_queried_when_unused(self):
+        request = self.factory.get('/')
+        request.user = self.alice
+        with self.assertNumQueries(0):
+            cp.project_list(request)
+
+    def test_project_list_is_cached(self):
+        request = self.factory.get('/')
+        request.user = self.alice
+        list(cp.project_list(request)['project_list'])
+        with self.assertNumQueries(0):
+            list(cp.project_list(request)['project_list'])
+
+    def test_version_is_stable_while_cached(self):
+        request = self.factory.get('/')
+        request.user = self.alice
+        version = str(cp.project_list(request)['project_list_version'])
+        self.assertEqual(version,
+            str(cp.project_list(request)['project_list_version']))
+
+    def test_saving_project_invalidates_project_list(self):
+        p = factories.ProjectFactory(user=self.alice)
+        request = self.factory.get('/')
+        request.user = self.alice
+        list(cp.project_list(request)['project_list'])
+
+        p.name = 'Renamed'
+        p.save()
+
+        self.assertIn((p.pk, 'Renamed'),
+            cp.project_list(request)['project_list'])
+
+    def test_deleting_project_invalidates_project_list(self):
+        p = factories.ProjectFactory(user=self.alice)
+        request = self.factory.get('/')
+        request.user = self.alice
+        list(cp.project_list(request)['project_list'])
+
+        p.delete()
+
+        self.assertNotIn((p.pk, p.name),
+            cp.project_list(request)['project_list'])
+
+    def test_project_list_of_other_users_is_not_invalidated(self):
+        request = self.factory.get('/')
+        request.user = self.alice
+        list(cp.project_list(request)['project_list'])
+
+        factories.ProjectFactory(user=self.bob)
+
+        with self.assertNumQueries(0):
+            list(cp.project_list(request)['project_list'])
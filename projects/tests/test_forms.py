@@ -3,7 +3,9 @@ from crispy_forms.helper import FormHelper
 from django.core.exceptions import NON_FIELD_ERRORS
 from django.core.urlresolvers import reverse
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from projects import factories, forms, models
 
@@ -53,8 +55,79 @@ class InlistFormTest(TestCase):
         form = forms.InlistForm(data={'text': 'dupe'})
         form.instance.user = alice
 
+        self.assertTrue(form.is_valid())
+        self.assertIsNone(form.save())
         self.assertFalse(form.is_valid())
         self.assertEqual(form.errors['text'], [forms.DUPLICATE_ITEM_ERROR])
+        self.assertEqual(models.InlistItem.objects.count(), 1)
+
+    def test_does_not_query_for_duplicates(self):
+        form = forms.InlistForm(data={'text': 'new'})
+        form.instance.user = alice
+        with CaptureQueriesContext(connection) as queries:
+            form.is_valid()
+        self.assertEqual(len(queries), 0)
+
+
+class BulkInlistFormTest(TestCase):
+    def test_form_crispy_helper(self):
+        form = forms.BulkInlistForm()
+        self.assertEqual(form.helper.form_method.lower(), 'post')
+
+    def test_form_validation_for_blank_text(self):
+        form = forms.BulkInlistForm(data={'text': ' \n\n '})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['text'], [forms.EMPTY_TEXT_ERROR])
+
+    def test_form_splits_text_into_unique_lines(self):
+        form = forms.BulkInlistForm(data={'text': 'a\n b \n\na\r\nc'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['text'], ['a', 'b', 'c'])
+
+    def test_form_validation_for_too_many_lines(self):
+        text = '\n'.join(str(i) for i in range(forms.MAX_BULK_ITEMS + 1))
+        form = forms.BulkInlistForm(data={'text': text})
+        self.assertFalse(form.is_valid())
+
+    def test_form_validation_for_long_lines(self):
+        form = forms.BulkInlistForm(data={'text': 'a' * 256})
+        self.assertFalse(form.is_valid())
+
+    def test_form_save_creates_all_items(self):
+        form = forms.BulkInlistForm(data={'text': 'a\nb\nc'})
+        form.is_valid()
+        created, skipped = form.save(alice)
+        self.assertEqual(models.InlistItem.objects.filter(user=alice).count(),
+            3)
+        self.assertEqual([i.text for i in created], ['a', 'b', 'c'])
+        self.assertEqual(skipped, [])
+
+    def test_form_save_skips_items_already_on_inlist(self):
+        models.InlistItem.objects.create(text='b', user=alice)
+        form = forms.BulkInlistForm(data={'text': 'a\nb\nc'})
+        form.is_valid()
+        created, skipped = form.save(alice)
+        self.assertEqual([i.text for i in created], ['a', 'c'])
+        self.assertEqual(skipped, ['b'])
+        self.assertEqual(models.InlistItem.objects.filter(user=alice).count(),
+            3)
+
+    def test_form_save_does_not_skip_items_of_other_users(self):
+        models.InlistItem.objects.create(text='b', user=bob)
+        form = forms.BulkInlistForm(data={'text': 'a\nb'})
+        form.is_valid()
+        created, skipped = form.save(alice)
+        self.assertEqual(len(created), 2)
+
+    def test_form_save_uses_a_handful_of_queries(self):
+        text = '\n'.join(str(i) for i in range(forms.MAX_BULK_ITEMS))
+        form = forms.BulkInlistForm(data={'text': text})
+        form.is_valid()
+        # SQLite splits up the inserts in batches, but there should still be
+        # far fewer queries than items
+        with CaptureQueriesContext(connection) as queries:
+            form.save(alice)
+        self.assertLess(len(queries), 20)
 
 
 class ActionlistFormTest(TestCase):
@@ -89,6 +162,8 @@ class ActionlistFormTest(TestCase):
         form = forms.ActionlistForm(data={'text': 'dupe'})
         form.instance.user = alice
 
+        form.is_valid()
+        self.assertIsNone(form.save())
         self.assertFalse(form.is_valid())
         self.assertEqual(form.errors[NON_FIELD_ERRORS],
             [forms.DUPLICATE_ACTION_ERROR])
@@ -144,9 +219,12 @@ class ActionlistFormTest(TestCase):
         form.instance.user = alice
         form.instance.project = p
 
+        form.is_valid()
+        form.save()
         self.assertFalse(form.is_valid())
         self.assertSequenceEqual(form.errors[NON_FIELD_ERRORS],
             [forms.DUPLICATE_ACTION_ERROR])
+        self.assertEqual(p.action_list.count(), 1)
         self.assertSequenceEqual(list(form.errors.keys()), [NON_FIELD_ERRORS])
 
 
@@ -178,6 +256,139 @@ class CompleteActionFormTest(TestCase):
         self.assertFalse(item.complete)
 
 
+class BulkActionFormTest(TestCase):
+    def setUp(self):
+        self.project = factories.ProjectFactory(user=alice)
+        self.actions = factories.ActionlistItemFactory.create_batch(3,
+            user=alice, project=self.project)
+        self.pks = [a.pk for a in self.actions]
+
+    def form(self, operation, pks=None, **data):
+        data.update({'operation': operation,
+            'actions': self.pks if pks is None else pks})
+        return forms.BulkActionForm(self.project, data=data)
+
+    def test_crispy_helper_is_set(self):
+        form = forms.BulkActionForm(self.project)
+        self.assertIsInstance(form.helper, FormHelper)
+        self.assertEqual(form.helper.form_action, reverse(
+            'projects:bulk_actions', kwargs={'pk': self.project.pk}))
+
+    def test_requires_selected_actions(self):
+        form = self.form('delete', [])
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['actions'],
+            [forms.NO_ACTIONS_SELECTED_ERROR])
+
+    def test_cannot_select_actions_of_other_projects(self):
+        other = factories.ActionlistItemFactory(user=alice)
+        form = self.form('delete', [other.pk])
+        self.assertFalse(form.is_valid())
+
+    def test_toggles_completion_of_selected_actions(self):
+        self.actions[0].complete = True
+        self.actions[0].save()
+        form = self.form('complete', self.pks[:2])
+        form.is_valid()
+
+        form.save()
+
+        completed = self.project.action_list.filter(complete=True)
+        self.assertSequenceEqual(completed, [self.actions[1]])
+
+    def test_deletes_selected_actions(self):
+        form = self.form('delete', self.pks[:2])
+        form.is_valid()
+
+        form.save()
+
+        self.assertSequenceEqual(self.project.action_list.all(),
+            [self.actions[2]])
+
+    def test_moves_selected_actions(self):
+        target = factories.ProjectFactory(user=alice)
+        form = self.form('move', project=target.pk)
+        self.assertTrue(form.is_valid())
+
+        form.save()
+
+        self.assertEqual(target.action_list.count(), 3)
+        self.assertEqual(self.project.action_list.count(), 0)
+
+    def test_move_requires_project(self):
+        form = self.form('move')
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['project'], [forms.NO_TARGET_PROJECT_ERROR])
+
+    def test_cannot_move_to_project_of_different_user(self):
+        target = factories.ProjectFactory(user=bob)
+        form = self.form('move', project=target.pk)
+        self.assertFalse(form.is_valid())
+
+    def test_move_causing_duplication_shows_correct_error(self):
+        target = factories.ProjectFactory(user=alice)
+        factories.ActionlistItemFactory(user=alice, project=target,
+            text=self.actions[1].text)
+        form = self.form('move', project=target.pk)
+
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors[NON_FIELD_ERRORS],
+            [forms.DUPLICATE_MOVE_ERROR])
+        self.assertEqual(target.action_list.count(), 1)
+
+    def test_can_move_to_same_project(self):
+        form = self.form('move', project=self.project.pk)
+        self.assertTrue(form.is_valid())
+
+    def test_save_uses_single_statement(self):
+        target = factories.ProjectFactory(user=alice)
+        for operation in ('complete', 'move', 'delete'):
+            with self.subTest(operation=operation):
+                self.pks = [a.pk for a in factories.ActionlistItemFactory
+                    .create_batch(3, user=alice, project=self.project)]
+                form = self.form(operation, project=target.pk)
+                form.is_valid()
+                with CaptureQueriesContext(connection) as queries:
+                    form.save()
+                statements = [q for q in queries
+                    if 'projects_actionlistitem' in q['sql']]
+                self.assertEqual(len(statements), 1)
+
+    def counts(self, project):
+        project = models.Project.objects.get(pk=project.pk)
+        return project.open_actions, project.complete_actions
+
+    def test_toggling_updates_action_counters(self):
+        form = self.form('complete', self.pks[:2])
+        form.is_valid()
+        form.save()
+        self.assertEqual(self.counts(self.project), (1, 2))
+
+    def test_moving_updates_action_counters(self):
+        target = factories.ProjectFactory(user=alice)
+        form = self.form('move', self.pks[:2], project=target.pk)
+        form.is_valid()
+        form.save()
+        self.assertEqual(self.counts(self.project), (1, 0))
+        self.assertEqual(self.counts(target), (2, 0))
+
+    def test_deleting_updates_action_counters(self):
+        form = self.form('delete', self.pks[:2])
+        form.is_valid()
+        form.save()
+        self.assertEqual(self.counts(self.project), (1, 0))
+
+    def test_save_bumps_change_counter(self):
+        form = self.form('complete')
+        form.is_valid()
+        before = models.ChangeCounter.objects.get(user=alice).value
+        form.save()
+        self.assertEqual(models.ChangeCounter.objects.get(user=alice).value,
+            before + 1)
+
+
 class ConvertInlistToActionFormTest(TestCase):
     def test_form_save_creates_action_item(self):
         item = factories.InlistItemFactory(user=alice)
@@ -243,6 +454,51 @@ class ConvertInlistToActionFormTest(TestCase):
         self.assertEqual(form.errors['text'], [forms.EMPTY_TEXT_ERROR])
 
 
+class BulkConvertInlistFormTest(TestCase):
+    def setUp(self):
+        self.items = factories.InlistItemFactory.create_batch(2, user=alice)
+
+    def form(self, items):
+        return forms.BulkConvertInlistForm(alice,
+            data={'items': [i.pk for i in items]})
+
+    def test_crispy_helper_is_set(self):
+        form = forms.BulkConvertInlistForm(alice)
+        self.assertIsInstance(form.helper, FormHelper)
+        self.assertEqual(form.helper.form_action,
+            reverse('projects:bulk_convert_inlist'))
+
+    def test_converts_selected_items(self):
+        form = self.form(self.items[:1])
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertSequenceEqual(models.InlistItem.objects.filter(user=alice),
+            self.items[1:])
+        self.assertEqual(models.ActionlistItem.objects.get(user=alice).text,
+            self.items[0].text)
+
+    def test_requires_selection(self):
+        form = self.form([])
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['items'], [forms.NO_ITEMS_SELECTED_ERROR])
+
+    def test_cannot_select_items_of_other_users(self):
+        form = self.form([factories.InlistItemFactory(user=trudy)])
+        self.assertFalse(form.is_valid())
+
+    def test_duplicate_shows_error_and_converts_nothing(self):
+        factories.ActionlistItemFactory(user=alice, text=self.items[1].text)
+        form = self.form(self.items)
+
+        self.assertTrue(form.is_valid())
+        form.save()
+
+        self.assertEqual(form.errors[NON_FIELD_ERRORS],
+            [forms.DUPLICATE_ACTION_ERROR])
+        self.assertEqual(models.InlistItem.objects.filter(user=alice).count(),
+            2)
+
+
 class CreateProjectFormTest(TestCase):
     def test_crispy_helper_is_set(self):
         form = forms.CreateProjectForm()
@@ -271,6 +527,8 @@ class CreateProjectFormTest(TestCase):
         form = forms.CreateProjectForm(data={'name': 'dupe'})
         form.instance.user = alice
 
+        form.is_valid()
+        self.assertIsNone(form.save())
         self.assertFalse(form.is_valid())
         self.assertEqual(form.errors['name'], [forms.DUPLICATE_PROJECT_ERROR])
 
@@ -317,6 +575,8 @@ class EditProjectFormTest(TestCase):
         form = forms.EditProjectForm(data={'name': 'dupe'})
         form.instance = self.project
 
+        form.is_valid()
+        self.assertIsNone(form.save())
         self.assertFalse(form.is_valid())
         self.assertEqual(form.errors['name'], [forms.DUPLICATE_PROJECT_ERROR])
 
@@ -373,6 +633,17 @@ class EditActionFormTest(TestCase):
         self.assertIn(projects[2].pk, choices)
         self.assertEqual(len(choices), 4)
 
+    def test_renders_without_loading_all_projects(self):
+        factories.ProjectFactory.create_batch(3, user=alice)
+        form = forms.EditActionForm(instance=self.action)
+
+        with CaptureQueriesContext(connection) as queries:
+            html = str(form['project'])
+
+        self.assertEqual(len(queries), 1)
+        self.assertIn('value="{}"'.format(models.ACTION_PROJECT_NAME), html)
+        self.assertIn('value="{}"'.format(self.action.project_id), html)
+
     def test_there_is_no_empty_label(self):
         form = forms.EditActionForm(instance=self.action)
         self.assertNotIn('',
@@ -383,9 +654,11 @@ class EditActionFormTest(TestCase):
         action2 = factories.ActionlistItemFactory(user=alice, project=project,
             text=self.action.text)
 
-        form = forms.EditActionForm(data={'project': project.pk},
-            instance=self.action)
+        form = forms.EditActionForm(data={'project': project.pk,
+            'text': self.action.text}, instance=self.action)
 
+        self.assertTrue(form.is_valid())
+        self.assertIsNone(form.save())
         self.assertFalse(form.is_valid())
         self.assertEqual(form.errors[NON_FIELD_ERRORS],
             [forms.DUPLICATE_MOVE_ERROR])
@@ -414,6 +687,8 @@ class EditActionFormTest(TestCase):
         form = forms.EditActionForm(data={'text': self.action.text,
             'project': self.action.project.pk}, instance=action2)
 
+        form.is_valid()
+        form.save()
         self.assertFalse(form.is_valid())
         self.assertEqual(form.errors[NON_FIELD_ERRORS],
             [forms.DUPLICATE_MOVE_ERROR])
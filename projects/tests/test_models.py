@@ -1,11 +1,17 @@
 # -*- coding: utf-8 -*-
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import connection, IntegrityError, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from datetime import timedelta
+from django.utils import timezone
 
 from projects import factories
-from projects.models import (InlistItem, ActionlistItem, Project,
-    ACTION_PROJECT_NAME)
+from projects.models import (InlistItem, ActionlistItem, Change,
+    ChangeCounter, Project, ACTION_PROJECT_NAME, convert_to_actions,
+    count_actions, get_user_action_project, mark_project_deleted,
+    prune_changes, purge_project)
 
 User = get_user_model()
 u = None
@@ -99,6 +105,19 @@ class ActionlistItemModelTest(TestCase):
         project = Project.objects.get(user=u, name=ACTION_PROJECT_NAME)
         self.assertEqual(item.project, project)
 
+    def test_default_project_is_not_looked_up_by_name(self):
+        item = ActionlistItem(text='test', user=u)
+        self.assertIsNone(item.project)
+
+        with CaptureQueriesContext(connection) as queries:
+            item.clean()
+            item.save()
+
+        self.assertFalse([q for q in queries
+            if 'FROM "projects_project"' in q['sql']])
+        self.assertEqual(item.project.name, ACTION_PROJECT_NAME)
+        self.assertEqual(item.project.user, u)
+
     def test_action_user_and_project_user_should_be_equal(self):
         bob = User.objects.create_user('bob', 'bob@test.org', 'bob')
         project = factories.ProjectFactory(user=bob)
@@ -173,3 +192,214 @@ class ProjectModelTests(TestCase):
         item2 = factories.ProjectFactory(name='second project', user=u)
         self.assertEqual(str(item1), 'test project')
         self.assertEqual(str(item2), 'second project')
+
+
+class ActionCounterTests(TestCase):
+    def setUp(self):
+        self.project = factories.ProjectFactory(user=u)
+
+    def assertCounts(self, open_actions, complete_actions, deadline_actions,
+            project=None):
+        project = Project.objects.get(pk=(project or self.project).pk)
+        self.assertEqual((project.open_actions, project.complete_actions,
+            project.deadline_actions),
+            (open_actions, complete_actions, deadline_actions))
+
+    def test_counts_new_actions(self):
+        factories.ActionlistItemFactory.create_batch(2, user=u,
+            project=self.project)
+        factories.ActionlistItemFactory(user=u, project=self.project,
+            deadline=timezone.now())
+        self.assertCounts(3, 0, 1)
+
+    def test_completing_moves_action_to_complete_count(self):
+        action = factories.ActionlistItemFactory(user=u, project=self.project,
+            deadline=timezone.now())
+        action = ActionlistItem.objects.get(pk=action.pk)
+        action.complete = True
+        action.save()
+        self.assertCounts(0, 1, 0)
+
+    def test_moving_changes_counts_of_both_projects(self):
+        other = factories.ProjectFactory(user=u)
+        action = factories.ActionlistItemFactory(user=u, project=self.project)
+        action.project = other
+        action.save()
+        self.assertCounts(0, 0, 0)
+        self.assertCounts(1, 0, 0, project=other)
+
+    def test_deleting_removes_action_from_counts(self):
+        action = factories.ActionlistItemFactory(user=u, project=self.project,
+            complete=True)
+        ActionlistItem.objects.get(pk=action.pk).delete()
+        self.assertCounts(0, 0, 0)
+
+    def test_saving_deferred_action_uses_stored_state(self):
+        action = factories.ActionlistItemFactory(user=u, project=self.project)
+        action = ActionlistItem.objects.only('text').get(pk=action.pk)
+        action.text = 'changed'
+        action.save()
+        self.assertCounts(1, 0, 0)
+
+    def test_saving_project_keeps_counters(self):
+        project = Project.objects.get(pk=self.project.pk)
+        factories.ActionlistItemFactory(user=u, project=self.project)
+        project.name = 'renamed'
+        project.save()
+        self.assertCounts(1, 0, 0)
+
+    def test_count_actions_counts_from_scratch(self):
+        factories.ActionlistItemFactory(user=u, project=self.project)
+        factories.ActionlistItemFactory(user=u, project=self.project,
+            complete=True, deadline=timezone.now())
+        Project.objects.filter(pk=self.project.pk).update(open_actions=5)
+
+        project = count_actions(Project.objects.filter(pk=self.project.pk)) \
+            .get()
+
+        self.assertEqual((project.counted_open_actions,
+            project.counted_complete_actions,
+            project.counted_deadline_actions), (1, 1, 0))
+
+
+class ConvertToActionsTests(TestCase):
+    def convert(self, n):
+        items = factories.InlistItemFactory.create_batch(n, user=u)
+        with CaptureQueriesContext(connection) as queries:
+            convert_to_actions(u.pk, items)
+        return len(queries)
+
+    def test_replaces_items_by_actions(self):
+        items = factories.InlistItemFactory.create_batch(2, user=u)
+        convert_to_actions(u.pk, items)
+
+        self.assertEqual(InlistItem.objects.filter(user=u).count(), 0)
+        project = get_user_action_project(u)
+        self.assertCountEqual(project.action_list.values_list('text',
+            flat=True), [i.text for i in items])
+        self.assertEqual(project.open_actions, 2)
+
+    def test_uses_given_texts(self):
+        item = factories.InlistItemFactory(user=u)
+        convert_to_actions(u.pk, [item], ['changed'])
+        self.assertEqual(ActionlistItem.objects.get(user=u).text, 'changed')
+
+    def test_records_changes(self):
+        item = factories.InlistItemFactory(user=u)
+        convert_to_actions(u.pk, [item])
+        action = ActionlistItem.objects.get(user=u)
+        self.assertCountEqual(Change.objects.filter(user=u).order_by('-pk')
+            .values_list('kind', 'object_id', 'deleted')[:2],
+            [('inlistitem', item.pk, True),
+                ('actionlistitem', action.pk, False)])
+
+    def test_number_of_queries_does_not_depend_on_number_of_items(self):
+        self.assertEqual(self.convert(1), self.convert(5))
+
+    def test_duplicate_changes_nothing(self):
+        factories.ActionlistItemFactory(user=u, text='dupe')
+        items = [factories.InlistItemFactory(user=u),
+            factories.InlistItemFactory(user=u, text='dupe')]
+
+        with self.assertRaises(IntegrityError):
+            convert_to_actions(u.pk, items)
+
+        self.assertEqual(InlistItem.objects.filter(user=u).count(), 2)
+        self.assertEqual(ActionlistItem.objects.filter(user=u).count(), 1)
+        self.assertEqual(get_user_action_project(u).open_actions, 1)
+
+
+class ProjectDeletionTests(TestCase):
+    def setUp(self):
+        self.project = factories.ProjectFactory(user=u)
+        self.actions = factories.ActionlistItemFactory.create_batch(3,
+            user=u, project=self.project)
+
+    def test_deleted_project_is_hidden(self):
+        mark_project_deleted(self.project)
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertTrue(Project.all_objects.get(pk=self.project.pk).deleting)
+        self.assertEqual(ActionlistItem.objects.filter(
+            project=self.project).count(), 3)
+
+    def test_deleted_project_frees_its_name(self):
+        name = self.project.name
+        mark_project_deleted(self.project)
+        project = Project(name=name, user=u)
+        project.full_clean()
+        project.save()
+        self.assertEqual(Project.all_objects.get(pk=self.project.pk)
+            .deleted_name, name)
+
+    def test_projects_with_the_same_name_can_be_deleted(self):
+        name = self.project.name
+        mark_project_deleted(self.project)
+        mark_project_deleted(factories.ProjectFactory(name=name, user=u))
+        self.assertEqual([p.deleted_name for p in Project.all_objects
+            .filter(user=u, deleting=True)], [name, name])
+
+    def test_name_stays_unique_among_other_projects(self):
+        name = self.project.name
+        mark_project_deleted(self.project)
+        factories.ProjectFactory(name=name, user=u)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                factories.ProjectFactory(name=name, user=u)
+
+    def test_purge_deletes_a_batch_of_actions(self):
+        mark_project_deleted(self.project)
+        self.assertEqual(purge_project(self.project, 2), 2)
+        project = Project.all_objects.get(pk=self.project.pk)
+        self.assertEqual(project.open_actions, 1)
+        self.assertEqual(ActionlistItem.objects.filter(
+            project=self.project).count(), 1)
+
+    def test_purge_deletes_project_without_actions(self):
+        mark_project_deleted(self.project)
+        while purge_project(self.project, 2):
+            pass
+        self.assertFalse(Project.all_objects.filter(
+            pk=self.project.pk).exists())
+
+    def test_purge_of_purged_project_does_nothing(self):
+        mark_project_deleted(self.project)
+        while purge_project(self.project):
+            pass
+        self.assertEqual(purge_project(self.project), 0)
+        self.assertEqual(Change.objects.filter(user=u, deleted=True,
+            kind='actionlistitem').count(), 3)
+
+    def test_purge_records_deleted_actions(self):
+        mark_project_deleted(self.project)
+        purge_project(self.project)
+        self.assertCountEqual(Change.objects.filter(user=u, deleted=True)
+            .values_list('object_id', flat=True), [a.pk for a in self.actions])
+
+    def test_purge_queries_do_not_depend_on_batch_size(self):
+        mark_project_deleted(self.project)
+        with CaptureQueriesContext(connection) as one:
+            purge_project(self.project, 1)
+        with CaptureQueriesContext(connection) as two:
+            purge_project(self.project, 2)
+        self.assertEqual(len(one), len(two))
+
+
+class PruneChangesTests(TestCase):
+    def setUp(self):
+        self.old = factories.InlistItemFactory.create_batch(2, user=u)
+        Change.objects.update(created=timezone.now() - timedelta(days=2))
+        self.new = factories.InlistItemFactory(user=u)
+
+    def test_deletes_changes_before_the_moment(self):
+        while prune_changes(timezone.now() - timedelta(days=1), 1):
+            pass
+        self.assertEqual(list(Change.objects.filter(user=u)
+            .values_list('object_id', flat=True)), [self.new.pk])
+
+    def test_remembers_last_pruned_change_of_user(self):
+        last = Change.objects.filter(user=u, object_id=self.old[1].pk).get()
+        prune_changes(timezone.now() - timedelta(days=1))
+        self.assertEqual(ChangeCounter.objects.get(user=u).pruned, last.pk)
+
+    def test_returns_zero_when_nothing_is_old_enough(self):
+        self.assertEqual(prune_changes(timezone.now() - timedelta(days=3)), 0)
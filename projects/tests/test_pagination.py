@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from projects import factories, models
+from projects.pagination import (decode_cursor, encode_cursor,
+    paginate_actions)
+
+User = get_user_model()
+alice = None
+
+def setUpModule():
+    global alice
+    alice = User.objects.create_user('alice', 'alice@test.org', 'alice')
+
+def tearDownModule():
+    alice.delete()
+
+class PaginateActionsTests(TestCase):
+    def setUp(self):
+        self.project = factories.ProjectFactory(user=alice)
+        self.actions = self.project.action_list.all()
+
+    def walk(self, sort_method='', sort_order='', page_size=2):
+        """Return the text of the actions on every page."""
+        pages = []
+        cursor = None
+        while True:
+            items, cursor = paginate_actions(self.actions, sort_method,
+                sort_order, cursor, page_size)
+            pages.append([a.text for a in items])
+            if cursor is None:
+                return pages
+
+    def test_returns_no_cursor_when_everything_fits_on_one_page(self):
+        factories.ActionlistItemFactory.create_batch(3, user=alice,
+            project=self.project)
+        items, cursor = paginate_actions(self.actions, page_size=3)
+        self.assertEqual(len(items), 3)
+        self.assertIsNone(cursor)
+
+    def test_returns_cursor_when_there_are_more_items(self):
+        factories.ActionlistItemFactory.create_batch(3, user=alice,
+            project=self.project)
+        items, cursor = paginate_actions(self.actions, page_size=2)
+        self.assertEqual(len(items), 2)
+        self.assertIsNotNone(cursor)
+
+    def test_cursor_continues_after_previous_page(self):
+        for text in ('a', 'b', 'c', 'd', 'e'):
+            factories.ActionlistItemFactory(user=alice, text=text,
+                project=self.project)
+        self.assertEqual(self.walk(), [['a', 'b'], ['c', 'd'], ['e']])
+
+    def test_pages_by_text_are_case_insensitive(self):
+        for text in ('b', 'C', 'a', 'D'):
+            factories.ActionlistItemFactory(user=alice, text=text,
+                project=self.project)
+        self.assertEqual(self.walk('text'), [['a', 'b'], ['C', 'D']])
+        self.assertEqual(self.walk('text', '-'), [['D', 'C'], ['b', 'a']])
+
+    def test_uses_pk_to_break_ties(self):
+        for text in ('a', 'b', 'c', 'd', 'e'):
+            factories.ActionlistItemFactory(user=alice, text=text,
+                project=self.project, complete=text in 'bd')
+        self.assertEqual(self.walk('complete'),
+            [['a', 'c'], ['e', 'b'], ['d']])
+        self.assertEqual(self.walk('complete', '-'),
+            [['d', 'b'], ['e', 'c'], ['a']])
+
+    def test_actions_without_deadline_come_last(self):
+        now = timezone.now()
+        factories.ActionlistItemFactory(user=alice, text='none 1',
+            project=self.project)
+        factories.ActionlistItemFactory(user=alice, text='late',
+            project=self.project, deadline=now + timedelta(days=1))
+        factories.ActionlistItemFactory(user=alice, text='none 2',
+            project=self.project)
+        factories.ActionlistItemFactory(user=alice, text='early',
+            project=self.project, deadline=now)
+
+        self.assertEqual(self.walk('deadline'),
+            [['early', 'late'], ['none 1', 'none 2']])
+        self.assertEqual(self.walk('deadline', '-', page_size=3),
+            [['none 2', 'none 1', 'late'], ['early']])
+
+    def test_page_size_is_bounded(self):
+        factories.ActionlistItemFactory.create_batch(3, user=alice,
+            project=self.project)
+        items, cursor = paginate_actions(self.actions, page_size=0)
+        self.assertEqual(len(items), 1)
+
+    def test_invalid_cursor_starts_at_first_page(self):
+        factories.ActionlistItemFactory.create_batch(3, user=alice,
+            project=self.project)
+        items, cursor = paginate_actions(self.actions, cursor='garbage')
+        self.assertEqual(len(items), 3)
+
+
+class CursorTests(TestCase):
+    def test_decode_returns_encoded_values(self):
+        cursor = encode_cursor('text', '-', ['abc', 3])
+        self.assertEqual(decode_cursor(cursor, 'text', '-'), ['abc', 3])
+
+    def test_decode_restores_deadline(self):
+        deadline = datetime(2016, 1, 1, tzinfo=timezone.utc)
+        cursor = encode_cursor('deadline', '', [0, deadline, 3])
+        self.assertEqual(decode_cursor(cursor, 'deadline', ''),
+            [0, deadline, 3])
+
+    def test_decode_ignores_cursor_for_other_ordering(self):
+        cursor = encode_cursor('text', '', ['abc', 3])
+        self.assertIsNone(decode_cursor(cursor, 'text', '-'))
+        self.assertIsNone(decode_cursor(cursor, 'complete', ''))
+
+    def test_decode_ignores_malformed_cursor(self):
+        self.assertIsNone(decode_cursor('garbage', '', ''))
+        self.assertIsNone(decode_cursor(encode_cursor('', '', ['x']), '', ''))
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from unittest import mock
+
+from projects import factories, search
+
+User = get_user_model()
+alice = None
+bob = None
+
+def setUpModule():
+    global alice, bob
+    alice = User.objects.create_user('alice', 'alice@test.org', 'alice')
+    bob = User.objects.create_user('bob', 'bob@test.org', 'bob')
+
+def tearDownModule():
+    alice.delete()
+    bob.delete()
+
+class SearchTests(TestCase):
+    def found(self, query, user=None, **kwargs):
+        results, more = search.search(user or alice, query, **kwargs)
+        return [(r.kind, r.object.pk) for r in results]
+
+    def test_uses_full_text_tables(self):
+        self.assertIs(search._matcher(), search._match_sqlite)
+
+    def test_finds_all_kinds_of_objects(self):
+        project = factories.ProjectFactory(user=alice, name='Dinosaur park')
+        described = factories.ProjectFactory(user=alice,
+            description='Feed the dinosaur')
+        action = factories.ActionlistItemFactory(user=alice,
+            text='Buy dinosaur food')
+        item = factories.InlistItemFactory(user=alice, text='dinosaur')
+        factories.InlistItemFactory(user=alice, text='Something else')
+
+        self.assertCountEqual(self.found('dinosaur'), [
+            ('project', project.pk), ('project', described.pk),
+            ('actionlistitem', action.pk), ('inlistitem', item.pk)])
+
+    def test_does_not_find_objects_of_other_users(self):
+        factories.InlistItemFactory(user=bob, text='dinosaur')
+        self.assertEqual(self.found('dinosaur'), [])
+
+    def test_matches_start_of_words(self):
+        item = factories.InlistItemFactory(user=alice, text='Dinosaurs')
+        self.assertEqual(self.found('dino'), [('inlistitem', item.pk)])
+
+    def test_all_words_have_to_match(self):
+        item = factories.InlistItemFactory(user=alice, text='Feed dinosaur')
+        factories.InlistItemFactory(user=alice, text='Feed cat')
+        self.assertEqual(self.found('dinosaur feed'), [('inlistitem', item.pk)])
+
+    def test_finds_changed_text(self):
+        action = factories.ActionlistItemFactory(user=alice, text='Old text')
+        action.text = 'New text'
+        action.save()
+        self.assertEqual(self.found('old'), [])
+        self.assertEqual(self.found('new'), [('actionlistitem', action.pk)])
+
+    def test_does_not_find_deleted_objects(self):
+        item = factories.InlistItemFactory(user=alice, text='dinosaur')
+        item.delete()
+        self.assertEqual(self.found('dinosaur'), [])
+
+    def test_quotes_in_query_are_searched_for(self):
+        item = factories.InlistItemFactory(user=alice, text='say "hi"')
+        self.assertEqual(self.found('"hi"'), [('inlistitem', item.pk)])
+
+    def test_empty_query_finds_nothing(self):
+        factories.InlistItemFactory(user=alice, text='dinosaur')
+        self.assertEqual(self.found('  '), [])
+
+    def test_results_are_paginated(self):
+        factories.InlistItemFactory.create_batch(3, user=alice)
+        first, more = search.search(alice, 'inlist', page_size=2)
+        self.assertEqual((len(first), more), (2, True))
+        second, more = search.search(alice, 'inlist', page=2, page_size=2)
+        self.assertEqual((len(second), more), (1, False))
+        self.assertEqual(set(r.object.pk for r in first) &
+            set(r.object.pk for r in second), set())
+
+    def test_pages_are_limited(self):
+        factories.InlistItemFactory(user=alice, text='dinosaur')
+        self.assertEqual(self.found('dinosaur', page=search.MAX_PAGES + 1),
+            [])
+
+    @mock.patch('projects.search._has_sqlite_tables', return_value=False)
+    def test_falls_back_to_substring_search(self, mock_has_tables):
+        item = factories.InlistItemFactory(user=alice, text='Dinosaurs')
+        factories.InlistItemFactory(user=alice, text='Cats')
+        self.assertEqual(self.found('NOSAUR'), [('inlistitem', item.pk)])
@@ -14,3 +14,23 @@ class ActionlistProjectTests(TestCase):
 
         self.assertEqual(ps.count(), 1)
         self.assertEqual(ps[0].name, models.ACTION_PROJECT_NAME)
+
+    def test_settings_refer_to_action_project(self):
+        user = User.objects.create(username='alice', password='alice')
+        self.assertEqual(user.settings.action_project,
+            models.Project.objects.get(user=user))
+
+class ChangeCounterTests(TestCase):
+    def test_create_change_counter_on_user_creation(self):
+        user = User.objects.create(username='alice', password='alice')
+        self.assertEqual(models.ChangeCounter.objects.filter(user=user)
+            .count(), 1)
+
+    def test_saving_and_deleting_bumps_counter(self):
+        user = User.objects.create(username='alice', password='alice')
+        counter = models.ChangeCounter.objects.filter(user=user)
+
+        before = counter.get().value
+        item = models.InlistItem.objects.create(user=user, text='test')
+        item.delete()
+        self.assertEqual(counter.get().value, before + 2)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from unittest import mock
+
+from jobs.models import Job
+from jobs.queue import run_next_job
+from projects import factories, models, tasks
+
+User = get_user_model()
+alice = None
+
+def setUpModule():
+    global alice
+    alice = User.objects.create_user('alice', 'alice@test.org', 'alice')
+
+def tearDownModule():
+    alice.delete()
+
+class PurgeProjectTests(TestCase):
+    def setUp(self):
+        self.project = factories.ProjectFactory(user=alice)
+        factories.ActionlistItemFactory.create_batch(3, user=alice,
+            project=self.project)
+        models.mark_project_deleted(self.project)
+
+    @mock.patch('projects.models.PURGE_BATCH_SIZE', 2)
+    def test_enqueues_next_batch(self):
+        tasks.purge_project(self.project.pk)
+        self.assertEqual(models.ActionlistItem.objects.filter(
+            project=self.project).count(), 1)
+        self.assertEqual(Job.objects.get().name, tasks.purge_project.task_name)
+
+    @mock.patch('projects.models.PURGE_BATCH_SIZE', 2)
+    def test_worker_purges_whole_project(self):
+        tasks.purge_project(self.project.pk)
+        while run_next_job():
+            pass
+        self.assertFalse(models.Project.all_objects.filter(
+            pk=self.project.pk).exists())
+        self.assertFalse(Job.objects.exists())
+
+    def test_ignores_projects_that_are_not_deleted(self):
+        project = factories.ProjectFactory(user=alice)
+        tasks.purge_project(project.pk)
+        self.assertTrue(models.Project.objects.filter(pk=project.pk).exists())
+        self.assertFalse(Job.objects.exists())
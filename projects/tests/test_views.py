@@ -1,13 +1,22 @@
 # -*- coding: utf-8 -*-
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.core.urlresolvers import resolve, reverse
+from django.db import connection
 from django.http.response import Http404
-from django.test import TestCase
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.utils.html import escape
+from datetime import timedelta
+import json
 from unittest import mock
 
-from projects import factories, forms, models, views
+from jobs.models import Job
+from projects import factories, forms, models, tasks, views
+from projects.cache import DASHBOARD_DEADLINES
 from common.tests import ViewTestMixin
 
 User = get_user_model()
@@ -23,6 +32,25 @@ def tearDownModule():
     alice.delete()
     bob.delete()
 
+def count_object_lookups(table, func, *args, **kwargs):
+    """Count the number of times that func selects from table."""
+    with CaptureQueriesContext(connection) as queries:
+        func(*args, **kwargs)
+    return len([q for q in queries if q['sql'].startswith('SELECT')
+        and 'FROM "{}"'.format(table) in q['sql']])
+
+def post_json_request(test, user, data={}, **kwargs):
+    """Do a POST request like the javascript on the page does."""
+    request = test.factory.post(test.url, data,
+        HTTP_ACCEPT='application/json, text/javascript, */*; q=0.01',
+        HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+    request.user = user
+    request.session = {}
+    response = test.view(request, test.url, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
 class TestMainPage(ViewTestMixin, TestCase):
     explicit_url = '/en/projects/'
     templates = ('base_with_sidebar.html', 'projects/base.html',
@@ -32,6 +60,129 @@ class TestMainPage(ViewTestMixin, TestCase):
         self.url = reverse('projects:main')
         self.view = views.MainPageView.as_view()
 
+    def test_sidebar_shows_renamed_project(self):
+        cache.clear()
+        project = factories.ProjectFactory(user=alice, name='Old name')
+        self.client.login(username='alice', password='alice')
+        self.assertContains(self.client.get(self.explicit_url), 'Old name')
+
+        project.name = 'New name'
+        project.save()
+
+        response = self.client.get(self.explicit_url)
+        self.assertContains(response, 'New name')
+        self.assertNotContains(response, 'Old name')
+
+    def test_splits_overdue_and_upcoming_deadlines(self):
+        cache.clear()
+        now = timezone.now()
+        overdue = factories.ActionlistItemFactory(user=alice,
+            deadline=now - timedelta(days=1))
+        upcoming = factories.ActionlistItemFactory(user=alice,
+            deadline=now + timedelta(days=1))
+        factories.ActionlistItemFactory(user=alice, complete=True,
+            deadline=now)
+        factories.ActionlistItemFactory(user=alice)
+        factories.ActionlistItemFactory(user=bob, deadline=now)
+
+        response = self.get_request(alice)
+
+        self.assertEqual([a.pk for a in response.context_data['overdue']],
+            [overdue.pk])
+        self.assertEqual([a.pk for a in response.context_data['upcoming']],
+            [upcoming.pk])
+
+    def test_many_overdue_deadlines_leave_upcoming_ones_visible(self):
+        cache.clear()
+        now = timezone.now()
+        factories.ActionlistItemFactory.create_batch(
+            DASHBOARD_DEADLINES + 1, user=alice,
+            deadline=now - timedelta(days=1))
+        upcoming = factories.ActionlistItemFactory(user=alice,
+            deadline=now + timedelta(days=1))
+
+        response = self.get_request(alice)
+
+        self.assertEqual(len(response.context_data['overdue']),
+            DASHBOARD_DEADLINES)
+        self.assertEqual([a.pk for a in response.context_data['upcoming']],
+            [upcoming.pk])
+
+    def test_shows_open_action_counts_of_projects(self):
+        cache.clear()
+        project = factories.ProjectFactory(user=alice)
+        factories.ActionlistItemFactory.create_batch(2, user=alice,
+            project=project)
+        factories.ProjectFactory(user=alice)
+
+        response = self.get_request(alice)
+
+        self.assertEqual([(p.pk, p.open_actions)
+            for p in response.context_data['projects']], [(project.pk, 2)])
+
+    def test_dashboard_links_to_projects(self):
+        cache.clear()
+        project = factories.ProjectFactory(user=alice, name='Dinosaurs')
+        factories.ActionlistItemFactory(user=alice, project=project,
+            text='Feed the T-rex', deadline=timezone.now())
+        self.client.login(username='alice', password='alice')
+
+        response = self.client.get(self.explicit_url)
+
+        self.assertContains(response, 'Feed the T-rex')
+        self.assertContains(response, reverse('projects:project',
+            kwargs={'pk': project.pk}))
+
+    def test_dashboard_is_cached(self):
+        cache.clear()
+        factories.ActionlistItemFactory.create_batch(3, user=alice,
+            deadline=timezone.now())
+        self.get_request(alice)
+        with self.assertNumQueries(1):
+            self.get_request(alice)
+
+    def test_dashboard_changes_when_an_action_changes(self):
+        cache.clear()
+        action = factories.ActionlistItemFactory(user=alice,
+            deadline=timezone.now() + timedelta(days=1))
+        self.get_request(alice)
+
+        action.complete = True
+        action.save()
+
+        response = self.get_request(alice)
+        self.assertEqual(response.context_data['upcoming'], [])
+        self.assertEqual(response.context_data['projects'], [])
+
+
+class SearchViewTests(ViewTestMixin, TestCase):
+    templates = ('base_with_sidebar.html', 'projects/base.html',
+        'projects/search.html')
+
+    def setUp(self):
+        self.url = reverse('projects:search')
+        self.explicit_url = '/en/projects/search/?q=dinosaur'
+        self.view = views.SearchView.as_view()
+
+    def test_shows_results(self):
+        project = factories.ProjectFactory(user=alice, name='Dinosaurs')
+        factories.ActionlistItemFactory(user=alice, project=project,
+            text='Feed dinosaur')
+        factories.InlistItemFactory(user=alice, text='Buy dinosaur food')
+        self.client.login(username='alice', password='alice')
+
+        response = self.client.get(self.explicit_url)
+
+        self.assertContains(response, 'search-result', count=3)
+        self.assertContains(response, 'Buy dinosaur food')
+
+    def test_invalid_page_shows_first_page(self):
+        factories.InlistItemFactory(user=alice, text='dinosaur')
+        request = self.factory.get(self.url, {'q': 'dinosaur', 'page': 'x'})
+        request.user = alice
+        response = self.view(request)
+        self.assertEqual(len(response.context_data['results']), 1)
+
 
 class InlistpageTest(ViewTestMixin, TestCase):
     templates = ('base_with_sidebar.html', 'projects/base.html',
@@ -97,6 +248,93 @@ class InlistpageTest(ViewTestMixin, TestCase):
         self.assertEqual(models.InlistItem.objects.count(), 1)
         self.assertContains(response, escape(forms.DUPLICATE_ITEM_ERROR))
 
+    def count_render_queries(self):
+        request = self.factory.get(self.url)
+        request.user = User.objects.get(pk=alice.pk)
+        request.session = {}
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.view(request).render()
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_number_of_items(self):
+        factories.InlistItemFactory(user=alice)
+        queries = self.count_render_queries()
+        factories.InlistItemFactory.create_batch(10, user=alice)
+        self.assertEqual(queries, self.count_render_queries())
+
+    def test_items_link_to_their_own_pages(self):
+        item = factories.InlistItemFactory(user=alice)
+        response = self.get_request(alice)
+        self.assertContains(response,
+            reverse('projects:delete_inlist', args=[item.pk]))
+        self.assertContains(response,
+            reverse('projects:convert_inlist_action', args=[item.pk]))
+        self.assertContains(response,
+            reverse('projects:convert_inlist_project', args=[item.pk]))
+
+
+class InlistBulkViewTests(ViewTestMixin, TestCase):
+    templates = ('base_with_sidebar.html', 'projects/base.html',
+        'projects/inlist_bulk.html')
+
+    def setUp(self):
+        self.url = reverse('projects:inlist_bulk')
+        self.explicit_url = '/en/projects/inlist/bulk/'
+        self.view = views.InlistBulkView.as_view()
+
+    def json_request(self, user, body):
+        request = self.factory.post(self.url, body,
+            content_type='application/json')
+        request.user = user
+        request.session = {}
+        return self.view(request)
+
+    def test_uses_bulk_inlist_form(self):
+        response = self.get_request(alice)
+        self.assertIsInstance(response.context_data['form'],
+            forms.BulkInlistForm)
+
+    def test_POST_saves_every_line_to_the_users_inlist(self):
+        self.post_request(alice, {'text': 'one\ntwo\nthree'})
+        self.assertEqual(
+            sorted(models.InlistItem.objects.filter(user=alice) \
+                .values_list('text', flat=True)),
+            ['one', 'three', 'two'])
+
+    def test_POST_redirects_to_inlist_page(self):
+        response = self.post_request(alice, {'text': 'one\ntwo'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse('projects:inlist'))
+
+    def test_empty_input_shows_error_on_page(self):
+        response = self.post_request(alice, {'text': ''})
+        self.assertContains(response, forms.EMPTY_TEXT_ERROR)
+
+    def test_JSON_request_creates_items(self):
+        factories.InlistItemFactory(text='two', user=alice)
+        response = self.json_request(alice,
+            json.dumps({'items': ['one', 'two', 'three']}))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.content.decode()),
+            {'created': ['one', 'three'], 'skipped': ['two']})
+        self.assertEqual(models.InlistItem.objects.count(), 3)
+
+    def test_JSON_request_with_invalid_items_returns_errors(self):
+        response = self.json_request(alice, json.dumps({'items': []}))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', json.loads(response.content.decode())['errors'])
+
+    def test_malformed_JSON_request_returns_bad_request(self):
+        for body in ('not json', '[]', '{"items": [1, 2]}',
+                '{"items": "buy milk"}', '{"items": ["one\\ntwo"]}',
+                '{"items": {"one": "two"}}'):
+            with self.subTest(body=body):
+                response = self.json_request(alice, body)
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(models.InlistItem.objects.count(), 0)
+
 
 class InlistItemDeleteViewTests(ViewTestMixin, TestCase):
     templates = ('base_with_sidebar.html', 'projects/base.html',
@@ -126,6 +364,10 @@ class InlistItemDeleteViewTests(ViewTestMixin, TestCase):
         with self.assertRaises(Http404):
             self.post_request(bob, pk=self.item.pk)
 
+    def test_item_is_fetched_once(self):
+        self.assertEqual(count_object_lookups('projects_inlistitem',
+            self.post_request, alice, pk=self.item.pk), 1)
+
 
 class ActionlistItemDeleteViewTests(ViewTestMixin, TestCase):
     templates = ('base_with_sidebar.html', 'projects/base.html',
@@ -169,6 +411,21 @@ class ActionlistItemDeleteViewTests(ViewTestMixin, TestCase):
         with self.assertRaises(Http404):
             self.post_request(bob, pk=self.item.pk)
 
+    def test_item_is_fetched_once(self):
+        self.assertEqual(count_object_lookups('projects_actionlistitem',
+            self.post_request, alice, pk=self.item.pk), 1)
+
+    def test_json_POST_answers_with_deleted_pk(self):
+        response = post_json_request(self, alice, pk=self.item.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode()),
+            {'pk': self.item.pk})
+        self.assertEqual(models.ActionlistItem.objects.count(), 0)
+
+    def test_json_POST_from_different_user_shows_404(self):
+        with self.assertRaises(Http404):
+            post_json_request(self, bob, pk=self.item.pk)
+
 
 class ActionCompleteViewTest(ViewTestMixin, TestCase):
     templates = ('base_with_sidebar.html', 'projects/base.html',
@@ -218,6 +475,90 @@ class ActionCompleteViewTest(ViewTestMixin, TestCase):
         self.assertEqual(response.url,
             reverse('projects:project', kwargs={'pk': project.pk}))
 
+    def test_json_POST_answers_with_new_state(self):
+        response = post_json_request(self, alice, pk=self.item.pk)
+        self.assertEqual(json.loads(response.content.decode()),
+            {'pk': self.item.pk, 'complete': True})
+
+    def test_json_POST_from_other_user_is_forbidden(self):
+        response = post_json_request(self, bob, pk=self.item.pk)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(models.ActionlistItem.objects.get(
+            pk=self.item.pk).complete)
+
+    def test_missing_action_shows_404(self):
+        with self.assertRaises(Http404):
+            self.post_request(alice, pk=self.item.pk + 1)
+
+
+class BulkActionViewTests(ViewTestMixin, TestCase):
+    def setUp(self):
+        self.project = factories.ProjectFactory(user=alice)
+        self.actions = factories.ActionlistItemFactory.create_batch(2,
+            user=alice, project=self.project)
+        self.url = reverse('projects:bulk_actions',
+            kwargs={'pk': self.project.pk})
+        self.view = views.BulkActionView.as_view()
+
+    def test_view_uses_correct_templates(self):
+        pass # Only accepts POST requests
+
+    def test_GET_request_is_not_allowed(self):
+        response = self.get_request(alice, pk=self.project.pk)
+        self.assertEqual(response.status_code, 405)
+
+    def test_redirects_to_project_after_POST(self):
+        response = self.post_request(alice, {'operation': 'complete',
+            'actions': [a.pk for a in self.actions]}, pk=self.project.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse('projects:project',
+            kwargs={'pk': self.project.pk}))
+        self.assertEqual(self.project.action_list.filter(complete=True)
+            .count(), 2)
+
+    def test_other_user_gets_404(self):
+        with self.assertRaises(Http404):
+            self.post_request(bob, {'operation': 'delete',
+                'actions': [a.pk for a in self.actions]}, pk=self.project.pk)
+        self.assertEqual(self.project.action_list.count(), 2)
+
+    def test_shows_errors(self):
+        response = self.post_request(alice, {'operation': 'delete'},
+            pk=self.project.pk)
+        self.assertContains(response, forms.NO_ACTIONS_SELECTED_ERROR)
+
+
+class InlistConvertViewTests(ViewTestMixin, TestCase):
+    def setUp(self):
+        self.items = factories.InlistItemFactory.create_batch(2, user=alice)
+        self.url = reverse('projects:bulk_convert_inlist')
+        self.view = views.InlistConvertView.as_view()
+
+    def test_view_uses_correct_templates(self):
+        pass # Only accepts POST requests
+
+    def test_GET_request_is_not_allowed(self):
+        response = self.get_request(alice)
+        self.assertEqual(response.status_code, 405)
+
+    def test_redirects_to_inlist_after_POST(self):
+        response = self.post_request(alice,
+            {'items': [i.pk for i in self.items]})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse('projects:inlist'))
+        self.assertEqual(models.InlistItem.objects.count(), 0)
+        self.assertEqual(models.ActionlistItem.objects.count(), 2)
+
+    def test_shows_errors(self):
+        response = self.post_request(alice)
+        self.assertContains(response, forms.NO_ITEMS_SELECTED_ERROR)
+
+    def test_inlist_has_checkboxes_for_form(self):
+        self.client.login(username='alice', password='alice')
+        response = self.client.get(reverse('projects:inlist'))
+        self.assertContains(response, 'form="bulk-convert"', count=2)
+        self.assertContains(response, 'id="bulk-convert"')
+
 
 class ConvertInlistItemToActionItemTest(ViewTestMixin, TestCase):
     templates = ('base_with_sidebar.html', 'projects/base.html',
@@ -282,6 +623,10 @@ class ConvertInlistItemToActionItemTest(ViewTestMixin, TestCase):
         with self.assertRaises(Http404):
             self.post_request(bob, pk=self.item.pk)
 
+    def test_item_is_fetched_once(self):
+        self.assertEqual(count_object_lookups('projects_inlistitem',
+            self.get_request, alice, pk=self.item.pk), 1)
+
 
 class ProjectViewTests(ViewTestMixin, TestCase):
     templates = ('base_with_sidebar.html', 'projects/base.html',
@@ -327,6 +672,23 @@ class ProjectViewTests(ViewTestMixin, TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, self.url)
 
+    def test_json_POST_answers_with_new_row(self):
+        response = post_json_request(self, alice, {'text': 'misquito'},
+            pk=self.project.pk)
+        self.assertEqual(response.status_code, 201)
+        data = json.loads(response.content.decode())
+        item = models.ActionlistItem.objects.get()
+        self.assertEqual(data['pk'], item.pk)
+        self.assertIn('misquito', data['html'])
+        self.assertIn(reverse('projects:complete_action',
+            kwargs={'pk': item.pk}), data['html'])
+
+    def test_json_POST_answers_with_errors(self):
+        response = post_json_request(self, alice, {'text': ''},
+            pk=self.project.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', json.loads(response.content.decode())['errors'])
+
     def test_empty_input_saves_nothing_to_db(self):
         response = self.post_request(alice, {'text': ''}, pk=self.project.pk)
         self.assertEqual(models.ActionlistItem.objects.count(), 0)
@@ -349,6 +711,12 @@ class ProjectViewTests(ViewTestMixin, TestCase):
             pk=self.project.pk)
         self.assertContains(response, forms.DUPLICATE_ACTION_ERROR)
 
+    def test_adding_action_does_not_look_for_duplicates_first(self):
+        self.assertEqual(count_object_lookups('projects_actionlistitem',
+            self.post_request, alice, {'text': 'new'}, pk=self.project.pk),
+            0)
+        self.assertEqual(self.project.action_list.count(), 1)
+
     def test_contains_all_actions_in_context_actionlist(self):
         nc = factories.ActionlistItemFactory.create_batch(2, user=alice,
             complete=False, project=self.project)
@@ -381,11 +749,20 @@ class ProjectViewTests(ViewTestMixin, TestCase):
         with self.assertRaises(Http404):
             response = self.post_request(bob, pk=self.project.pk)
 
+    def test_project_is_fetched_once(self):
+        self.assertEqual(count_object_lookups('projects_project',
+            self.get_request, alice, pk=self.project.pk), 1)
+
     def test_has_actionlist_sort_form(self):
         response = self.get_request(alice, pk=self.project.pk)
         self.assertIsInstance(response.context_data['sort_form'],
             forms.ActionlistSortForm)
 
+    def test_has_bulk_action_form(self):
+        response = self.get_request(alice, pk=self.project.pk)
+        self.assertIsInstance(response.context_data['bulk_form'],
+            forms.BulkActionForm)
+
     def test_includes_action_list_in_context(self):
         actions = factories.ActionlistItemFactory.create_batch(3, user=alice,
             project=self.project)
@@ -398,8 +775,9 @@ class ProjectViewTests(ViewTestMixin, TestCase):
         factories.ActionlistItemFactory(text='Item B', user=alice,
             project=self.project)
 
-        response = self.get_request(alice, session={'sort_method': 'text',
-            'sort_order': ''}, pk=self.project.pk)
+        models.set_action_sort(self.project, 'text', '')
+
+        response = self.get_request(alice, pk=self.project.pk)
 
         self.assertSequenceEqual(['Item A', 'Item B'],
             [a.text for a in response.context_data['actions']])
@@ -410,33 +788,45 @@ class ProjectViewTests(ViewTestMixin, TestCase):
         factories.ActionlistItemFactory(text='Item B', user=alice,
             project=self.project)
 
-        response = self.get_request(alice, session={'sort_method': 'text',
-            'sort_order': '-'}, pk=self.project.pk)
+        models.set_action_sort(self.project, 'text', '-')
+
+        response = self.get_request(alice, pk=self.project.pk)
 
         self.assertSequenceEqual(['Item B', 'Item A'],
             [a.text for a in response.context_data['actions']])
 
     def test_when_sorting_default_descending_no_errors_should_occur(self):
         """There used to be a FieldError when no fiel was sorted descending"""
-        response = self.get_request(alice, session={'sort_method': '',
-            'sort_order': '-'}, pk=self.project.pk)
+        models.set_action_sort(self.project, '', '-')
+        response = self.get_request(alice, pk=self.project.pk)
 
-    def test_sets_sort_session_data_to_empty_when_not_present(self):
+    def test_does_not_use_session(self):
         session = {}
         response = self.get_request(alice, session=session,
             pk=self.project.pk)
-        self.assertEqual(session['sort_method'], '')
-        self.assertEqual(session['sort_order'], '')
+        self.assertEqual(session, {})
+
+    def test_sorting_is_fetched_with_project(self):
+        models.set_action_sort(self.project, 'text', '')
+        self.assertEqual(count_object_lookups('projects_actionlistsort',
+            self.get_request, alice, pk=self.project.pk), 0)
+
+    def test_sorting_is_per_project(self):
+        other = factories.ProjectFactory(user=alice)
+        models.set_action_sort(other, 'text', '-')
+        response = self.get_request(alice, pk=self.project.pk)
+        self.assertEqual(response.context_data['sort_form'].initial
+            ['sort_method'], '')
 
     def test_select_input_shows_sort_method_that_is_currently_active(self):
-        response = self.get_request(alice, pk=self.project.pk,
-            session={'sort_method': 'text', 'sort_order': ''})
+        models.set_action_sort(self.project, 'text', '')
+        response = self.get_request(alice, pk=self.project.pk)
         self.assertEqual('text',
             response.context_data['sort_form'].initial['sort_method'])
 
     def test_select_input_shows_sort_order_that_is_currently_active(self):
-        response = self.get_request(alice, pk=self.project.pk,
-            session={'sort_method': 'text', 'sort_order': '-'})
+        models.set_action_sort(self.project, 'text', '-')
+        response = self.get_request(alice, pk=self.project.pk)
         self.assertEqual('-',
             response.context_data['sort_form'].initial['sort_order'])
 
@@ -448,19 +838,81 @@ class ProjectViewTests(ViewTestMixin, TestCase):
         factories.ActionlistItemFactory(text='iTeM 3', user=alice,
             project=self.project)
 
-        response = self.get_request(alice, pk=self.project.pk,
-            session={'sort_method': 'text', 'sort_order': ''})
+        models.set_action_sort(self.project, 'text', '')
+
+        response = self.get_request(alice, pk=self.project.pk)
         self.assertEqual(['item 1', 'ITEM 2', 'iTeM 3'],
             [a.text for a in response.context_data['actions']])
 
-    @mock.patch('projects.views.Lower')
+    @mock.patch('projects.pagination.Lower')
     def test_case_insensitivity_is_not_applied_for_non_character_fields(self,
             mock_Lower):
         mock_Lower.return_value = 'deadline'
-        response = self.get_request(alice, pk=self.project.pk,
-            session={'sort_method': 'deadline', 'sort_order': ''})
+        models.set_action_sort(self.project, 'deadline', '')
+        response = self.get_request(alice, pk=self.project.pk)
         self.assertEqual(mock_Lower.call_count, 0)
 
+    @mock.patch('projects.pagination.DEFAULT_PAGE_SIZE', 2)
+    def test_only_shows_first_page_of_actions(self):
+        actions = factories.ActionlistItemFactory.create_batch(3, user=alice,
+            project=self.project)
+        response = self.get_request(alice, pk=self.project.pk)
+        self.assertSequenceEqual(response.context_data['actions'],
+            actions[:2])
+        self.assertIsNotNone(response.context_data['next_cursor'])
+
+    @mock.patch('projects.pagination.DEFAULT_PAGE_SIZE', 2)
+    def test_shows_next_page_after_cursor(self):
+        actions = factories.ActionlistItemFactory.create_batch(3, user=alice,
+            project=self.project)
+        response = self.get_request(alice, pk=self.project.pk)
+
+        request = self.factory.get(self.url,
+            {'after': response.context_data['next_cursor']})
+        request.user = alice
+        response = self.view(request, pk=self.project.pk)
+
+        self.assertSequenceEqual(response.context_data['actions'],
+            actions[2:])
+        self.assertIsNone(response.context_data['next_cursor'])
+
+    def count_render_queries(self):
+        request = self.factory.get(self.url)
+        request.user = User.objects.get(pk=alice.pk)
+        request.session = {}
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.view(request, pk=self.project.pk).render()
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_number_of_actions(self):
+        factories.ActionlistItemFactory(user=alice, project=self.project)
+        queries = self.count_render_queries()
+        factories.ActionlistItemFactory.create_batch(10, user=alice,
+            project=self.project)
+        self.assertEqual(queries, self.count_render_queries())
+
+    def test_actions_link_to_their_own_pages(self):
+        item = factories.ActionlistItemFactory(user=alice,
+            project=self.project)
+        response = self.get_request(alice, pk=self.project.pk)
+        self.assertContains(response,
+            reverse('projects:complete_action', args=[item.pk]))
+        self.assertContains(response,
+            reverse('projects:delete_actionlist', args=[item.pk]))
+        self.assertContains(response,
+            reverse('projects:edit_action', args=[item.pk]))
+
+    def test_ajax_request_only_renders_action_rows(self):
+        factories.ActionlistItemFactory(user=alice, project=self.project)
+        request = self.factory.get(self.url,
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        request.user = alice
+        request.session = {}
+        response = self.view(request, pk=self.project.pk)
+        self.assertEqual(response.template_name,
+            ['projects/actionlist_rows.html'])
+
 
 class CreateProjectViewTests(ViewTestMixin, TestCase):
     templates = ('base_with_sidebar.html', 'projects/base.html',
@@ -520,6 +972,25 @@ class CreateProjectViewTests(ViewTestMixin, TestCase):
             inlistitem=item.pk)
         self.assertEqual(models.InlistItem.objects.count(), 0)
 
+    def test_keeps_inlist_item_when_project_is_duplicate(self):
+        item = factories.InlistItemFactory(user=alice)
+        factories.ProjectFactory(user=alice, name=item.text)
+        self.post_request(alice, {'name': item.text}, inlistitem=item.pk)
+        self.assertEqual(models.InlistItem.objects.count(), 1)
+
+    def test_inlist_item_of_other_user_gives_404(self):
+        item = factories.InlistItemFactory(user=bob)
+        with self.assertRaises(Http404):
+            self.get_request(alice, inlistitem=item.pk)
+        with self.assertRaises(Http404):
+            self.post_request(alice, {'name': 'test'}, inlistitem=item.pk)
+        self.assertEqual(models.InlistItem.objects.count(), 1)
+
+    def test_inlist_item_is_fetched_once(self):
+        item = factories.InlistItemFactory(user=alice)
+        self.assertEqual(count_object_lookups('projects_inlistitem',
+            self.post_request, alice, {'name': ''}, inlistitem=item.pk), 1)
+
 
 class EditProjectViewTests(ViewTestMixin, TestCase):
     templates = ('base_with_sidebar.html', 'projects/base.html',
@@ -612,6 +1083,10 @@ class EditProjectViewTests(ViewTestMixin, TestCase):
 
         mock_permission_denied.assert_called_once_with(request, None)
 
+    def test_project_is_fetched_once(self):
+        self.assertEqual(count_object_lookups('projects_project',
+            self.get_request, alice, pk=self.project.pk), 1)
+
 
 class DeleteProjectViewTests(ViewTestMixin, TestCase):
     templates = ('base_with_sidebar.html', 'projects/base.html',
@@ -657,6 +1132,41 @@ class DeleteProjectViewTests(ViewTestMixin, TestCase):
             pk=models.get_user_action_project(alice).pk)
         mock_permission_denied.assert_called_once_with(request, None)
 
+    def test_project_is_fetched_once(self):
+        self.assertEqual(count_object_lookups('projects_project',
+            self.get_request, alice, pk=self.project.pk), 1)
+
+    def test_POST_hides_project_and_keeps_its_actions(self):
+        factories.ActionlistItemFactory(user=alice, project=self.project)
+        response = self.post_request(alice, pk=self.project.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(models.Project.objects.filter(
+            pk=self.project.pk).exists())
+        self.assertEqual(models.ActionlistItem.objects.filter(
+            project=self.project).count(), 1)
+
+    def test_POST_enqueues_purge(self):
+        self.post_request(alice, pk=self.project.pk)
+        job = Job.objects.get()
+        self.assertEqual(job.name, tasks.purge_project.task_name)
+        self.assertEqual(json.loads(job.arguments),
+            {'project_id': self.project.pk})
+
+    def test_deleted_project_is_not_found(self):
+        models.mark_project_deleted(self.project)
+        with self.assertRaises(Http404):
+            self.get_request(alice, pk=self.project.pk)
+
+    def test_main_page_shows_progress(self):
+        factories.ActionlistItemFactory.create_batch(2, user=alice,
+            project=self.project)
+        name = self.project.name
+        models.mark_project_deleted(self.project)
+        self.client.force_login(alice)
+        response = self.client.get('/en/projects/')
+        self.assertContains(response, '2 actions left')
+        self.assertContains(response, name)
+
 
 class EditActionViewTests(ViewTestMixin, TestCase):
     templates = ('base_with_sidebar.html', 'projects/base.html',
@@ -733,6 +1243,42 @@ class EditActionViewTests(ViewTestMixin, TestCase):
         self.assertContains(response, forms.DUPLICATE_MOVE_ERROR)
 
 
+class ProjectAutocompleteViewTests(TestCase):
+    url = '/en/projects/project/autocomplete/'
+
+    def setUp(self):
+        self.client.login(username='alice', password='alice')
+
+    def names(self, query):
+        response = self.client.get(self.url, {'q': query})
+        return [p['name'] for p in json.loads(response.content.decode())[
+            'results']]
+
+    def test_url_resolves_to_view(self):
+        self.assertEqual(reverse('projects:project_autocomplete'), self.url)
+
+    def test_lists_own_projects_starting_with_query(self):
+        dinosaurs = factories.ProjectFactory(user=alice, name='Dinosaurs')
+        factories.ProjectFactory(user=alice, name='Feed the dinos')
+        factories.ProjectFactory(user=bob, name='Dinner')
+
+        response = self.client.get(self.url, {'q': 'di'})
+
+        self.assertEqual(json.loads(response.content.decode()),
+            {'results': [{'id': dinosaurs.pk, 'name': 'Dinosaurs'}]})
+
+    def test_results_are_sorted_and_limited(self):
+        for i in reversed(range(views.AUTOCOMPLETE_LIMIT + 1)):
+            factories.ProjectFactory(user=alice, name='Project {:02}'.format(i))
+        self.assertEqual(self.names('proj'), ['Project {:02}'.format(i)
+            for i in range(views.AUTOCOMPLETE_LIMIT)])
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+
 class ActionlistSortViewTests(ViewTestMixin, TestCase):
     def setUp(self):
         self.project = factories.ProjectFactory(user=alice)
@@ -761,19 +1307,66 @@ class ActionlistSortViewTests(ViewTestMixin, TestCase):
         self.view(request, self.url)
         mock_permission_denied.assert_called_once_with(request, None)
 
-    def test_POST_request_updates_user_session(self):
-        project = factories.ProjectFactory(user=alice)
-        request = self.factory.post(self.url,
-            data={'return_model': project.pk, 'sort_method': 'text',
-            'sort_order': ''})
-        request.user = alice
-        request.session = {}
-
-        response = self.view(request, self.url)
+    def test_POST_request_stores_sorting_with_project(self):
+        session = {}
+        self.post_request(alice, {'return_model': self.project.pk,
+            'sort_method': 'text', 'sort_order': '-'}, session=session)
+        self.assertEqual(session, {})
+        self.assertEqual(models.get_action_sort(models.Project.objects.get(
+            pk=self.project.pk)), ('text', '-'))
+
+    def test_resetting_sorting_removes_stored_sorting(self):
+        models.set_action_sort(self.project, 'text', '-')
+        self.post_request(alice, {'return_model': self.project.pk,
+            'sort_method': '', 'sort_order': ''})
+        self.assertFalse(models.ActionlistSort.objects.exists())
+
+    def test_other_users_project_is_not_sorted(self):
+        project = factories.ProjectFactory(user=bob)
+        self.post_request(alice, {'return_model': project.pk,
+            'sort_method': 'text', 'sort_order': ''})
+        self.assertFalse(models.ActionlistSort.objects.exists())
 
-        self.assertIn('sort_method', request.session.keys())
-        self.assertIn('sort_order', request.session.keys())
+    def test_json_POST_returns_sorting(self):
+        response = post_json_request(self, alice, {'sort_method': 'text',
+            'return_model': self.project.pk, 'sort_order': ''})
+        self.assertEqual(json.loads(response.content.decode()),
+            {'sort_method': 'text', 'sort_order': ''})
 
     def test_GET_request_shows_permission_denied(self):
         response = self.get_request(alice)
         self.assertEqual(response.status_code, 405)
+
+
+class SessionTests(TestCase):
+    engines = ('db', 'cached_db', 'signed_cookies')
+
+    def setUp(self):
+        self.project = factories.ProjectFactory(user=alice)
+        action = factories.ActionlistItemFactory(user=alice)
+        self.urls = ['/en/projects/', '/en/projects/inlist/',
+            '/en/projects/project/{}/'.format(self.project.pk),
+            '/en/projects/search/?q=dino',
+            '/en/projects/actions/{}/edit/'.format(action.pk),
+            '/api/v1/projects/']
+
+    def test_read_only_pages_do_not_write_the_session(self):
+        self.client.force_login(alice)
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.wsgi_request.session.modified)
+                self.assertNotIn(settings.SESSION_COOKIE_NAME,
+                    response.cookies)
+
+    def test_pages_work_with_each_session_engine(self):
+        for engine in self.engines:
+            with self.subTest(engine=engine), override_settings(
+                    SESSION_ENGINE='django.contrib.sessions.backends.'
+                        + engine):
+                # The session middleware keeps the engine it was loaded with
+                client = Client()
+                client.force_login(alice)
+                for url in self.urls:
+                    self.assertEqual(client.get(url).status_code, 200)
@@ -4,8 +4,13 @@ from projects import views
 
 urlpatterns = [
     url(r'^$', views.MainPageView.as_view(), name='main'),
+    url(r'^search/$', views.SearchView.as_view(), name='search'),
     # Inlist
     url(r'^inlist/$', views.InlistView.as_view(), name='inlist'),
+    url(r'^inlist/bulk/$', views.InlistBulkView.as_view(),
+        name='inlist_bulk'),
+    url(r'^inlist/convert/actions/$', views.InlistConvertView.as_view(),
+        name='bulk_convert_inlist'),
     url(r'^inlist/(?P<pk>[0-9]+)/delete/$', views.InlistItemDelete.as_view(),
         name='delete_inlist'),
     url(r'^inlist/(?P<pk>[0-9]+)/convert/action/$',
@@ -24,12 +29,16 @@ urlpatterns = [
     # Projects
     url(r'^project/(?P<pk>[0-9]+)/$', views.ProjectView.as_view(),
         name='project'),
+    url(r'^project/(?P<pk>[0-9]+)/actions/bulk/$',
+        views.BulkActionView.as_view(), name='bulk_actions'),
     url(r'^project/create/$', views.CreateProjectView.as_view(),
         name='create_project'),
     url(r'project/(?P<pk>[0-9]+)/edit/$', views.EditProjectView.as_view(),
         name='edit_project'),
     url(r'project/(?P<pk>[0-9]+)/delete/$', views.DeleteProjectView.as_view(),
         name='delete'),
+    url(r'^project/autocomplete/$', views.ProjectAutocompleteView.as_view(),
+        name='project_autocomplete'),
 
     url(r'sort/actions/$', views.ActionlistSortView.as_view(),
         name='sort_actions'),
@@ -1,21 +1,136 @@
 # -*- coding: utf-8 -*-
 from braces.views import LoginRequiredMixin
-from django.contrib.auth.models import AnonymousUser
 from django.core.urlresolvers import reverse_lazy, reverse
-from django.db.models import CharField
-from django.db.models.functions import Lower
-from django.http import Http404
+from django.db import transaction
+from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils import timezone
 from django.views.generic import (TemplateView, FormView, DeleteView,
-    UpdateView, DetailView)
+    UpdateView, DetailView, View)
+from django.views.generic.detail import SingleObjectMixin
 from django.views.generic.edit import FormMixin
 from django.views.defaults import permission_denied
 
-from projects import forms, models
+import json
+
+from jobs.queue import enqueue
+from projects import forms, models, pagination, search, tasks
+from projects.cache import get_dashboard
+
+INVALID_JSON_ERROR = 'Expected a JSON object with a list of items'
+AUTOCOMPLETE_LIMIT = 10
+ACTION_ROW_URLS = {
+    'complete_url': 'projects:complete_action',
+    'delete_url': 'projects:delete_actionlist',
+    'edit_url': 'projects:edit_action',
+}
+
+def _add_row_urls(items, **urls):
+    """Set an url attribute on every item for each of the given url names.
+
+    Each url is only reversed once, the urls for the individual items are
+    created by filling in their pk.
+    """
+    patterns = {attr: reverse(name, args=[0]).replace('/0/', '/{pk}/')
+        for attr, name in urls.items()}
+    for item in items:
+        for attr, pattern in patterns.items():
+            setattr(item, attr, pattern.format(pk=item.pk))
+    return items
+
+def _wants_json(request):
+    return request.META.get('CONTENT_TYPE', '').startswith('application/json')
+
+def _accepts_json(request):
+    return 'application/json' in request.META.get('HTTP_ACCEPT', '')
+
+def _is_line(value):
+    """Whether value is a string without line breaks."""
+    return isinstance(value, str) and value.splitlines() in ([], [value])
+
+def _json_errors(form, status=400):
+    return JsonResponse({'errors': json.loads(form.errors.as_json())},
+        status=status)
+
+
+class OwnedObjectMixin(SingleObjectMixin):
+    """Only give the user that owns the object access to it.
+
+    The object is fetched once in dispatch(), filtered on the requesting
+    user so that other users get a 404. Later calls to get_object() return
+    that same object. Needs to come after LoginRequiredMixin.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super(OwnedObjectMixin, self).dispatch(request, *args,
+            **kwargs)
+
+    def get_object(self, queryset=None):
+        try:
+            return self._owned_object
+        except AttributeError:
+            if queryset is None:
+                queryset = self.get_queryset()
+            self._owned_object = get_object_or_404(queryset,
+                pk=self.kwargs['pk'], user=self.request.user)
+            return self._owned_object
+
+
+class UniqueConstraintViewMixin(object):
+    """Show the form again when saving it violates a unique constraint.
+
+    For model forms using forms.UniqueConstraintMixin, which add the error
+    while saving.
+    """
+    def form_valid(self, form):
+        if form.save() is None:
+            return self.form_invalid(form)
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class ProtectedProjectMixin(object):
+    """Deny changes to the user's action project.
+
+    Needs to come after OwnedObjectMixin.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        if self.object.name == models.ACTION_PROJECT_NAME:
+            return permission_denied(request, None)
+        return super(ProtectedProjectMixin, self).dispatch(request, *args,
+            **kwargs)
+
 
 class MainPageView(LoginRequiredMixin, TemplateView):
     template_name = 'projects/mainpage.html'
 
+    def get_context_data(self, **kwargs):
+        context = super(MainPageView, self).get_context_data(**kwargs)
+        overdue, upcoming, context['projects'] = get_dashboard(
+            self.request.user)
+        now = timezone.now()
+        context['overdue'] = overdue + [d for d in upcoming
+            if d.deadline < now]
+        context['upcoming'] = [d for d in upcoming if d.deadline >= now]
+        context['deleting'] = models.Project.all_objects.filter(
+            user=self.request.user, deleting=True)
+        return context
+
+
+class SearchView(LoginRequiredMixin, TemplateView):
+    template_name = 'projects/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super(SearchView, self).get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        try:
+            context['page'] = int(self.request.GET.get('page', 1))
+        except ValueError:
+            context['page'] = 1
+        context['results'], context['more'] = search.search(
+            self.request.user, context['query'], context['page'])
+        return context
+
 
 class InlistView(LoginRequiredMixin, FormView):
     template_name = 'projects/inlist.html'
@@ -26,89 +141,170 @@ class InlistView(LoginRequiredMixin, FormView):
 
     def get_context_data(self, **kwargs):
         context = super(InlistView, self).get_context_data(**kwargs)
-        context['inlist_items'] = models.InlistItem.objects.filter(
-            user=self.request.user)
+        context['inlist_items'] = _add_row_urls(
+            models.InlistItem.objects.filter(user=self.request.user),
+            delete_url='projects:delete_inlist',
+            convert_action_url='projects:convert_inlist_action',
+            convert_project_url='projects:convert_inlist_project')
+        context['delete_confirm'] = \
+            self.request.user.settings.inlist_delete_confirm
+        context['bulk_form'] = forms.BulkConvertInlistForm(self.request.user)
         return context
 
     def form_valid(self, form):
         form.instance.user = self.request.user
-        form.validate_unique()
-        if form.is_valid():
-            form.save(self.request.user)
-        else:
+        if form.save() is None:
             return super(InlistView, self).form_invalid(form)
         return super(InlistView, self).form_valid(form)
 
 
-class InlistItemDelete(LoginRequiredMixin, DeleteView):
-    model = models.InlistItem
+class InlistBulkView(LoginRequiredMixin, FormView):
+    """Add many items to the inlist at once.
+
+    Besides the form this also accepts JSON in the form of
+    {"items": ["text", ...]} and answers with the created and skipped
+    items.
+    """
+    template_name = 'projects/inlist_bulk.html'
+    form_class = forms.BulkInlistForm
     success_url = reverse_lazy('projects:inlist')
 
-    def dispatch(self, request, *args, **kwargs):
-        item = get_object_or_404(models.InlistItem, pk=self.kwargs['pk'])
-        # Need to check against AnonymousUser to not break LoginRequiredMixin
-        if request.user != item.user and request.user != AnonymousUser():
-            raise Http404()
-        return super(InlistItemDelete, self).dispatch(request, *args, **kwargs)
+    def post(self, request, *args, **kwargs):
+        if not _wants_json(request):
+            return super(InlistBulkView, self).post(request, *args, **kwargs)
+
+        try:
+            items = json.loads(request.body.decode())['items']
+            # Every item has to end up as exactly one line of the text
+            if not isinstance(items, list) or not all(map(_is_line, items)):
+                raise ValueError(items)
+            form = self.get_form_class()(data={'text': '\n'.join(items)})
+        except (KeyError, TypeError, ValueError):
+            return JsonResponse({'errors': {'items': [
+                {'message': INVALID_JSON_ERROR, 'code': 'invalid'}]}},
+                status=400)
+
+        if form.is_valid():
+            created, skipped = form.save(request.user)
+            if form.is_valid():
+                return JsonResponse({'created': [i.text for i in created],
+                    'skipped': skipped}, status=201)
+        return _json_errors(form)
+
+    def form_valid(self, form):
+        form.save(self.request.user)
+        if form.is_valid():
+            return super(InlistBulkView, self).form_valid(form)
+        return super(InlistBulkView, self).form_invalid(form)
+
+
+class InlistConvertView(LoginRequiredMixin, FormView):
+    """Convert the selected inlist items to actions."""
+    form_class = forms.BulkConvertInlistForm
+    template_name = 'projects/actionlistitem_errorform.html'
+    http_method_names = ['post']
+    success_url = reverse_lazy('projects:inlist')
+
+    def get_form_kwargs(self):
+        kwargs = super(InlistConvertView, self).get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        form.save()
+        if form.is_valid():
+            return super(InlistConvertView, self).form_valid(form)
+        else:
+            return super(InlistConvertView, self).form_invalid(form)
+
 
+class InlistItemDelete(LoginRequiredMixin, OwnedObjectMixin, DeleteView):
+    model = models.InlistItem
+    success_url = reverse_lazy('projects:inlist')
 
-class ActionlistItemDelete(LoginRequiredMixin, DeleteView):
+
+class ActionlistItemDelete(LoginRequiredMixin, OwnedObjectMixin, DeleteView):
     model = models.ActionlistItem
 
     def get_success_url(self):
         return reverse('projects:project',
-            kwargs={'pk': self.object.project.pk})
+            kwargs={'pk': self.object.project_id})
 
-    def dispatch(self, request, *args, **kwargs):
-        item = get_object_or_404(models.ActionlistItem, pk=self.kwargs['pk'])
-        # Need to check against AnonymousUser to not break LoginRequiredMixin
-        if request.user != item.user and request.user != AnonymousUser():
-            raise Http404()
-        return super(ActionlistItemDelete, self).dispatch(request, *args, **kwargs)
+    def delete(self, request, *args, **kwargs):
+        if not _accepts_json(request):
+            return super(ActionlistItemDelete, self).delete(request, *args,
+                **kwargs)
+        pk = self.object.pk
+        self.object.delete()
+        return JsonResponse({'pk': pk})
 
 
 class ActionCompleteView(LoginRequiredMixin, FormView):
+    """Toggle whether an action is complete.
+
+    Requests that accept JSON only get the new state of the action so the
+    page can update the row in place.
+    """
     form_class = forms.CompleteActionForm
     template_name = 'projects/actionlistitem_errorform.html'
 
     def get_success_url(self):
-        item = get_object_or_404(models.ActionlistItem, pk=self.kwargs['pk'])
-        return reverse('projects:project', kwargs={'pk': item.project.pk})
+        return reverse('projects:project',
+            kwargs={'pk': self.item.project_id})
 
     def form_valid(self, form):
-        form.save(models.ActionlistItem.objects.get(pk=self.kwargs['pk']),
-            self.request.user)
+        self.item = get_object_or_404(models.ActionlistItem,
+            pk=self.kwargs['pk'])
+        form.save(self.item, self.request.user)
+        if _accepts_json(self.request):
+            if form.is_valid():
+                return JsonResponse({'pk': self.item.pk,
+                    'complete': self.item.complete})
+            return _json_errors(form, status=403)
+
         if form.is_valid():
             return super(ActionCompleteView, self).form_valid(form)
         else:
             return super(ActionCompleteView, self).form_invalid(form)
 
 
-class InlistItemToActionView(LoginRequiredMixin, FormView):
+class BulkActionView(LoginRequiredMixin, OwnedObjectMixin, FormView):
+    model = models.Project
+    form_class = forms.BulkActionForm
+    template_name = 'projects/actionlistitem_errorform.html'
+    http_method_names = ['post']
+
+    def get_form_kwargs(self):
+        kwargs = super(BulkActionView, self).get_form_kwargs()
+        kwargs['project'] = self.object
+        return kwargs
+
+    def get_success_url(self):
+        return reverse('projects:project', kwargs={'pk': self.object.pk})
+
+    def form_valid(self, form):
+        form.save()
+        if form.is_valid():
+            return super(BulkActionView, self).form_valid(form)
+        else:
+            return super(BulkActionView, self).form_invalid(form)
+
+
+class InlistItemToActionView(LoginRequiredMixin, OwnedObjectMixin, FormView):
     template_name = 'projects/convert_inlist_to_action.html'
+    model = models.InlistItem
     form_class = forms.ConvertInlistToActionForm
     success_url = reverse_lazy('projects:inlist')
 
-    def dispatch(self, request, *args, **kwargs):
-        self.inlist_item = get_object_or_404(models.InlistItem,
-            pk=self.kwargs['pk'])
-        # Test if the request came from the right user
-        if request.user != self.inlist_item.user \
-            and request.user != AnonymousUser():
-            raise Http404()
-
-        return super(InlistItemToActionView, self).dispatch(request, *args,
-            **kwargs)
-
     def get_form(self, form_class=None):
         if form_class is None:
             form_class = self.get_form_class()
         kwargs = self.get_form_kwargs()
-        kwargs['initial'].update({'text': self.inlist_item.text})
+        kwargs['initial'].update({'text': self.object.text})
         return form_class(**kwargs)
 
     def form_valid(self, form):
-        form.save(self.inlist_item, self.request.user)
+        form.save(self.object, self.request.user)
         if form.is_valid():
             return super(InlistItemToActionView, self).form_valid(form)
         else:
@@ -119,11 +315,22 @@ class CreateProjectView(LoginRequiredMixin, FormView):
     template_name = 'projects/create_project.html'
     form_class = forms.CreateProjectForm
 
+    def get_inlist_item(self):
+        """Return the inlist item that is converted to the project, if any.
+
+        The item is only fetched once and has to belong to the user.
+        """
+        if 'inlistitem' not in self.kwargs:
+            return None
+        if not hasattr(self, '_inlist_item'):
+            self._inlist_item = get_object_or_404(models.InlistItem,
+                pk=self.kwargs['inlistitem'], user=self.request.user)
+        return self._inlist_item
+
     def get_initial(self, *args, **kwargs):
         initial = super(CreateProjectView, self).get_initial(*args, **kwargs)
-        if 'inlistitem' in self.kwargs.keys():
-            initial['name'] = models.InlistItem.objects.get(
-                pk=self.kwargs['inlistitem'])
+        if self.get_inlist_item() is not None:
+            initial['name'] = self.get_inlist_item()
         return initial
 
     def get_success_url(self):
@@ -131,18 +338,20 @@ class CreateProjectView(LoginRequiredMixin, FormView):
 
     def form_valid(self, form):
         form.instance.user = self.request.user
-        form.validate_unique()
-        if form.is_valid():
+        item = self.get_inlist_item()
+        # The item is only removed when the project could be created
+        with transaction.atomic():
             self.project = form.save()
-            if 'inlistitem' in self.kwargs.keys():
-                models.InlistItem.objects.get(pk=self.kwargs['inlistitem']). \
-                    delete()
+            if self.project is not None and item is not None:
+                item.delete()
+        if self.project is not None:
             return super(CreateProjectView, self).form_valid(form)
         else:
             return super(CreateProjectView, self).form_invalid(form)
 
 
-class ProjectView(LoginRequiredMixin, FormMixin, DetailView):
+class ProjectView(LoginRequiredMixin, OwnedObjectMixin, FormMixin,
+        DetailView):
     template_name = 'projects/project.html'
     model = models.Project
     form_class = forms.ActionlistForm
@@ -150,29 +359,34 @@ class ProjectView(LoginRequiredMixin, FormMixin, DetailView):
     def get_success_url(self):
         return reverse_lazy('projects:project', kwargs={'pk': self.object.pk})
 
+    def get_queryset(self):
+        # The owner's settings and the sorting are needed to render the
+        # action list
+        return models.Project.objects.select_related('user__settings',
+            'action_sort')
+
+    def get_template_names(self):
+        # Asking for the next page only requires the new rows
+        if self.request.is_ajax():
+            return ['projects/actionlist_rows.html']
+        return super(ProjectView, self).get_template_names()
+
     def get_context_data(self, **kwargs):
         context = super(ProjectView, self).get_context_data(**kwargs)
         context['protected'] = (self.object.name == models.ACTION_PROJECT_NAME)
+        sort_method, sort_order = models.get_action_sort(self.object)
         context['sort_form'] = forms.ActionlistSortForm(
             initial={'return_model': self.object.pk,
-            'sort_method': self.request.session['sort_method'],
-            'sort_order': self.request.session['sort_order']})
-
-        # Sort the action list
-        # Case sensitive fields need to be converted to insensitive
-        if self.request.session['sort_method'] == 'text':
-            sort = Lower(self.request.session['sort_method'])
-            if self.request.session['sort_order'] == '-':
-                sort = sort.desc()
-            context['actions'] = self.object.action_list.order_by(sort)
-        # Other fields can just be sorted regularly
-        elif self.request.session['sort_method'] != '':
-            context['actions'] = self.object.action_list.order_by(
-                self.request.session['sort_order'] + \
-                self.request.session['sort_method'])
-        # When no ordering is applied just get all actions
-        else:
-            context['actions'] = self.object.action_list.all()
+            'sort_method': sort_method, 'sort_order': sort_order})
+        context['bulk_form'] = forms.BulkActionForm(self.object)
+
+        # Only show one page of the sorted action list
+        context['actions'], context['next_cursor'] = \
+            pagination.paginate_actions(self.object.action_list.all(),
+                sort_method, sort_order, self.request.GET.get('after'))
+        _add_row_urls(context['actions'], **ACTION_ROW_URLS)
+        context['delete_confirm'] = \
+            self.object.user.settings.action_delete_confirm
 
         return context
 
@@ -183,28 +397,25 @@ class ProjectView(LoginRequiredMixin, FormMixin, DetailView):
         form.instance.user = self.request.user
         form.instance.project = self.object
 
-        form.validate_unique()
-        if form.is_valid():
-            form.save()
-            return self.form_valid(form)
-        else:
+        action = form.save() if form.is_valid() else None
+        if action is None:
+            if _accepts_json(request):
+                return _json_errors(form)
             return self.form_invalid(form)
 
-    def dispatch(self, request, *args, **kwargs):
-        project = get_object_or_404(models.Project, pk=self.kwargs['pk'])
-
-        # Need to check against AnonymousUser to not break LoginRequiredMixin
-        if project.user != request.user and request.user != AnonymousUser():
-            raise Http404()
-
-        # Set default action sort session data
-        if 'sort_method' not in self.request.session:
-            self.request.session['sort_method'] = ''
-            self.request.session['sort_order'] = ''
-        return super(ProjectView, self).dispatch(request, *args, **kwargs)
+        if _accepts_json(request):
+            # Only send the new row, the page adds it to the list itself
+            _add_row_urls([action], **ACTION_ROW_URLS)
+            row = render_to_string('projects/actionlist_row.html',
+                {'item': action, 'delete_confirm':
+                    self.object.user.settings.action_delete_confirm},
+                request=request)
+            return JsonResponse({'pk': action.pk, 'html': row}, status=201)
+        return self.form_valid(form)
 
 
-class EditProjectView(LoginRequiredMixin, UpdateView):
+class EditProjectView(LoginRequiredMixin, OwnedObjectMixin,
+        ProtectedProjectMixin, UniqueConstraintViewMixin, UpdateView):
     form_class = forms.EditProjectForm
     model = models.Project
     template_name_suffix = '_edit'
@@ -212,37 +423,23 @@ class EditProjectView(LoginRequiredMixin, UpdateView):
     def get_success_url(self):
         return reverse('projects:project', kwargs={'pk': self.object.pk})
 
-    def dispatch(self, request, *args, **kwargs):
-        project = get_object_or_404(models.Project, pk=self.kwargs['pk'])
-        # Need to check against AnonymousUser to not break LoginRequiredMixin
-        if request.user != project.user and request.user != AnonymousUser():
-            raise Http404()
-
-        # Check whether the project is an action project
-        if project.name == models.ACTION_PROJECT_NAME:
-            return permission_denied(request, None)
-
-        return super(EditProjectView, self).dispatch(request, *args, **kwargs)
 
-
-class DeleteProjectView(LoginRequiredMixin, DeleteView):
+class DeleteProjectView(LoginRequiredMixin, OwnedObjectMixin,
+        ProtectedProjectMixin, DeleteView):
+    """Hide the project right away and leave deleting its actions to the
+    worker."""
     model = models.Project
     success_url = reverse_lazy('projects:main')
 
-    def dispatch(self, request, *args, **kwargs):
-        project = get_object_or_404(models.Project, pk=self.kwargs['pk'])
-        # Need to check against AnonymousUser to not break LoginRequiredMixin
-        if request.user != project.user and request.user != AnonymousUser():
-            raise Http404()
-
-        # Check whether the project is an action project
-        if project.name == models.ACTION_PROJECT_NAME:
-            return permission_denied(request, None)
-
-        return super(DeleteProjectView, self).dispatch(request, *args, **kwargs)
+    def delete(self, request, *args, **kwargs):
+        with transaction.atomic():
+            models.mark_project_deleted(self.object)
+            enqueue(tasks.purge_project, project_id=self.object.pk)
+        return HttpResponseRedirect(self.get_success_url())
 
 
-class EditActionView(LoginRequiredMixin, UpdateView):
+class EditActionView(LoginRequiredMixin, UniqueConstraintViewMixin,
+        UpdateView):
     template_name = 'projects/edit_action.html'
     model = models.ActionlistItem
     form_class = forms.EditActionForm
@@ -258,18 +455,37 @@ class EditActionView(LoginRequiredMixin, UpdateView):
         return super(EditActionView, self).post(*args, **kwargs)
 
 
+class ProjectAutocompleteView(LoginRequiredMixin, View):
+    """List the user's projects whose name starts with ?q=."""
+    def get(self, request, *args, **kwargs):
+        projects = models.Project.objects.filter(user=request.user,
+            name__istartswith=request.GET.get('q', '').strip()) \
+            .order_by('name').values_list('pk', 'name')[:AUTOCOMPLETE_LIMIT]
+        return JsonResponse({'results': [{'id': pk, 'name': name}
+            for pk, name in projects]})
+
+
 class ActionlistSortView(LoginRequiredMixin, FormView):
+    """Change how the action list of a project is sorted.
+
+    The sorting is stored with the project. Requests that accept JSON get
+    the new sorting instead of a redirect.
+    """
     form_class = forms.ActionlistSortForm
     template_name = 'generic_form.html'
     http_method_names = ['post']
 
     def get_success_url(self):
-        if self.return_model.user != self.request.user:
-            return permission_denied(self.request, None)
         return reverse('projects:project', kwargs={'pk': self.return_model.pk})
 
     def form_valid(self, form):
-        self.request.session['sort_method'] = form.cleaned_data['sort_method']
-        self.request.session['sort_order'] = form.cleaned_data['sort_order']
         self.return_model = form.cleaned_data['return_model']
+        if self.return_model.user_id != self.request.user.pk:
+            return permission_denied(self.request, None)
+        models.set_action_sort(self.return_model,
+            form.cleaned_data['sort_method'], form.cleaned_data['sort_order'])
+        if _accepts_json(self.request):
+            return JsonResponse({
+                'sort_method': form.cleaned_data['sort_method'],
+                'sort_order': form.cleaned_data['sort_order']})
         return super(ActionlistSortView, self).form_valid(form)
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/1.8/ref/settings/
 
 # Shamelessly taken from Two Scoops of Django 1.8
 from unipath import Path
+from .util import get_session_engine
 BASE_DIR = Path(__file__).ancestor(3)
 
 
@@ -40,6 +41,7 @@ INSTALLED_APPS = (
     # our apps
     'landing',
     'functional_tests',
+    'jobs',
     'projects',
     'settings',
 
@@ -64,6 +66,10 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.security.SecurityMiddleware',
 )
 
+# Pages that only show data never write to the session, so any of the
+# engines in util.SESSION_ENGINES can be used
+SESSION_ENGINE = get_session_engine('db')
+
 ROOT_URLCONF = 'projman.urls'
 
 context_processors = [
@@ -137,6 +143,11 @@ STATICFILES_DIRS = (
 # Allauth related
 LOGIN_REDIRECT_URL = "settings:set_language"
 AUTHENTICATION_BACKENDS = (
+    'settings.backends.ModelBackend',
+    'settings.backends.AuthenticationBackend',
+    # Sessions that were started before 2026-10-18 still name these. Remove
+    # them after 2026-11-01, when SESSION_COOKIE_AGE (two weeks) has passed
+    # and those sessions have expired
     'django.contrib.auth.backends.ModelBackend',
     'allauth.account.auth_backends.AuthenticationBackend',
 )
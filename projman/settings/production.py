@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from .base import *
-from .util import get_env_setting
+from .util import get_env_setting, get_session_engine
 
 DEBUG = False
 DOMAIN = get_env_setting('PROJMAN_DOMAIN')
@@ -18,7 +18,12 @@ DATABASES = {
         'USER': get_env_setting('PROJMAN_DB_USER'),
         'PASSWORD': get_env_setting('PROJMAN_DB_PASSWORD'),
         'HOST': 'localhost',
-        'PORT': '',
+        # PgBouncer listens on 6432 when it is used, see deploy/provision.py
+        'PORT': get_env_setting('PROJMAN_DB_PORT', ''),
+        # Keep connections open between requests instead of connecting for
+        # every one of them, landing.signals drops the ones that went stale
+        'CONN_MAX_AGE': int(get_env_setting('PROJMAN_DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     },
 }
 
@@ -40,12 +45,28 @@ TEMPLATES = [
 
 SITE_ID = 1
 
+# All gunicorn workers need to share the cache, otherwise invalidating
+# cached data in one worker leaves stale data in the others
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+        'KEY_PREFIX': DOMAIN,
+    },
+}
+
+# Sessions are read on every request, keep them out of the database where
+# possible. See the benchmark_sessions command for the differences
+SESSION_ENGINE = get_session_engine('cached_db')
+
 INSTALLED_APPS += ('gunicorn',)
 
 SOCIALACCOUNT_PROVIDERS = {}
 
 # Email settings
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Emails are sent by the worker, so requests don't wait for the mail server
+EMAIL_BACKEND = 'jobs.mail.SpoolEmailBackend'
+SPOOLED_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = get_env_setting('PROJMAN_EMAIL_HOST')
 EMAIL_PORT = get_env_setting('PROJMAN_EMAIL_PORT')
 EMAIL_HOST_PASSWORD = get_env_setting('PROJMAN_EMAIL_HOST_PASSWORD')
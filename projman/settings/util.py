@@ -3,9 +3,24 @@
 from django.core.exceptions import ImproperlyConfigured
 import os
 
-def get_env_setting(setting):
+def get_env_setting(setting, default=None):
     try:
         return os.environ[setting]
     except KeyError:
+        if default is not None:
+            return default
         raise ImproperlyConfigured(
             "Could not find setting '{}' in the environment.".format(setting))
+
+# Session backends that can be picked with PROJMAN_SESSION_ENGINE, cached_db
+# needs a cache that is shared by all workers
+SESSION_ENGINES = ('db', 'cached_db', 'signed_cookies')
+
+def get_session_engine(default):
+    """Return the session engine named in PROJMAN_SESSION_ENGINE."""
+    name = os.environ.get('PROJMAN_SESSION_ENGINE', default)
+    if name not in SESSION_ENGINES:
+        raise ImproperlyConfigured(
+            "PROJMAN_SESSION_ENGINE should be one of {}, not '{}'.".format(
+                ', '.join(SESSION_ENGINES), name))
+    return 'django.contrib.sessions.backends.' + name
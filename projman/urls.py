@@ -19,13 +19,16 @@ from django.contrib import admin
 import django.views.defaults as default_views
 
 import allauth.urls
+import projects.api_urls
 import projects.urls
 import settings.urls
 
-from landing.views import LandingView
+from landing.views import HealthCheckView, LandingView
 
 urlpatterns = [
     url(r'^admin/', include(admin.site.urls)),
+    url(r'^api/v1/', include(projects.api_urls, namespace='api_v1')),
+    url(r'^health/$', HealthCheckView.as_view(), name='health'),
 ]
 
 urlpatterns += i18n_patterns(
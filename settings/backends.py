@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import allauth.account.auth_backends
+from django.contrib.auth import backends, get_user_model
+
+class SettingsBackendMixin(object):
+    """Load the settings of the user in the same query as the user.
+
+    Every request gets its user from the backend that was used to log in, so
+    request.user.settings never needs a query of its own.
+    """
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            return UserModel._default_manager.select_related('settings') \
+                .get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+
+
+class ModelBackend(SettingsBackendMixin, backends.ModelBackend):
+    pass
+
+
+class AuthenticationBackend(SettingsBackendMixin,
+        allauth.account.auth_backends.AuthenticationBackend):
+    pass
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-18 01:58
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The value of projects.models.ACTION_PROJECT_NAME
+ACTION_PROJECT_NAME = 'Actions'
+
+def set_action_projects(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Settings = apps.get_model('settings', 'Settings')
+    projects = Project.objects.filter(name=ACTION_PROJECT_NAME).values_list(
+        'pk', 'user_id')
+    for pk, user_id in projects.iterator():
+        Settings.objects.filter(user_id=user_id).update(action_project_id=pk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0018_project_name_index'),
+        ('settings', '0004_auto_20160128_0010'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='settings',
+            name='action_project',
+            field=models.OneToOneField(default=None, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='projects.Project'),
+        ),
+        migrations.RunPython(set_action_projects, migrations.RunPython.noop),
+    ]
@@ -9,6 +9,10 @@ class Settings(models.Model):
         default=settings.LANGUAGE_CODE)
     inlist_delete_confirm = models.BooleanField(default=True)
     action_delete_confirm = models.BooleanField(default=True)
+    # Actions without a project go here, see get_action_project_id()
+    action_project = models.OneToOneField('projects.Project', null=True,
+        default=None, editable=False, on_delete=models.SET_NULL,
+        related_name='+')
 
     def __str__(self):
         return str(self.user) + "'s settings"
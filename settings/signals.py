@@ -7,6 +7,6 @@ from settings import models
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_settings_for_new_user(sender, created, instance, **kwargs):
+    # The projects app may have created the settings already
     if created:
-        p = models.Settings(user=instance)
-        p.save()
+        models.Settings.objects.get_or_create(user=instance)
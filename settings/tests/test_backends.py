@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from settings import backends
+
+User = get_user_model()
+alice = None
+
+def setUpModule():
+    global alice
+    alice = User.objects.create_user('alice', 'alice@test.org', 'alice')
+
+def tearDownModule():
+    alice.delete()
+
+class SettingsBackendTests(TestCase):
+    def test_get_user_loads_settings_along(self):
+        for backend in (backends.ModelBackend(),
+                backends.AuthenticationBackend()):
+            with self.subTest(backend=backend):
+                with self.assertNumQueries(1):
+                    user = backend.get_user(alice.pk)
+                with self.assertNumQueries(0):
+                    self.assertEqual(user.settings.language, 'en-us')
+
+    def test_get_user_returns_None_for_unknown_user(self):
+        self.assertIsNone(backends.ModelBackend().get_user(alice.pk + 100))
+
+    def test_login_uses_settings_backend(self):
+        self.client.login(username='alice', password='alice')
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY],
+            'settings.backends.ModelBackend')
+
+    def test_pages_do_not_query_settings(self):
+        self.client.login(username='alice', password='alice')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/en/settings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([q['sql'] for q in queries
+            if 'FROM "settings_settings"' in q['sql']], [])
+
+    def test_sessions_of_previous_backends_stay_logged_in(self):
+        self.client.login(username='alice', password='alice')
+        session = self.client.session
+        session[BACKEND_SESSION_KEY] = \
+            'django.contrib.auth.backends.ModelBackend'
+        session.save()
+        response = self.client.get('/en/settings/')
+        self.assertEqual(response.status_code, 200)
@@ -1,5 +1,85 @@
+// Post a form and ask for a JSON answer instead of a new page
+function postJSON(form) {
+	return $.ajax({
+		type: 'POST',
+		url: form.attr('action'),
+		data: form.serialize(),
+		dataType: 'json'
+	});
+}
+
+// Submit the form the regular way when updating in place did not work
+function submitPlain(form) {
+	form.data('plain', true).submit();
+}
+
+// Store the pk of the project whose name was typed, if there is one
+function pickProject(input) {
+	var option = $('#' + input.attr('list')).children().filter(function() {
+		return this.value === input.val();
+	});
+	$(input.data('target')).val(option.length ? option.data('pk') : '');
+}
+
 $(document).ready(function() {
-	$('.action-item').click(function() {
-		$(this).children('form').submit();
+	// Rows can be added later on, so listen on the document
+	$(document).on('click', '.action-item', function() {
+		var form = $(this).children('form');
+		var row = $(this).closest('.action-row');
+		postJSON(form).done(function(data) {
+			row.toggleClass('checked', data.complete);
+		}).fail(function() {
+			form.submit();
+		});
+	});
+
+	$(document).on('submit', '.action-row .button-form', function(event) {
+		var form = $(this);
+		if (form.data('plain')) {
+			return;
+		}
+		event.preventDefault();
+		postJSON(form).done(function() {
+			form.closest('.action-row').remove();
+		}).fail(function() {
+			submitPlain(form);
+		});
+	});
+
+	$(document).on('submit', '#add-action', function(event) {
+		var form = $(this);
+		// A new action only goes at the bottom of a complete, unsorted list
+		if (form.data('plain') || $('.load-more').length ||
+				!$('#list').is('[data-append-new]')) {
+			return;
+		}
+		event.preventDefault();
+		postJSON(form).done(function(data) {
+			$('#list').append(data.html);
+			form.find('input[name="text"]').val('');
+		}).fail(function() {
+			submitPlain(form);
+		});
+	});
+
+	$(document).on('click', '.load-more', function(event) {
+		event.preventDefault();
+		var button = $(this);
+		$.get(button.attr('href'), function(rows) {
+			button.replaceWith(rows);
+		});
+	});
+
+	// Only the projects that start with what was typed are fetched
+	$(document).on('input', '.project-autocomplete', function() {
+		var input = $(this);
+		$.getJSON(input.data('url'), {q: input.val()}, function(data) {
+			var options = $('#' + input.attr('list')).empty();
+			$.each(data.results, function(i, project) {
+				$('<option>').val(project.name).attr('data-pk', project.id)
+					.appendTo(options);
+			});
+			pickProject(input);
+		});
 	});
 });